@@ -1,5 +1,5 @@
 from abc import ABC, abstractmethod
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Set, Tuple
 import logging
 from datetime import datetime
 import uuid
@@ -7,6 +7,13 @@ import uuid
 class BaseAgent(ABC):
     """Base class for all KRAKEN-FLUX agents."""
     
+    # Task types CPU-heavy enough to run in the process pool backend
+    process_task_types: Set[str] = set()
+    
+    # Task types that may be memoized, mapped to the payload fields (dotted
+    # paths) their results depend on; those fields alone form the cache key
+    cacheable_task_types: Dict[str, Tuple[str, ...]] = {}
+    
     def __init__(self, agent_id: Optional[str] = None):
         self.agent_id = agent_id or str(uuid.uuid4())
         self.logger = logging.getLogger(f"{self.__class__.__name__}_{self.agent_id}")
@@ -30,6 +37,10 @@ class BaseAgent(ABC):
         """Clean up resources and prepare for shutdown."""
         pass
     
+    def preload_models(self) -> None:
+        """Load heavy models up front; called once in each process pool worker."""
+        pass
+    
     async def heartbeat(self) -> Dict[str, Any]:
         """Update agent status and return current state."""
         self.last_heartbeat = datetime.utcnow()
@@ -8,6 +8,9 @@ from .base_agent import BaseAgent
 class GuardianAgent(BaseAgent):
     """Guardian Agent responsible for primary threat detection and assessment."""
     
+    process_task_types = {"network_analysis", "behavioral_analysis", "threat_assessment"}
+    cacheable_task_types = {"threat_assessment": ("type", "incident_data")}
+    
     def __init__(self, agent_id: str = None):
         super().__init__(agent_id)
         self.register_capability("network_traffic_analysis")
@@ -1,21 +1,36 @@
 import asyncio
 import logging
-import psutil
-from datetime import datetime
+from datetime import timezone
 from typing import Dict, List, Optional
 
-from ..core.agent_types import AgentType, AgentCapability
-from ..models.database import SystemMetrics
-from ..core.database import db_manager
+import numpy as np
+
+from .samplers import DISK_RATE_FIELDS, NIC_RATE_FIELDS, ProcessSampler, SystemSampler
+from ..core.agent_types import AGENT_TYPE_CONFIGS, AgentType, AgentCapability
+from ..core.anomaly import anomaly_detector
+from ..core.metrics_buffer import metrics_buffer
+from ..core.ring_buffer import recent_metrics
 
 logger = logging.getLogger(__name__)
 
+# Scored in the order of anomaly_detector's columns
+RESOURCES = ("cpu", "memory", "disk")
+
 class MonitoringAgent:
     def __init__(self, agent_id: str, configuration: Dict):
         self.agent_id = agent_id
         self.configuration = configuration
         self._running = False
         self._last_metrics: Optional[Dict] = None
+        self.sampler = SystemSampler()
+        defaults = AGENT_TYPE_CONFIGS[AgentType.MONITORING]
+        self.process_sampler = ProcessSampler(
+            configuration.get("top_processes", defaults["top_processes"]),
+            configuration.get("short_lived_process_seconds", defaults["short_lived_process_seconds"])
+        )
+        threshold = configuration.get("alert_threshold", defaults["alert_threshold"])
+        # Older configurations gave the threshold as a fraction
+        self.alert_threshold = threshold * 100 if threshold <= 1 else threshold
 
     async def start(self):
         """Start the monitoring agent."""
@@ -30,78 +45,79 @@ class MonitoringAgent:
     async def collect_system_metrics(self) -> Dict:
         """Collect system metrics."""
         try:
-            metrics = {
-                "timestamp": datetime.utcnow(),
-                "cpu": {
-                    "percent": psutil.cpu_percent(interval=1),
-                    "count": psutil.cpu_count(),
-                    "frequency": psutil.cpu_freq().current if psutil.cpu_freq() else None
-                },
-                "memory": {
-                    "total": psutil.virtual_memory().total,
-                    "available": psutil.virtual_memory().available,
-                    "percent": psutil.virtual_memory().percent
-                },
-                "disk": {
-                    "total": psutil.disk_usage('/').total,
-                    "used": psutil.disk_usage('/').used,
-                    "free": psutil.disk_usage('/').free,
-                    "percent": psutil.disk_usage('/').percent
-                },
-                "network": {
-                    "bytes_sent": psutil.net_io_counters().bytes_sent,
-                    "bytes_recv": psutil.net_io_counters().bytes_recv,
-                    "packets_sent": psutil.net_io_counters().packets_sent,
-                    "packets_recv": psutil.net_io_counters().packets_recv
-                }
-            }
+            metrics = await self.sampler.sample()
+            metrics["processes"] = await self.process_sampler.sample()
             return metrics
         except Exception as e:
             logger.error(f"Error collecting system metrics: {str(e)}")
             return {}
 
     async def analyze_metrics(self, metrics: Dict) -> List[Dict]:
-        """Analyze collected metrics for potential issues."""
-        alerts = []
-        
-        # CPU usage alert
-        if metrics.get("cpu", {}).get("percent", 0) > self.configuration.get("alert_threshold", 80):
-            alerts.append({
-                "type": "high_cpu_usage",
-                "severity": "warning",
-                "message": f"High CPU usage detected: {metrics['cpu']['percent']}%"
-            })
+        """Flag saturated resources and usage that departs from its learned baseline."""
+        if not metrics:
+            return []
 
-        # Memory usage alert
-        if metrics.get("memory", {}).get("percent", 0) > self.configuration.get("alert_threshold", 80):
-            alerts.append({
-                "type": "high_memory_usage",
-                "severity": "warning",
-                "message": f"High memory usage detected: {metrics['memory']['percent']}%"
-            })
+        percents = [metrics.get(resource, {}).get("percent") for resource in RESOURCES]
+        scores = anomaly_detector.update(
+            [self.agent_id],
+            [metrics["timestamp"].replace(tzinfo=timezone.utc).timestamp()],
+            np.array([[np.nan if value is None else value for value in percents]])
+        )
 
-        # Disk usage alert
-        if metrics.get("disk", {}).get("percent", 0) > self.configuration.get("alert_threshold", 80):
-            alerts.append({
-                "type": "high_disk_usage",
-                "severity": "warning",
-                "message": f"High disk usage detected: {metrics['disk']['percent']}%"
-            })
+        alerts = []
+        for index, (resource, value) in enumerate(zip(RESOURCES, percents)):
+            if value is None:
+                continue
+            if value > self.alert_threshold:
+                alerts.append({
+                    "type": f"high_{resource}_usage",
+                    "severity": "warning",
+                    "message": f"High {resource} usage detected: {value}%"
+                })
+            elif scores["anomalous"][0, index]:
+                z_score = float(scores["z"][0, index])
+                baseline = float(scores["baseline"][0, index])
+                alerts.append({
+                    "type": f"{resource}_usage_anomaly",
+                    "severity": "warning",
+                    "message": f"Unusual {resource} usage: {value}% against a baseline of {baseline:.1f}% (z={z_score:.1f})",
+                    "z_score": z_score,
+                    "baseline": baseline
+                })
 
         return alerts
 
     async def store_metrics(self, metrics: Dict):
-        """Store collected metrics in the database."""
+        """Keep collected metrics in memory and queue them for the next bulk write."""
         try:
-            async with db_manager.get_session() as session:
-                system_metrics = SystemMetrics(
-                    agent_id=self.agent_id,
-                    metric_type="system",
-                    metrics_data=metrics,
-                    timestamp=metrics["timestamp"]
-                )
-                session.add(system_metrics)
-                await session.commit()
+            network, disk = metrics["network"], metrics["disk"]
+            rates = {
+                **{f"network_{rate}": network.get(rate) for rate in NIC_RATE_FIELDS.values()},
+                **{f"disk_{rate}": disk.get(rate) for rate in DISK_RATE_FIELDS.values()}
+            }
+            rx, tx = rates["network_rx_bytes_per_sec"], rates["network_tx_bytes_per_sec"]
+            recent_metrics.record(self.agent_id, metrics["timestamp"], {
+                "cpu_percent": metrics["cpu"]["percent"],
+                "memory_percent": metrics["memory"]["percent"],
+                "disk_percent": disk["percent"],
+                "network_bytes_sent": network["bytes_sent"],
+                "network_bytes_recv": network["bytes_recv"],
+                "network_rx_bytes_per_sec": rx,
+                "network_tx_bytes_per_sec": tx
+            })
+            metrics_buffer.add({
+                "timestamp": metrics["timestamp"],
+                "cpu_usage": metrics["cpu"]["percent"],
+                "memory_usage": metrics["memory"]["percent"],
+                "disk_usage": disk["percent"],
+                "network_usage": None if rx is None or tx is None else rx + tx,
+                **rates,
+                "metrics_data": {
+                    "agent_id": self.agent_id,
+                    "metric_type": "system",
+                    **{key: value for key, value in metrics.items() if key != "timestamp"}
+                }
+            })
         except Exception as e:
             logger.error(f"Error storing system metrics: {str(e)}")
 
@@ -0,0 +1,357 @@
+import asyncio
+import heapq
+import logging
+import os
+import sys
+import time
+from datetime import datetime
+from typing import Any, Dict, Optional, Tuple
+
+import psutil
+
+logger = logging.getLogger(__name__)
+
+# Range of the 32-bit counters some drivers and kernels still expose
+COUNTER_WRAP = 2 ** 32
+
+# Cumulative counter -> per-second rate reported for each interface and disk
+NIC_RATE_FIELDS: Dict[str, str] = {
+    "bytes_recv": "rx_bytes_per_sec",
+    "bytes_sent": "tx_bytes_per_sec",
+    "packets_recv": "rx_packets_per_sec",
+    "packets_sent": "tx_packets_per_sec"
+}
+DISK_RATE_FIELDS: Dict[str, str] = {
+    "read_bytes": "read_bytes_per_sec",
+    "write_bytes": "write_bytes_per_sec",
+    "read_count": "read_iops",
+    "write_count": "write_iops"
+}
+
+def _busy_and_total(times) -> Tuple[float, float]:
+    """Busy and total CPU seconds, counted the way psutil.cpu_percent does."""
+    total = sum(times)
+    # Guest time is already included in user time on Linux
+    total -= getattr(times, "guest", 0.0) + getattr(times, "guest_nice", 0.0)
+    idle = times.idle + getattr(times, "iowait", 0.0)
+    return total - idle, total
+
+def counter_delta(previous: int, current: int) -> Optional[int]:
+    """Increase of a cumulative counter between two reads; None if it was reset.
+
+    A drop is taken as a 32-bit wraparound when the wrapped difference is
+    small, and as a reset (device re-created, driver reloaded) otherwise.
+    """
+    if current >= previous:
+        return current - previous
+    if previous < COUNTER_WRAP:
+        wrapped = COUNTER_WRAP - previous + current
+        if wrapped < COUNTER_WRAP // 2:
+            return wrapped
+    return None
+
+def _is_loopback(nic: str) -> bool:
+    return nic == "lo" or (nic.startswith("lo") and nic[2:].isdigit()) or "loopback" in nic.lower()
+
+class SystemSampler:
+    """Takes one snapshot of each psutil source per tick without blocking the loop.
+
+    CPU percent is derived from the change in cpu_times() since the previous
+    tick instead of sleeping through a measurement interval; the first tick
+    reports the average since boot. Network and disk I/O rates come from the
+    same kind of counter deltas, so they start on the second tick. Every
+    physical mount, disk and network interface is reported alongside the
+    totals.
+    """
+
+    def __init__(self):
+        self._cpu_count = psutil.cpu_count()
+        self._last_cpu: Optional[Tuple[float, float]] = None
+        self._last_io: Optional[Tuple[float, Dict[str, Any], Dict[str, Any]]] = None
+        self._whole_disks: Dict[str, bool] = {}
+
+    async def sample(self) -> Dict[str, Any]:
+        """Collect one sample; the syscalls run in a worker thread."""
+        snapshot = await asyncio.to_thread(self._snapshot)
+        return self._build(snapshot)
+
+    def _is_whole_disk(self, name: str) -> bool:
+        """Whether a disk_io_counters entry is a device rather than one of its partitions."""
+        if not sys.platform.startswith("linux"):
+            return True
+        if name not in self._whole_disks:
+            # Same test psutil uses for its own totals
+            self._whole_disks[name] = os.path.exists(f"/sys/block/{name}")
+        return self._whole_disks[name]
+
+    def _snapshot(self) -> Dict[str, Any]:
+        disks = {}
+        for partition in psutil.disk_partitions(all=False):
+            try:
+                disks[partition.mountpoint] = (partition.device, psutil.disk_usage(partition.mountpoint))
+            except OSError as e:
+                # Unreadable or vanished mounts (e.g. ejected media) are skipped
+                logger.debug(f"Skipping disk {partition.mountpoint}: {str(e)}")
+        try:
+            disk_io = psutil.disk_io_counters(perdisk=True) or {}
+        except (OSError, RuntimeError) as e:
+            # Not available in some containers
+            logger.debug(f"Disk I/O counters unavailable: {str(e)}")
+            disk_io = {}
+        freq = psutil.cpu_freq()
+        return {
+            "timestamp": datetime.utcnow(),
+            "monotonic": time.monotonic(),
+            "cpu_times": psutil.cpu_times(),
+            "cpu_freq": freq.current if freq else None,
+            "memory": psutil.virtual_memory(),
+            "disks": disks,
+            "disk_io": disk_io,
+            "whole_disks": {name for name in disk_io if self._is_whole_disk(name)},
+            "nics": psutil.net_io_counters(pernic=True)
+        }
+
+    def _cpu_percent(self, times) -> float:
+        busy, total = _busy_and_total(times)
+        last_busy, last_total = self._last_cpu or (0.0, 0.0)
+        self._last_cpu = (busy, total)
+        elapsed = total - last_total
+        if elapsed <= 0:
+            return 0.0
+        return round(min(max((busy - last_busy) / elapsed * 100, 0.0), 100.0), 1)
+
+    @staticmethod
+    def _rates(
+        previous: Dict[str, Any],
+        current: Dict[str, Any],
+        fields: Dict[str, str],
+        elapsed: Optional[float]
+    ) -> Dict[str, Dict[str, Optional[float]]]:
+        """Per-second rates of each device's counters since the previous tick."""
+        rates = {}
+        for name, counters in current.items():
+            before = previous.get(name)
+            rates[name] = {}
+            for field, rate in fields.items():
+                delta = None
+                if before is not None and elapsed:
+                    delta = counter_delta(getattr(before, field), getattr(counters, field))
+                rates[name][rate] = None if delta is None else round(delta / elapsed, 2)
+        return rates
+
+    @staticmethod
+    def _sum_rates(rates: Dict[str, Dict[str, Optional[float]]], names, fields: Dict[str, str]) -> Dict[str, Optional[float]]:
+        """Total of each rate over ``names``; None until any device has a rate."""
+        totals = {}
+        for rate in fields.values():
+            values = [rates[name][rate] for name in names if rates[name][rate] is not None]
+            totals[rate] = round(sum(values), 2) if values else None
+        return totals
+
+    def _build(self, snapshot: Dict[str, Any]) -> Dict[str, Any]:
+        memory = snapshot["memory"]
+
+        elapsed, last_nics, last_disk_io = None, {}, {}
+        if self._last_io is not None:
+            last_time, last_nics, last_disk_io = self._last_io
+            elapsed = snapshot["monotonic"] - last_time
+        self._last_io = (snapshot["monotonic"], snapshot["nics"], snapshot["disk_io"])
+        nic_rates = self._rates(last_nics, snapshot["nics"], NIC_RATE_FIELDS, elapsed)
+        disk_rates = self._rates(last_disk_io, snapshot["disk_io"], DISK_RATE_FIELDS, elapsed)
+
+        disks = {}
+        totals = {"total": 0, "used": 0, "free": 0}
+        seen_devices = set()
+        for mountpoint, (device, usage) in snapshot["disks"].items():
+            disks[mountpoint] = {
+                "device": device,
+                "total": usage.total,
+                "used": usage.used,
+                "free": usage.free,
+                "percent": usage.percent
+            }
+            # Bind mounts repeat a device; count its space once
+            if device not in seen_devices:
+                seen_devices.add(device)
+                for key in totals:
+                    totals[key] += getattr(usage, key)
+        # Like disk_usage().percent, ignore space reserved for root
+        usable = totals["used"] + totals["free"]
+
+        disk_io = {
+            name: {
+                "read_bytes": counters.read_bytes,
+                "write_bytes": counters.write_bytes,
+                "read_count": counters.read_count,
+                "write_count": counters.write_count,
+                **disk_rates[name]
+            }
+            for name, counters in snapshot["disk_io"].items()
+        }
+
+        interfaces = {
+            nic: {
+                "bytes_sent": counters.bytes_sent,
+                "bytes_recv": counters.bytes_recv,
+                "packets_sent": counters.packets_sent,
+                "packets_recv": counters.packets_recv,
+                "errin": counters.errin,
+                "errout": counters.errout,
+                "dropin": counters.dropin,
+                "dropout": counters.dropout,
+                **nic_rates[nic]
+            }
+            for nic, counters in snapshot["nics"].items()
+        }
+        network = {
+            key: sum(counters[key] for counters in interfaces.values())
+            for key in ("bytes_sent", "bytes_recv", "packets_sent", "packets_recv")
+        }
+        # Loopback traffic never leaves the host, so it stays out of the total rates
+        external = [nic for nic in interfaces if not _is_loopback(nic)]
+
+        return {
+            "timestamp": snapshot["timestamp"],
+            "cpu": {
+                "percent": self._cpu_percent(snapshot["cpu_times"]),
+                "count": self._cpu_count,
+                "frequency": snapshot["cpu_freq"]
+            },
+            "memory": {
+                "total": memory.total,
+                "available": memory.available,
+                "percent": memory.percent
+            },
+            "disk": {
+                **totals,
+                "percent": round(totals["used"] / usable * 100, 1) if usable else 0.0,
+                # Partitions are left out so their I/O is not counted twice
+                **self._sum_rates(disk_rates, snapshot["whole_disks"], DISK_RATE_FIELDS),
+                "mounts": disks,
+                "io": disk_io
+            },
+            "network": {
+                **network,
+                **self._sum_rates(nic_rates, external, NIC_RATE_FIELDS),
+                "interfaces": interfaces
+            }
+        }
+
+class ProcessSampler:
+    """Per-process CPU and memory accounting with a bounded top-N report.
+
+    Each tick reads only the name, CPU times and memory info of every PID
+    (one psutil oneshot pass). Exe, cmdline and user are read once per
+    process, and only for processes that make it into a report. Processes
+    are keyed by (pid, create_time) so a reused PID counts as a new process.
+    """
+
+    def __init__(self, top_n: int = 10, short_lived_seconds: float = 60.0):
+        self.top_n = top_n
+        self.short_lived_seconds = short_lived_seconds
+        self._known: Dict[Tuple[int, float], Dict[str, Any]] = {}
+        self._last_tick: Optional[float] = None
+
+    async def sample(self) -> Dict[str, Any]:
+        """Collect one tick of process accounting in a worker thread."""
+        return await asyncio.to_thread(self._collect)
+
+    def _collect(self) -> Dict[str, Any]:
+        now = time.time()
+        first_tick = self._last_tick is None
+        seen: Dict[Tuple[int, float], Dict[str, Any]] = {}
+        new = []
+
+        for process in psutil.process_iter(["name", "create_time", "cpu_times", "memory_info"]):
+            info = process.info
+            if info["create_time"] is None or info["cpu_times"] is None:
+                # Access denied; nothing to account for
+                continue
+            key = (process.pid, info["create_time"])
+            entry = self._known.get(key)
+            if entry is None:
+                entry = {
+                    "process": process,
+                    "pid": process.pid,
+                    "name": info["name"],
+                    "create_time": info["create_time"],
+                    "static": None,
+                    "cpu_seconds": 0.0,
+                    "rss": 0
+                }
+                if not first_tick:
+                    new.append(entry)
+                # All of a new process's CPU time was spent since it started
+                since = info["create_time"]
+            else:
+                since = self._last_tick
+
+            cpu_seconds = info["cpu_times"].user + info["cpu_times"].system
+            rss = info["memory_info"].rss if info["memory_info"] else 0
+            elapsed = max(now - since, 1e-6)
+            entry["cpu_percent"] = round(max(cpu_seconds - entry["cpu_seconds"], 0.0) / elapsed * 100, 1)
+            entry["rss_delta"] = rss - entry["rss"]
+            entry["cpu_seconds"] = cpu_seconds
+            entry["rss"] = rss
+            seen[key] = entry
+
+        # Exit times are not observable; a process gone within the window of
+        # its own start is reported as short-lived
+        exited = [entry for key, entry in self._known.items() if key not in seen]
+        short_lived = [entry for entry in exited if now - entry["create_time"] <= self.short_lived_seconds]
+        self._known = seen
+        self._last_tick = now
+
+        return {
+            "count": len(seen),
+            "top_cpu": [self._describe(entry) for entry in heapq.nlargest(
+                self.top_n, seen.values(), key=lambda entry: entry["cpu_percent"]
+            )],
+            "top_memory": [self._describe(entry) for entry in heapq.nlargest(
+                self.top_n, seen.values(), key=lambda entry: entry["rss"]
+            )],
+            "new_count": len(new),
+            "new": [self._describe(entry) for entry in heapq.nlargest(
+                self.top_n, new, key=lambda entry: entry["cpu_percent"]
+            )],
+            "exited_count": len(exited),
+            "short_lived_count": len(short_lived),
+            "short_lived": [
+                {
+                    "pid": entry["pid"],
+                    "name": entry["name"],
+                    "lifetime_max": round(now - entry["create_time"], 1),
+                    "cpu_seconds": round(entry["cpu_seconds"], 2)
+                }
+                for entry in heapq.nlargest(self.top_n, short_lived, key=lambda entry: entry["cpu_seconds"])
+            ]
+        }
+
+    @staticmethod
+    def _static(entry: Dict[str, Any]) -> Dict[str, Any]:
+        """Exe, cmdline and user, read on first report and cached for the process's life."""
+        if entry["static"] is None:
+            process = entry["process"]
+            static = {}
+            with process.oneshot():
+                for attr in ("exe", "cmdline", "username"):
+                    try:
+                        static[attr] = getattr(process, attr)()
+                    except (psutil.AccessDenied, psutil.NoSuchProcess):
+                        static[attr] = None
+            if static["cmdline"] is not None:
+                static["cmdline"] = " ".join(static["cmdline"])
+            entry["static"] = static
+        return entry["static"]
+
+    def _describe(self, entry: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            "pid": entry["pid"],
+            "name": entry["name"],
+            **self._static(entry),
+            "started": datetime.utcfromtimestamp(entry["create_time"]).isoformat(),
+            "cpu_percent": entry["cpu_percent"],
+            "cpu_seconds": round(entry["cpu_seconds"], 2),
+            "rss": entry["rss"],
+            "rss_delta": entry["rss_delta"]
+        }
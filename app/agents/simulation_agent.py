@@ -9,6 +9,19 @@ from .base_agent import BaseAgent
 class SimulationAgent(BaseAgent):
     """Simulation and Modeling Agent responsible for threat analysis and response planning."""
     
+    process_task_types = {"model_attack_path", "simulate_response", "analyze_impact"}
+    # The upstream assessment is keyed by its verdict, not its per-run envelope
+    cacheable_task_types = {
+        "model_attack_path": (
+            "type",
+            "target_system",
+            "attack_type",
+            "threat_data.result.threat_level",
+            "threat_data.result.confidence",
+            "threat_data.result.recommendations"
+        )
+    }
+    
     def __init__(self, agent_id: str = None):
         super().__init__(agent_id)
         self.register_capability("attack_path_modeling")
@@ -1,11 +1,23 @@
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, Query
+from fastapi.responses import JSONResponse, StreamingResponse
+from sqlalchemy import select
+from sqlalchemy.orm import raiseload, selectinload
 from typing import List, Optional
 from datetime import datetime
+import json
 import logging
 
 from ..core.agent_manager import AgentManager
+from ..core.task_queue import QueueFullError
+from ..core.jobs import JobManager
+from ..core.coalescing import IncidentCoalescer
+from ..core.config import config_manager
 from ..core.database import db_manager
-from ..models.database import Incident, ThreatAssessment, Evidence, Action
+from ..core.entity_cache import entity_cache
+from ..core.export import export_query, export_response
+from ..core.pagination import paginate
+from ..models.database import Incident, Action
+from ..schemas import IncidentDetail, IncidentSummary, Page
 from ..core.logging_config import log_incident
 
 router = APIRouter()
@@ -14,101 +26,241 @@ logger = logging.getLogger("IncidentAPI")
 # Initialize agent manager
 agent_manager = AgentManager()
 
+# Background response jobs for asynchronous intake
+job_manager = JobManager()
+
+# Duplicate alert coalescing
+incident_coalescer = IncidentCoalescer()
+
 @router.post("/incidents/", response_model=dict)
-async def create_incident(incident_data: dict):
-    """Create a new security incident."""
+async def create_incident(incident_data: dict, mode: Optional[str] = None):
+    """Create a new security incident.
+
+    Alerts matching an incident opened within the coalescing window are
+    merged into it instead of starting another response. In ``async`` mode
+    the incident is persisted and a 202 with a job ID is returned
+    immediately; the response pipeline runs in the background.
+    """
+    mode = mode or config_manager.INCIDENT_INTAKE_MODE
+    if mode not in ("sync", "async"):
+        raise HTTPException(status_code=400, detail=f"Unknown intake mode: {mode}")
+    
     try:
-        # Log the incident
-        log_incident(incident_data)
+        fingerprint = incident_coalescer.fingerprint(incident_data)
+        async with incident_coalescer.guard(fingerprint):
+            async with db_manager.get_session() as session:
+                # Attach duplicates to the open incident without another pipeline run
+                existing = await incident_coalescer.find_open(session, fingerprint)
+                if existing:
+                    incident_coalescer.merge(existing, incident_data)
+                    await session.commit()
+                    await entity_cache.invalidate("incident", existing.id)
+                    return {
+                        "status": "coalesced",
+                        "incident_id": existing.id,
+                        "duplicate_count": existing.duplicate_count
+                    }
+                
+                # Hold a queue slot for every stage before persisting anything,
+                # so a saturated pipeline rejects the alert rather than the
+                # response of an incident that was already committed
+                reservation = agent_manager.reserve_response_capacity()
+                try:
+                    # Log the incident
+                    log_incident(incident_data)
+                    
+                    # Create incident record
+                    incident = Incident(
+                        incident_type=incident_data.get("type"),
+                        severity=incident_data.get("severity", "low"),
+                        status="detected",
+                        description=incident_data.get("description"),
+                        source_ip=incident_data.get("source_ip"),
+                        target_systems=incident_data.get("target_systems", []),
+                        evidence_ids=[],
+                        containment_status="pending",
+                        resolution_status="pending",
+                        fingerprint=fingerprint,
+                        duplicate_count=0,
+                        last_seen_at=datetime.utcnow()
+                    )
+                    session.add(incident)
+                    await session.commit()
+                except BaseException:
+                    reservation.release()
+                    raise
+                incident_id = incident.id
+                incident_coalescer.remember(fingerprint, incident_id)
         
-        # Create incident record
-        with db_manager.get_session() as session:
-            incident = Incident(
-                incident_type=incident_data.get("type"),
-                severity=incident_data.get("severity", "low"),
-                status="detected",
-                description=incident_data.get("description"),
-                source_ip=incident_data.get("source_ip"),
-                target_systems=incident_data.get("target_systems", []),
-                evidence_ids=[],
-                containment_status="pending",
-                resolution_status="pending"
-            )
-            session.add(incident)
-            session.commit()
-            
-            # Coordinate response using agents
-            response = await agent_manager.coordinate_response({
-                "incident_id": incident.id,
-                **incident_data
+        if mode == "async":
+            try:
+                job = job_manager.launch(
+                    incident_id,
+                    lambda on_stage_complete: agent_manager.coordinate_response(
+                        {"incident_id": incident_id, **incident_data},
+                        on_stage_complete,
+                        reservation
+                    )
+                )
+            except BaseException:
+                reservation.release()
+                raise
+            return JSONResponse(status_code=202, content={
+                "status": "accepted",
+                "incident_id": incident_id,
+                "job_id": job.job_id,
+                "status_url": f"/incidents/jobs/{job.job_id}",
+                "events_url": f"/incidents/jobs/{job.job_id}/events"
             })
-            
-            return {
-                "status": "success",
-                "incident_id": incident.id,
-                "response": response
-            }
+        
+        # Coordinate response using agents
+        response = await agent_manager.coordinate_response({
+            "incident_id": incident_id,
+            **incident_data
+        }, reservation=reservation)
+        
+        return {
+            "status": "success",
+            "incident_id": incident_id,
+            "response": response
+        }
+    except QueueFullError as e:
+        logger.warning(f"Rejected incident, task queue full: {str(e)}")
+        raise HTTPException(status_code=429, detail=str(e))
     except Exception as e:
         logger.error(f"Error creating incident: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
-@router.get("/incidents/{incident_id}", response_model=dict)
+@router.get("/incidents/queue/stats", response_model=dict)
+async def get_queue_stats():
+    """Get task queue depth and wait-time statistics per agent type."""
+    return agent_manager.task_queue.get_stats()
+
+@router.get("/incidents/cache/stats", response_model=dict)
+async def get_result_cache_stats():
+    """Get agent task result cache hit/miss statistics."""
+    if not agent_manager.result_cache:
+        return {"enabled": False}
+    return {"enabled": True, **agent_manager.result_cache.get_stats()}
+
+@router.get("/incidents/jobs/{job_id}", response_model=dict)
+async def get_incident_job(job_id: str):
+    """Get the status and finished stages of a background response job."""
+    job = job_manager.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job.to_dict()
+
+@router.get("/incidents/jobs/{job_id}/events")
+async def stream_incident_job(job_id: str):
+    """Stream a response job's stage results as Server-Sent Events."""
+    job = job_manager.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    
+    async def event_stream():
+        async for event in job.events(keepalive=config_manager.RESPONSE_JOB_KEEPALIVE):
+            if event is None:
+                yield ": keepalive\n\n"
+                continue
+            yield f"event: {event['event']}\ndata: {json.dumps(event['data'], default=str)}\n\n"
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+def incident_filters(
+    status: Optional[str],
+    severity: Optional[str],
+    start_date: Optional[datetime],
+    end_date: Optional[datetime]
+) -> List:
+    """WHERE criteria shared by the incident listing and export."""
+    criteria = []
+    if status:
+        criteria.append(Incident.status == status)
+    if severity:
+        criteria.append(Incident.severity == severity)
+    if start_date:
+        criteria.append(Incident.timestamp >= start_date)
+    if end_date:
+        criteria.append(Incident.timestamp <= end_date)
+    return criteria
+
+@router.get("/incidents/export")
+async def export_incidents(
+    status: Optional[str] = None,
+    severity: Optional[str] = None,
+    start_date: Optional[datetime] = None,
+    end_date: Optional[datetime] = None,
+    format: str = "ndjson"
+):
+    """Stream every matching incident, oldest first, as NDJSON or CSV."""
+    try:
+        return export_response(
+            export_query(Incident, *incident_filters(status, severity, start_date, end_date)), format, "incidents"
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.get("/incidents/{incident_id}", response_model=IncidentDetail)
 async def get_incident(incident_id: str):
     """Get incident details."""
-    try:
-        with db_manager.get_session() as session:
-            incident = session.query(Incident).filter(Incident.id == incident_id).first()
+    async def load():
+        async with db_manager.get_session() as session:
+            # Each collection arrives in one batched SELECT; a joined load of
+            # three collections would multiply rows instead
+            incident = (await session.execute(
+                select(Incident)
+                .filter(Incident.id == incident_id)
+                .options(
+                    selectinload(Incident.assessments),
+                    selectinload(Incident.evidence),
+                    selectinload(Incident.actions),
+                    raiseload("*")
+                )
+            )).scalars().first()
             if not incident:
-                raise HTTPException(status_code=404, detail="Incident not found")
-            
-            # Get related data
-            assessments = session.query(ThreatAssessment).filter(
-                ThreatAssessment.incident_id == incident_id
-            ).all()
-            
-            evidence = session.query(Evidence).filter(
-                Evidence.incident_id == incident_id
-            ).all()
-            
-            actions = session.query(Action).filter(
-                Action.incident_id == incident_id
-            ).all()
-            
-            return {
-                "incident": incident.__dict__,
-                "assessments": [a.__dict__ for a in assessments],
-                "evidence": [e.__dict__ for e in evidence],
-                "actions": [a.__dict__ for a in actions]
-            }
+                return None
+            return IncidentDetail.model_validate({
+                "incident": incident,
+                "assessments": incident.assessments,
+                "evidence": incident.evidence,
+                "actions": incident.actions
+            }, from_attributes=True).model_dump(mode="json")
+
+    try:
+        detail = await entity_cache.get_or_load("incident", incident_id, load)
+        if not detail:
+            raise HTTPException(status_code=404, detail="Incident not found")
+        return detail
     except HTTPException:
         raise
     except Exception as e:
         logger.error(f"Error retrieving incident: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
-@router.get("/incidents/", response_model=List[dict])
+@router.get("/incidents/", response_model=Page[IncidentSummary])
 async def list_incidents(
     status: Optional[str] = None,
     severity: Optional[str] = None,
     start_date: Optional[datetime] = None,
-    end_date: Optional[datetime] = None
+    end_date: Optional[datetime] = None,
+    limit: int = Query(config_manager.DEFAULT_PAGE_SIZE, ge=1, le=config_manager.MAX_PAGE_SIZE),
+    cursor: Optional[str] = None
 ):
-    """List incidents with optional filters."""
+    """List incidents with optional filters, newest first, one page at a time."""
     try:
-        with db_manager.get_session() as session:
-            query = session.query(Incident)
-            
-            if status:
-                query = query.filter(Incident.status == status)
-            if severity:
-                query = query.filter(Incident.severity == severity)
-            if start_date:
-                query = query.filter(Incident.timestamp >= start_date)
-            if end_date:
-                query = query.filter(Incident.timestamp <= end_date)
-            
-            incidents = query.order_by(Incident.timestamp.desc()).all()
-            return [incident.__dict__ for incident in incidents]
+        async with db_manager.get_session() as session:
+            query = select(Incident).filter(*incident_filters(status, severity, start_date, end_date))
+            incidents, next_cursor = await paginate(
+                session, query, Incident.timestamp, Incident.id, limit, cursor
+            )
+            return {"items": incidents, "next_cursor": next_cursor}
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         logger.error(f"Error listing incidents: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -117,8 +269,8 @@ async def list_incidents(
 async def update_incident(incident_id: str, update_data: dict):
     """Update incident details."""
     try:
-        with db_manager.get_session() as session:
-            incident = session.query(Incident).filter(Incident.id == incident_id).first()
+        async with db_manager.get_session() as session:
+            incident = await session.get(Incident, incident_id)
             if not incident:
                 raise HTTPException(status_code=404, detail="Incident not found")
             
@@ -127,7 +279,8 @@ async def update_incident(incident_id: str, update_data: dict):
                 if hasattr(incident, key):
                     setattr(incident, key, value)
             
-            session.commit()
+            await session.commit()
+            await entity_cache.invalidate("incident", incident_id)
             
             return {
                 "status": "success",
@@ -143,9 +296,14 @@ async def update_incident(incident_id: str, update_data: dict):
 @router.post("/incidents/{incident_id}/actions", response_model=dict)
 async def add_incident_action(incident_id: str, action_data: dict):
     """Add a new action to an incident."""
+    reservation = None
     try:
-        with db_manager.get_session() as session:
-            incident = session.query(Incident).filter(Incident.id == incident_id).first()
+        # Hold the queue slot before the action is committed as pending
+        if action_data.get("agent_type"):
+            reservation = agent_manager.reserve_capacity([action_data["agent_type"]])
+        
+        async with db_manager.get_session() as session:
+            incident = await session.get(Incident, incident_id)
             if not incident:
                 raise HTTPException(status_code=404, detail="Incident not found")
             
@@ -159,20 +317,24 @@ async def add_incident_action(incident_id: str, action_data: dict):
                 result={}
             )
             session.add(action)
-            session.commit()
+            await session.commit()
+            await entity_cache.invalidate("incident", incident_id)
             
-            # Execute action using appropriate agent
-            result = await agent_manager.execute_task({
+            # Execute action using appropriate agent, prioritised by incident severity
+            # Server-owned fields come last so the request body cannot override
+            # them; severity sets the queue priority
+            result = await agent_manager.submit_task({
+                **action_data,
                 "type": action.action_type,
-                "agent_type": action_data.get("agent_type"),
                 "action_id": action.id,
-                **action_data
-            })
+                "severity": incident.severity
+            }, reservation=reservation)
             
             # Update action with result
             action.status = "completed" if result.get("status") == "success" else "failed"
             action.result = result
-            session.commit()
+            await session.commit()
+            await entity_cache.invalidate("incident", incident_id)
             
             return {
                 "status": "success",
@@ -181,6 +343,12 @@ async def add_incident_action(incident_id: str, action_data: dict):
             }
     except HTTPException:
         raise
+    except QueueFullError as e:
+        logger.warning(f"Rejected incident action, task queue full: {str(e)}")
+        raise HTTPException(status_code=429, detail=str(e))
     except Exception as e:
         logger.error(f"Error adding incident action: {str(e)}")
-        raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=str(e))
+    finally:
+        if reservation:
+            reservation.release()
\ No newline at end of file
@@ -1,29 +1,42 @@
-from fastapi import APIRouter, HTTPException, Depends
-from typing import List
+from fastapi import APIRouter, HTTPException, Depends, Query
+from typing import Optional
 from ....models.database import Agent as AgentModel
-from ....schemas import Agent, AgentCreate
+from ....schemas import Page, Agent, AgentCreate
+from ....core.config import config_manager
 from ....core.database import get_db
-from sqlalchemy.orm import Session
+from ....core.entity_cache import entity_cache
+from ....core.pagination import paginate
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 
 router = APIRouter()
 
-@router.get("/", response_model=List[Agent])
+@router.get("/", response_model=Page[Agent])
 async def list_agents(
-    skip: int = 0,
-    limit: int = 100,
-    db: Session = Depends(get_db)
+    limit: int = Query(config_manager.DEFAULT_PAGE_SIZE, ge=1, le=config_manager.MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    db: AsyncSession = Depends(get_db)
 ):
-    """List all agents."""
-    agents = db.query(AgentModel).offset(skip).limit(limit).all()
-    return agents
+    """List all agents, newest first, one page at a time."""
+    try:
+        agents, next_cursor = await paginate(
+            db, select(AgentModel), AgentModel.created_at, AgentModel.id, limit, cursor
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"items": agents, "next_cursor": next_cursor}
 
 @router.get("/{agent_id}", response_model=Agent)
 async def get_agent(
     agent_id: int,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Get a specific agent by ID."""
-    agent = db.query(AgentModel).filter(AgentModel.id == agent_id).first()
+    async def load():
+        agent = await db.get(AgentModel, agent_id)
+        return Agent.model_validate(agent).model_dump(mode="json") if agent else None
+
+    agent = await entity_cache.get_or_load("agent", agent_id, load)
     if not agent:
         raise HTTPException(status_code=404, detail="Agent not found")
     return agent
@@ -31,43 +44,45 @@ async def get_agent(
 @router.post("/", response_model=Agent)
 async def create_agent(
     agent: AgentCreate,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Create a new agent."""
     db_agent = AgentModel(**agent.dict())
     db.add(db_agent)
-    db.commit()
-    db.refresh(db_agent)
+    await db.commit()
+    await db.refresh(db_agent)
     return db_agent
 
 @router.put("/{agent_id}", response_model=Agent)
 async def update_agent(
     agent_id: int,
     agent: AgentCreate,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Update an existing agent."""
-    db_agent = db.query(AgentModel).filter(AgentModel.id == agent_id).first()
+    db_agent = await db.get(AgentModel, agent_id)
     if not db_agent:
         raise HTTPException(status_code=404, detail="Agent not found")
     
     for key, value in agent.dict().items():
         setattr(db_agent, key, value)
     
-    db.commit()
-    db.refresh(db_agent)
+    await db.commit()
+    await entity_cache.invalidate("agent", agent_id)
+    await db.refresh(db_agent)
     return db_agent
 
 @router.delete("/{agent_id}")
 async def delete_agent(
     agent_id: int,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Delete an agent."""
-    db_agent = db.query(AgentModel).filter(AgentModel.id == agent_id).first()
+    db_agent = await db.get(AgentModel, agent_id)
     if not db_agent:
         raise HTTPException(status_code=404, detail="Agent not found")
     
-    db.delete(db_agent)
-    db.commit()
+    await db.delete(db_agent)
+    await db.commit()
+    await entity_cache.invalidate("agent", agent_id)
     return {"message": "Agent deleted successfully"} 
\ No newline at end of file
@@ -1,29 +1,68 @@
-from fastapi import APIRouter, HTTPException, Depends
-from typing import List
+from fastapi import APIRouter, HTTPException, Depends, Query, Request
+from datetime import datetime
+from typing import Any, Dict, List, Optional
 from ....models.database import Evidence as EvidenceModel
-from ....schemas import Evidence, EvidenceCreate
+from ....schemas import IngestResult, Page, Evidence, EvidenceCreate, EvidenceIngest
+from ....core.config import config_manager
 from ....core.database import get_db
-from sqlalchemy.orm import Session
+from ....core.entity_cache import entity_cache
+from ....core.export import export_query, export_response
+from ....core.ingest import PayloadTooLargeError, ingest_batch, read_body
+from ....core.pagination import paginate
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 
 router = APIRouter()
 
-@router.get("/", response_model=List[Evidence])
+@router.get("/", response_model=Page[Evidence])
 async def list_evidence(
-    skip: int = 0,
-    limit: int = 100,
-    db: Session = Depends(get_db)
+    limit: int = Query(config_manager.DEFAULT_PAGE_SIZE, ge=1, le=config_manager.MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    db: AsyncSession = Depends(get_db)
 ):
-    """List all evidence entries."""
-    evidence = db.query(EvidenceModel).offset(skip).limit(limit).all()
-    return evidence
+    """List all evidence entries, newest first, one page at a time."""
+    try:
+        evidence, next_cursor = await paginate(
+            db, select(EvidenceModel), EvidenceModel.timestamp, EvidenceModel.id, limit, cursor
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"items": evidence, "next_cursor": next_cursor}
+
+@router.get("/export")
+async def export_evidence(
+    incident_id: Optional[str] = None,
+    evidence_type: Optional[str] = None,
+    start_date: Optional[datetime] = None,
+    end_date: Optional[datetime] = None,
+    format: str = "ndjson"
+):
+    """Stream every matching evidence entry, oldest first, as NDJSON or CSV."""
+    criteria = []
+    if incident_id:
+        criteria.append(EvidenceModel.incident_id == incident_id)
+    if evidence_type:
+        criteria.append(EvidenceModel.evidence_type == evidence_type)
+    if start_date:
+        criteria.append(EvidenceModel.timestamp >= start_date)
+    if end_date:
+        criteria.append(EvidenceModel.timestamp <= end_date)
+    try:
+        return export_response(export_query(EvidenceModel, *criteria), format, "evidence")
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
 @router.get("/{evidence_id}", response_model=Evidence)
 async def get_evidence(
     evidence_id: int,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Get a specific evidence entry by ID."""
-    evidence = db.query(EvidenceModel).filter(EvidenceModel.id == evidence_id).first()
+    async def load():
+        evidence = await db.get(EvidenceModel, evidence_id)
+        return Evidence.model_validate(evidence).model_dump(mode="json") if evidence else None
+
+    evidence = await entity_cache.get_or_load("evidence", evidence_id, load)
     if not evidence:
         raise HTTPException(status_code=404, detail="Evidence not found")
     return evidence
@@ -31,43 +70,74 @@ async def get_evidence(
 @router.post("/", response_model=Evidence)
 async def create_evidence(
     evidence: EvidenceCreate,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Create a new evidence entry."""
     db_evidence = EvidenceModel(**evidence.dict())
     db.add(db_evidence)
-    db.commit()
-    db.refresh(db_evidence)
+    await db.commit()
+    if db_evidence.incident_id:
+        await entity_cache.invalidate("incident", db_evidence.incident_id)
+    await db.refresh(db_evidence)
     return db_evidence
 
+async def invalidate_incidents(rows: List[Dict[str, Any]]):
+    """Drop cached details of every incident that just gained evidence."""
+    for incident_id in {row.get("incident_id") for row in rows} - {None}:
+        await entity_cache.invalidate("incident", incident_id)
+
+@router.post("/bulk", response_model=IngestResult)
+async def bulk_create_evidence(request: Request):
+    """Load a batch of evidence entries from an NDJSON stream or a JSON array."""
+    try:
+        return await ingest_batch(
+            await read_body(request), request.headers.get("content-type", ""), EvidenceIngest, EvidenceModel,
+            after_load=invalidate_incidents
+        )
+    except PayloadTooLargeError as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except RuntimeError as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
 @router.put("/{evidence_id}", response_model=Evidence)
 async def update_evidence(
     evidence_id: int,
     evidence: EvidenceCreate,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Update an existing evidence entry."""
-    db_evidence = db.query(EvidenceModel).filter(EvidenceModel.id == evidence_id).first()
+    db_evidence = await db.get(EvidenceModel, evidence_id)
     if not db_evidence:
         raise HTTPException(status_code=404, detail="Evidence not found")
     
+    # Evidence moved to another incident leaves both details stale
+    previous_incident_id = db_evidence.incident_id
     for key, value in evidence.dict().items():
         setattr(db_evidence, key, value)
     
-    db.commit()
-    db.refresh(db_evidence)
+    await db.commit()
+    await entity_cache.invalidate("evidence", evidence_id)
+    for incident_id in {previous_incident_id, db_evidence.incident_id} - {None}:
+        await entity_cache.invalidate("incident", incident_id)
+    await db.refresh(db_evidence)
     return db_evidence
 
 @router.delete("/{evidence_id}")
 async def delete_evidence(
     evidence_id: int,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Delete an evidence entry."""
-    db_evidence = db.query(EvidenceModel).filter(EvidenceModel.id == evidence_id).first()
+    db_evidence = await db.get(EvidenceModel, evidence_id)
     if not db_evidence:
         raise HTTPException(status_code=404, detail="Evidence not found")
     
-    db.delete(db_evidence)
-    db.commit()
+    incident_id = db_evidence.incident_id
+    await db.delete(db_evidence)
+    await db.commit()
+    await entity_cache.invalidate("evidence", evidence_id)
+    if incident_id:
+        await entity_cache.invalidate("incident", incident_id)
     return {"message": "Evidence deleted successfully"} 
\ No newline at end of file
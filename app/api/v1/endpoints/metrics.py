@@ -1,29 +1,87 @@
-from fastapi import APIRouter, HTTPException, Depends
-from typing import List
+from fastapi import APIRouter, HTTPException, Depends, Query, Request
+from datetime import datetime
+from typing import Any, Dict, List, Optional
 from ....models.database import SystemMetrics as SystemMetricsModel
-from ....schemas import SystemMetrics, SystemMetricsCreate
+from ....schemas import IngestResult, Page, SystemMetrics, SystemMetricsCreate, SystemMetricsIngest
+from ....core.config import config_manager
 from ....core.database import get_db
-from sqlalchemy.orm import Session
+from ....core.export import export_query, export_response
+from ....core.ingest import PayloadTooLargeError, ingest_batch, read_body
+from ....core.metrics_store import metrics_store
+from ....core.pagination import paginate
+from ....core.ring_buffer import recent_metrics
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 
 router = APIRouter()
 
-@router.get("/", response_model=List[SystemMetrics])
+@router.get("/", response_model=Page[SystemMetrics])
 async def list_metrics(
-    skip: int = 0,
-    limit: int = 100,
-    db: Session = Depends(get_db)
+    limit: int = Query(config_manager.DEFAULT_PAGE_SIZE, ge=1, le=config_manager.MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    db: AsyncSession = Depends(get_db)
 ):
-    """List all system metrics entries."""
-    metrics = db.query(SystemMetricsModel).offset(skip).limit(limit).all()
-    return metrics
+    """List all system metrics entries, newest first, one page at a time."""
+    try:
+        metrics, next_cursor = await paginate(
+            db, select(SystemMetricsModel), SystemMetricsModel.timestamp, SystemMetricsModel.id, limit, cursor
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"items": metrics, "next_cursor": next_cursor}
+
+@router.get("/series")
+async def get_metrics_series(
+    start: datetime,
+    end: Optional[datetime] = None,
+    resolution: str = "auto",
+    max_points: int = Query(config_manager.METRICS_SERIES_MAX_POINTS, ge=1, le=config_manager.MAX_PAGE_SIZE * 10)
+):
+    """Get min/max/avg/p95 metric points, from raw samples or the coarsest fitting rollup."""
+    end = end or datetime.utcnow()
+    if end <= start:
+        raise HTTPException(status_code=400, detail="end must be after start")
+    try:
+        return await metrics_store.query_series(start, end, resolution, max_points)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.get("/recent")
+async def get_recent_metrics(
+    window: float = Query(config_manager.RECENT_METRICS_WINDOW, gt=0),
+    series: Optional[str] = None,
+    max_points: int = Query(config_manager.METRICS_SERIES_MAX_POINTS, ge=1, le=config_manager.MAX_PAGE_SIZE * 10)
+):
+    """Get the last ``window`` seconds of monitoring samples and their aggregates from memory."""
+    try:
+        return recent_metrics.query(window, series, max_points)
+    except KeyError:
+        raise HTTPException(status_code=404, detail=f"Unknown metrics series: {series}")
+
+@router.get("/export")
+async def export_metrics(
+    start_date: Optional[datetime] = None,
+    end_date: Optional[datetime] = None,
+    format: str = "ndjson"
+):
+    """Stream system metrics in a time range, oldest first, as NDJSON or CSV."""
+    criteria = []
+    if start_date:
+        criteria.append(SystemMetricsModel.timestamp >= start_date)
+    if end_date:
+        criteria.append(SystemMetricsModel.timestamp <= end_date)
+    try:
+        return export_response(export_query(SystemMetricsModel, *criteria), format, "system_metrics")
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
 @router.get("/{metric_id}", response_model=SystemMetrics)
 async def get_metric(
     metric_id: int,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Get a specific system metric entry by ID."""
-    metric = db.query(SystemMetricsModel).filter(SystemMetricsModel.id == metric_id).first()
+    metric = await db.get(SystemMetricsModel, metric_id)
     if not metric:
         raise HTTPException(status_code=404, detail="System metric not found")
     return metric
@@ -31,43 +89,65 @@ async def get_metric(
 @router.post("/", response_model=SystemMetrics)
 async def create_metric(
     metric: SystemMetricsCreate,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Create a new system metric entry."""
     db_metric = SystemMetricsModel(**metric.dict())
     db.add(db_metric)
-    db.commit()
-    db.refresh(db_metric)
+    await db.commit()
+    await db.refresh(db_metric)
     return db_metric
 
+async def mark_rollups_dirty(rows: List[Dict[str, Any]]):
+    """Have the rollups of every bucket a backfill touched recomputed."""
+    metrics_store.mark_dirty(row.get("timestamp") for row in rows)
+
+@router.post("/bulk", response_model=IngestResult)
+async def bulk_create_metrics(request: Request):
+    """Load a batch of system metrics entries from an NDJSON stream or a JSON array."""
+    try:
+        return await ingest_batch(
+            await read_body(request), request.headers.get("content-type", ""), SystemMetricsIngest, SystemMetricsModel,
+            after_load=mark_rollups_dirty
+        )
+    except PayloadTooLargeError as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except RuntimeError as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
 @router.put("/{metric_id}", response_model=SystemMetrics)
 async def update_metric(
     metric_id: int,
     metric: SystemMetricsCreate,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Update an existing system metric entry."""
-    db_metric = db.query(SystemMetricsModel).filter(SystemMetricsModel.id == metric_id).first()
+    db_metric = await db.get(SystemMetricsModel, metric_id)
     if not db_metric:
         raise HTTPException(status_code=404, detail="System metric not found")
     
+    previous_timestamp = db_metric.timestamp
     for key, value in metric.dict().items():
         setattr(db_metric, key, value)
     
-    db.commit()
-    db.refresh(db_metric)
+    await db.commit()
+    metrics_store.mark_dirty([previous_timestamp, db_metric.timestamp])
+    await db.refresh(db_metric)
     return db_metric
 
 @router.delete("/{metric_id}")
 async def delete_metric(
     metric_id: int,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Delete a system metric entry."""
-    db_metric = db.query(SystemMetricsModel).filter(SystemMetricsModel.id == metric_id).first()
+    db_metric = await db.get(SystemMetricsModel, metric_id)
     if not db_metric:
         raise HTTPException(status_code=404, detail="System metric not found")
     
-    db.delete(db_metric)
-    db.commit()
+    await db.delete(db_metric)
+    await db.commit()
+    metrics_store.mark_dirty([db_metric.timestamp])
     return {"message": "System metric deleted successfully"} 
\ No newline at end of file
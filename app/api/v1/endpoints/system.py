@@ -1,7 +1,11 @@
 from fastapi import APIRouter, Depends
 from typing import Dict
-from ....core.database import get_db
-from sqlalchemy.orm import Session
+from ....core.database import db_manager, get_db
+from ....core.entity_cache import entity_cache
+from ....core.metrics_buffer import metrics_buffer
+from ....core.metrics_store import metrics_store
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
 from ....core.config import config_manager
 
 router = APIRouter()
@@ -16,11 +20,11 @@ async def get_system_status():
     }
 
 @router.get("/health")
-async def health_check(db: Session = Depends(get_db)):
+async def health_check(db: AsyncSession = Depends(get_db)):
     """Perform a health check of the system."""
     try:
         # Test database connection
-        db.execute("SELECT 1")
+        await db.execute(text("SELECT 1"))
         db_status = "healthy"
     except Exception as e:
         db_status = f"unhealthy: {str(e)}"
@@ -31,4 +35,24 @@ async def health_check(db: Session = Depends(get_db)):
             "database": db_status,
             "api": "healthy"
         }
-    } 
\ No newline at end of file
+    }
+
+@router.get("/pool")
+async def get_pool_stats():
+    """Get live database connection pool statistics."""
+    return db_manager.get_pool_stats()
+
+@router.get("/metrics-buffer")
+async def get_metrics_buffer_stats():
+    """Get write-behind metrics buffer statistics."""
+    return metrics_buffer.get_stats()
+
+@router.get("/metrics-store")
+async def get_metrics_store_stats():
+    """Get metrics rollup and retention statistics."""
+    return metrics_store.get_stats()
+
+@router.get("/entity-cache")
+async def get_entity_cache_stats():
+    """Get read-through entity cache statistics."""
+    return entity_cache.get_stats()
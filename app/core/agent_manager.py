@@ -1,9 +1,20 @@
-from typing import Dict, List, Optional, Type
+from typing import Callable, Dict, Iterable, List, Optional, Type
 import asyncio
 import logging
+import time
 from datetime import datetime
+from sqlalchemy import select
 from ..models.database import Agent as AgentModel
 from ..core.database import db_manager
+from ..core.response_pipeline import ResponsePipeline
+from ..core.task_queue import QueueFullError, Reservation, TaskQueue
+from ..core.agent_registry import AgentRegistry
+from ..core.scheduler import CapabilityScheduler
+from ..core.executors import ProcessPoolBackend
+from ..core.result_cache import TaskResultCache
+from ..core.heartbeat import HeartbeatAggregator
+from ..core.agent_types import AgentCapability, AGENT_CLASS_CAPABILITIES
+from ..core.config import config_manager
 
 from ..agents.base_agent import BaseAgent
 from ..agents.guardian_agent import GuardianAgent
@@ -19,10 +30,11 @@ class AgentManager:
     
     def __init__(self):
         self.active_agents: Dict[str, Dict] = {}
-        self.agent_tasks: Dict[str, asyncio.Task] = {}
+        self.scheduler = CapabilityScheduler()
+        self.heartbeats = HeartbeatAggregator()
         self._initialized = False
         self.logger = logging.getLogger("AgentManager")
-        self.agents: Dict[str, BaseAgent] = {}
+        self.registry = AgentRegistry()
         self.agent_types: Dict[str, Type[BaseAgent]] = {
             "guardian": GuardianAgent,
             "forensic": ForensicAgent,
@@ -30,6 +42,19 @@ class AgentManager:
             "compliance": ComplianceAgent,
             "simulation": SimulationAgent
         }
+        self.process_backend: Optional[ProcessPoolBackend] = None
+        if config_manager.AGENT_EXECUTION_BACKEND == "process":
+            self.process_backend = ProcessPoolBackend(self.agent_types)
+        elif config_manager.AGENT_EXECUTION_BACKEND != "inline":
+            raise ValueError(f"Unknown agent execution backend: {config_manager.AGENT_EXECUTION_BACKEND}")
+        self.result_cache: Optional[TaskResultCache] = None
+        if config_manager.TASK_RESULT_CACHE_ENABLED:
+            self.result_cache = TaskResultCache({
+                agent_type: agent_class.cacheable_task_types
+                for agent_type, agent_class in self.agent_types.items()
+            })
+        self.task_queue = TaskQueue(self.execute_task)
+        self.response_pipeline = ResponsePipeline(self.submit_task)
         
     async def initialize(self) -> bool:
         """Initialize the agent manager and load existing agents."""
@@ -37,9 +62,20 @@ class AgentManager:
             if self._initialized:
                 return True
 
+            # Start the configured pool of agent instances for each type
+            for agent_type in self.agent_types:
+                count = config_manager.AGENT_INSTANCES.get(agent_type, config_manager.AGENT_INSTANCES_PER_TYPE)
+                for _ in range(count - len(self.registry.instances(agent_type))):
+                    await self.spawn_agent(agent_type)
+
+            # Warm the process pool so the first CPU-heavy task pays no startup cost
+            if self.process_backend:
+                await self.process_backend.start()
+
             # Load existing agents from database
             async with db_manager.get_session() as session:
-                agents = await session.query(AgentModel).all()
+                result = await session.execute(select(AgentModel))
+                agents = result.scalars().all()
                 for agent in agents:
                     if agent.status == "active":
                         await self.start_agent(agent)
@@ -51,6 +87,30 @@ class AgentManager:
             logger.error(f"Error initializing agent manager: {str(e)}")
             return False
 
+    async def spawn_agent(self, agent_type: str) -> Optional[BaseAgent]:
+        """Create, initialize and register a new agent instance of the given type."""
+        try:
+            if agent_type not in self.agent_types:
+                raise ValueError(f"Unknown agent type: {agent_type}")
+
+            agent = self.agent_types[agent_type]()
+            if not await agent.initialize():
+                raise RuntimeError(f"Agent {agent.agent_id} failed to initialize")
+
+            self.registry.register(agent_type, agent, AGENT_CLASS_CAPABILITIES.get(agent_type, set()))
+            return agent
+        except Exception as e:
+            logger.error(f"Error spawning {agent_type} agent: {str(e)}")
+            return None
+
+    async def retire_agent(self, agent_id: str) -> bool:
+        """Unregister an agent instance and release its resources."""
+        agent = self.registry.unregister(agent_id)
+        if agent is None:
+            logger.warning(f"Agent instance {agent_id} is not registered")
+            return False
+        return await agent.cleanup()
+
     async def start_agent(self, agent: AgentModel) -> bool:
         """Start an agent and its associated tasks."""
         try:
@@ -58,15 +118,48 @@ class AgentManager:
                 logger.warning(f"Agent {agent.id} is already running")
                 return False
 
-            # Create agent task
-            task = asyncio.create_task(self._run_agent(agent))
-            self.agent_tasks[agent.id] = task
             self.active_agents[agent.id] = {
                 "agent": agent,
                 "started_at": datetime.utcnow(),
-                "last_heartbeat": datetime.utcnow()
+                "last_heartbeat": datetime.utcnow(),
+                "jobs": [],
+                "capability_runs": {}
             }
 
+            # Register each enabled capability with the shared scheduler.
+            # "capability_intervals" overrides the agent-wide interval and
+            # "capability_timeouts" bounds a single run (default: its interval).
+            configuration = agent.configuration or {}
+            interval = configuration.get("interval", 30)
+            capability_intervals = configuration.get("capability_intervals", {})
+            capability_timeouts = configuration.get("capability_timeouts", {})
+            for capability, enabled in (agent.capabilities or {}).items():
+                if not enabled:
+                    continue
+                key = (agent.id, capability)
+                capability_interval = capability_intervals.get(capability, interval)
+                self.active_agents[agent.id]["capability_runs"][capability] = {
+                    "interval": capability_interval,
+                    "timeout": capability_timeouts.get(capability, capability_interval),
+                    "running": False,
+                    "runs": 0,
+                    "skipped": 0,
+                    "timeouts": 0,
+                    "failures": 0,
+                    "last_status": None,
+                    "last_started": None,
+                    "last_duration_ms": None
+                }
+                self.scheduler.schedule(
+                    key,
+                    capability_interval,
+                    lambda agent=agent, capability=capability: self._run_capability(agent, capability),
+                    jitter=configuration.get("jitter"),
+                    policy=configuration.get("missed_tick_policy")
+                )
+                self.active_agents[agent.id]["jobs"].append(key)
+
+            self._record_heartbeat(agent.id, "active")
             logger.info(f"Agent {agent.id} started successfully")
             return True
         except Exception as e:
@@ -80,18 +173,13 @@ class AgentManager:
                 logger.warning(f"Agent {agent_id} is not running")
                 return False
 
-            # Cancel agent task
-            task = self.agent_tasks.get(agent_id)
-            if task:
-                task.cancel()
-                try:
-                    await task
-                except asyncio.CancelledError:
-                    pass
+            # Remove the agent's capability runs from the scheduler
+            for key in self.active_agents[agent_id]["jobs"]:
+                self.scheduler.unschedule(key)
 
             # Remove agent from active agents
+            self._record_heartbeat(agent_id, "stopped")
             del self.active_agents[agent_id]
-            del self.agent_tasks[agent_id]
 
             logger.info(f"Agent {agent_id} stopped successfully")
             return True
@@ -99,28 +187,64 @@ class AgentManager:
             logger.error(f"Error stopping agent {agent_id}: {str(e)}")
             return False
 
-    async def _run_agent(self, agent: AgentModel):
-        """Run the agent's main loop."""
+    async def _run_capability(self, agent: AgentModel, capability: str):
+        """Run one scheduled capability tick for an agent under its timeout."""
+        agent_data = self.active_agents.get(agent.id)
+        if agent_data is None:
+            return
+
+        # Update agent heartbeat
+        agent_data["last_heartbeat"] = datetime.utcnow()
+
+        # A slow previous run must not pile up behind itself or delay other capabilities
+        run = agent_data["capability_runs"][capability]
+        if run["running"]:
+            run["skipped"] += 1
+            run["last_status"] = "skipped"
+            logger.warning(f"Skipping {capability} for agent {agent.id}: previous run still in progress")
+            return
+
+        run["running"] = True
+        run["last_started"] = datetime.utcnow().isoformat()
+        started = time.perf_counter()
         try:
-            while True:
-                # Update agent heartbeat
-                self.active_agents[agent.id]["last_heartbeat"] = datetime.utcnow()
-
-                # Execute agent's capabilities
-                for capability, enabled in agent.capabilities.items():
-                    if enabled:
-                        await self._execute_capability(agent, capability)
-
-                # Sleep for the configured interval
-                await asyncio.sleep(agent.configuration.get("interval", 30))
-        except asyncio.CancelledError:
-            logger.info(f"Agent {agent.id} task cancelled")
-        except Exception as e:
-            logger.error(f"Error in agent {agent.id} task: {str(e)}")
-            await self.stop_agent(agent.id)
+            succeeded = await asyncio.wait_for(
+                self._execute_capability(agent, capability),
+                timeout=run["timeout"]
+            )
+            run["last_status"] = "success" if succeeded else "error"
+            if not succeeded:
+                run["failures"] += 1
+        except asyncio.TimeoutError:
+            run["timeouts"] += 1
+            run["last_status"] = "timeout"
+            logger.warning(f"Capability {capability} for agent {agent.id} timed out after {run['timeout']}s")
+        finally:
+            run["running"] = False
+            run["runs"] += 1
+            run["last_duration_ms"] = round((time.perf_counter() - started) * 1000, 3)
+            self._record_heartbeat(agent.id, "active")
+
+    def _record_heartbeat(self, agent_id, status: str) -> None:
+        """Buffer an agent's current status for the next bulk flush to agent_status."""
+        agent_data = self.active_agents.get(agent_id)
+        if agent_data is None:
+            return
+        agent = agent_data["agent"]
+        self.heartbeats.record(
+            str(agent_id),
+            agent.agent_type,
+            status,
+            capabilities=agent.capabilities,
+            metrics={
+                "started_at": agent_data["started_at"].isoformat(),
+                "capability_runs": agent_data["capability_runs"]
+            },
+            last_heartbeat=agent_data["last_heartbeat"]
+        )
 
-    async def _execute_capability(self, agent: AgentModel, capability: str):
-        """Execute a specific agent capability."""
+    async def _execute_capability(self, agent: AgentModel, capability: str) -> bool:
+        """Execute a specific agent capability and report whether it succeeded."""
         try:
             if capability == "monitoring":
                 await self._execute_monitoring(agent)
@@ -130,8 +254,11 @@ class AgentManager:
                 await self._execute_response(agent)
             else:
                 logger.warning(f"Unknown capability {capability} for agent {agent.id}")
+                return False
+            return True
         except Exception as e:
             logger.error(f"Error executing capability {capability} for agent {agent.id}: {str(e)}")
+            return False
 
     async def _execute_monitoring(self, agent: AgentModel):
         """Execute monitoring capability."""
@@ -159,22 +286,34 @@ class AgentManager:
             "status": "active",
             "started_at": agent_data["started_at"].isoformat(),
             "last_heartbeat": agent_data["last_heartbeat"].isoformat(),
-            "capabilities": agent_data["agent"].capabilities
+            "capabilities": agent_data["agent"].capabilities,
+            "capability_runs": agent_data["capability_runs"]
         }
 
     async def get_all_agent_statuses(self) -> List[Dict]:
-        """Get the status of all active agents."""
-        return [
-            await self.get_agent_status(agent_id)
-            for agent_id in self.active_agents
-        ]
+        """Get the buffered status of every agent this process has run."""
+        return self.heartbeats.all()
 
     async def cleanup(self):
         """Clean up all agents and resources."""
         try:
-            # Stop all active agents
+            # Stop all active agents and the shared scheduler
             for agent_id in list(self.active_agents.keys()):
                 await self.stop_agent(agent_id)
+            await self.scheduler.stop()
+
+            # Persist final statuses
+            await self.heartbeats.stop()
+
+            # Stop queue workers and drop pending tasks
+            await self.task_queue.stop()
+
+            # Release every registered agent instance
+            for agent_id in list(self.registry.agents.keys()):
+                await self.retire_agent(agent_id)
+
+            if self.process_backend:
+                self.process_backend.shutdown()
 
             self._initialized = False
             logger.info("Agent manager cleaned up successfully")
@@ -186,29 +325,42 @@ class AgentManager:
         try:
             task_type = task.get("type")
             agent_type = task.get("agent_type")
+            capability = AgentCapability(task["capability"]) if task.get("capability") else None
             
             if agent_type not in self.agent_types:
                 raise ValueError(f"Unknown agent type: {agent_type}")
             
-            # Find appropriate agent
-            agent = next(
-                (a for a in self.agents.values() if isinstance(a, self.agent_types[agent_type])),
-                None
-            )
+            executed_by: List[str] = []
             
-            if not agent:
-                raise ValueError(f"No {agent_type} agent available")
+            async def run() -> Dict:
+                # Pick the least busy instance of the type (optionally narrowed by capability)
+                async with self.registry.acquire(agent_type, capability) as agent:
+                    if not agent:
+                        raise ValueError(f"No {agent_type} agent available")
+                    executed_by.append(agent.agent_id)
+                    
+                    # Execute task, off the event loop if it is CPU-heavy
+                    if self.process_backend and self.process_backend.handles(agent_type, task_type):
+                        return await self.process_backend.execute(agent_type, task)
+                    return await agent.execute(task)
             
-            # Execute task
-            result = await agent.execute(task)
+            # Reuse the result of an identical earlier (or in-flight) task when cacheable
+            cached = False
+            if self.result_cache and self.result_cache.is_cacheable(agent_type, task_type):
+                result, cached = await self.result_cache.get_or_compute(agent_type, task, run)
+            else:
+                result = await run()
             
             # Log execution
-            self.logger.info(f"Executed {task_type} task using {agent_type} agent")
+            agent_id = executed_by[0] if executed_by else None
+            self.logger.info(f"Executed {task_type} task using {agent_type} agent {agent_id or '(cached)'}")
             
             return {
                 "status": "success",
                 "task_type": task_type,
                 "agent_type": agent_type,
+                "agent_id": agent_id,
+                "cached": cached,
                 "timestamp": datetime.utcnow().isoformat(),
                 "result": result
             }
@@ -220,60 +372,63 @@ class AgentManager:
                 "timestamp": datetime.utcnow().isoformat()
             }
     
-    async def coordinate_response(self, incident: Dict) -> Dict:
-        """Coordinate a response to an incident using multiple agents."""
+    async def submit_task(
+        self,
+        task: Dict,
+        priority: Optional[int] = None,
+        reservation: Optional[Reservation] = None
+    ) -> Dict:
+        """Queue a task for execution, ordered by incident severity unless a priority is given."""
+        agent_type = task.get("agent_type")
+        if agent_type not in self.agent_types:
+            self.logger.error(f"Error submitting task: Unknown agent type: {agent_type}")
+            return {
+                "status": "error",
+                "error": f"Unknown agent type: {agent_type}",
+                "timestamp": datetime.utcnow().isoformat()
+            }
+        return await self.task_queue.submit(task, priority, reservation)
+    
+    def reserve_capacity(self, agent_types: Iterable[str]) -> Reservation:
+        """Hold queue slots for tasks of known agent types; raises QueueFullError if any queue is full."""
+        return self.task_queue.reserve(agent_type for agent_type in agent_types if agent_type in self.agent_types)
+    
+    def reserve_response_capacity(self) -> Reservation:
+        """Hold a queue slot for every stage of one response pipeline run."""
+        return self.reserve_capacity(stage["agent_type"] for stage in self.response_pipeline.stages)
+    
+    async def coordinate_response(
+        self,
+        incident: Dict,
+        on_stage_complete: Optional[Callable[[str, Dict, Dict], None]] = None,
+        reservation: Optional[Reservation] = None
+    ) -> Dict:
+        """Coordinate a response to an incident using multiple agents.
+
+        Stages use the slots of ``reservation`` when given; the unused ones
+        are released when the response finishes.
+        """
         try:
-            # 1. Guardian Agent: Assess threat
-            threat_assessment = await self.execute_task({
-                "type": "threat_assessment",
-                "agent_type": "guardian",
-                "incident_data": incident
-            })
-            
-            # 2. Simulation Agent: Model attack path
-            attack_model = await self.execute_task({
-                "type": "model_attack_path",
-                "agent_type": "simulation",
-                "threat_data": threat_assessment
-            })
-            
-            # 3. Containment Agent: Implement containment
-            containment = await self.execute_task({
-                "type": "contain_threat",
-                "agent_type": "containment",
-                "threat_data": threat_assessment,
-                "attack_model": attack_model
-            })
-            
-            # 4. Forensic Agent: Collect evidence
-            evidence = await self.execute_task({
-                "type": "collect_evidence",
-                "agent_type": "forensic",
-                "incident_data": incident,
-                "containment_data": containment
-            })
-            
-            # 5. Compliance Agent: Handle documentation
-            documentation = await self.execute_task({
-                "type": "prepare_documentation",
-                "agent_type": "compliance",
-                "incident_data": incident,
-                "evidence_data": evidence
-            })
+            # Independent stages (threat assessment and evidence collection)
+            # start together; the rest follow as their inputs become ready.
+            run = await self.response_pipeline.run(incident, on_stage_complete, reservation)
             
             return {
                 "status": "coordinated",
                 "timestamp": datetime.utcnow().isoformat(),
-                "threat_assessment": threat_assessment,
-                "attack_model": attack_model,
-                "containment": containment,
-                "evidence": evidence,
-                "documentation": documentation
+                **run["results"],
+                "stage_timings": run["stage_timings"],
+                "duration_ms": run["duration_ms"]
             }
+        except QueueFullError:
+            raise
         except Exception as e:
             self.logger.error(f"Error coordinating response: {str(e)}")
             return {
                 "status": "error",
                 "error": str(e),
                 "timestamp": datetime.utcnow().isoformat()
-            } 
\ No newline at end of file
+            }
+        finally:
+            if reservation:
+                reservation.release()
\ No newline at end of file
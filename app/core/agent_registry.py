@@ -0,0 +1,222 @@
+import logging
+from collections import OrderedDict, defaultdict, deque
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Deque, Dict, Iterable, List, Optional, Set, Tuple
+
+from .agent_types import AgentCapability
+from .config import config_manager
+from ..agents.base_agent import BaseAgent
+
+logger = logging.getLogger(__name__)
+
+PoolKey = Tuple[Optional[str], Optional[AgentCapability]]
+
+class CandidatePool:
+    """Instances matching one (type, capability) key, kept ready for O(1) selection.
+
+    A deque gives the round-robin order; for least-loaded selection the
+    instances are bucketed by in-flight count, each bucket in rotation
+    order, with the lowest non-empty bucket tracked as loads move by one.
+    """
+
+    def __init__(self):
+        self._order: Deque[str] = deque()
+        self._buckets: Dict[int, "OrderedDict[str, None]"] = defaultdict(OrderedDict)
+        self._load: Dict[str, int] = {}
+        self._min_load = 0
+
+    def __len__(self) -> int:
+        return len(self._load)
+
+    def add(self, agent_id: str, load: int) -> None:
+        self._order.append(agent_id)
+        self._load[agent_id] = load
+        self._buckets[load][agent_id] = None
+        if len(self._load) == 1 or load < self._min_load:
+            self._min_load = load
+
+    def remove(self, agent_id: str) -> None:
+        load = self._load.pop(agent_id)
+        self._order.remove(agent_id)
+        self._take(agent_id, load)
+
+    def set_load(self, agent_id: str, load: int) -> None:
+        previous = self._load[agent_id]
+        if load == previous:
+            return
+        self._load[agent_id] = load
+        # Enter the new bucket before leaving the old one so a minimum always exists
+        self._buckets[load][agent_id] = None
+        if load < self._min_load:
+            self._min_load = load
+        self._take(agent_id, previous)
+
+    def _take(self, agent_id: str, load: int) -> None:
+        bucket = self._buckets[load]
+        del bucket[agent_id]
+        if not bucket:
+            del self._buckets[load]
+            if load == self._min_load and self._load:
+                # Loads change one at a time, so the next bucket is close by
+                while self._min_load not in self._buckets:
+                    self._min_load += 1
+
+    def next_in_turn(self) -> Optional[str]:
+        if not self._order:
+            return None
+        agent_id = self._order[0]
+        self._order.rotate(-1)
+        return agent_id
+
+    def least_loaded(self) -> Optional[str]:
+        if not self._load:
+            return None
+        # Rotate within the bucket so ties are spread evenly
+        bucket = self._buckets[self._min_load]
+        agent_id = next(iter(bucket))
+        bucket.move_to_end(agent_id)
+        return agent_id
+
+class AgentRegistry:
+    """Indexes live agent instances by type and capability and balances work across them.
+
+    Every (type, capability) combination that has been asked for keeps a
+    CandidatePool, updated as agents come and go and as their in-flight
+    work changes, so selection does not depend on the number of instances.
+    """
+
+    def __init__(self, strategy: Optional[str] = None):
+        self.strategy = strategy or config_manager.AGENT_SELECTION_STRATEGY
+        if self.strategy not in ("least_loaded", "round_robin"):
+            raise ValueError(f"Unknown agent selection strategy: {self.strategy}")
+        self.agents: Dict[str, BaseAgent] = {}
+        self.in_flight: Dict[str, int] = {}
+        self._agent_types: Dict[str, str] = {}
+        self._agent_capabilities: Dict[str, Set[AgentCapability]] = {}
+        self._by_type: Dict[str, List[str]] = defaultdict(list)
+        # Capability -> providers, as an insertion-ordered set
+        self._by_capability: Dict[AgentCapability, Dict[str, None]] = defaultdict(dict)
+        self._pools: Dict[PoolKey, CandidatePool] = {}
+
+    @staticmethod
+    def _keys_for(agent_type: str, capabilities: Iterable[AgentCapability]) -> List[PoolKey]:
+        """Every pool key an instance of ``agent_type`` with ``capabilities`` belongs to."""
+        keys: List[PoolKey] = [(None, None), (agent_type, None)]
+        for capability in capabilities:
+            keys += [(None, capability), (agent_type, capability)]
+        return keys
+
+    def _pool(self, agent_type: Optional[str], capability: Optional[AgentCapability]) -> CandidatePool:
+        pool = self._pools.get((agent_type, capability))
+        if pool is None:
+            # Built once per key; afterwards kept up to date incrementally
+            pool = self._pools[(agent_type, capability)] = CandidatePool()
+            for agent in self.instances(agent_type, capability):
+                pool.add(agent.agent_id, self.in_flight[agent.agent_id])
+        return pool
+
+    def _set_in_flight(self, agent_id: str, count: int) -> None:
+        self.in_flight[agent_id] = count
+        for key in self._keys_for(self._agent_types[agent_id], self._agent_capabilities[agent_id]):
+            pool = self._pools.get(key)
+            if pool is not None:
+                pool.set_load(agent_id, count)
+
+    def register(
+        self,
+        agent_type: str,
+        agent: BaseAgent,
+        capabilities: Iterable[AgentCapability] = ()
+    ) -> None:
+        """Add a live agent instance to the type and capability indexes."""
+        if agent.agent_id in self.agents:
+            raise ValueError(f"Agent {agent.agent_id} is already registered")
+
+        capabilities = set(capabilities)
+        self.agents[agent.agent_id] = agent
+        self.in_flight[agent.agent_id] = 0
+        self._agent_types[agent.agent_id] = agent_type
+        self._agent_capabilities[agent.agent_id] = capabilities
+        self._by_type[agent_type].append(agent.agent_id)
+        for capability in capabilities:
+            self._by_capability[capability][agent.agent_id] = None
+        for key in self._keys_for(agent_type, capabilities):
+            pool = self._pools.get(key)
+            if pool is not None:
+                pool.add(agent.agent_id, 0)
+        logger.info(f"Registered {agent_type} agent {agent.agent_id}")
+
+    def unregister(self, agent_id: str) -> Optional[BaseAgent]:
+        """Remove an agent instance from every index."""
+        agent = self.agents.pop(agent_id, None)
+        if agent is None:
+            return None
+
+        agent_type = self._agent_types.pop(agent_id)
+        capabilities = self._agent_capabilities.pop(agent_id)
+        self._by_type[agent_type].remove(agent_id)
+        for capability in capabilities:
+            del self._by_capability[capability][agent_id]
+        for key in self._keys_for(agent_type, capabilities):
+            pool = self._pools.get(key)
+            if pool is not None:
+                pool.remove(agent_id)
+        self.in_flight.pop(agent_id, None)
+        logger.info(f"Unregistered {agent_type} agent {agent_id}")
+        return agent
+
+    def instances(
+        self,
+        agent_type: Optional[str] = None,
+        capability: Optional[AgentCapability] = None
+    ) -> List[BaseAgent]:
+        """List agent instances of a type and/or providing a capability."""
+        if agent_type is None and capability is None:
+            return list(self.agents.values())
+
+        candidates = self._by_type.get(agent_type, []) if agent_type is not None else None
+        if capability is not None:
+            providers = self._by_capability.get(capability, {})
+            candidates = list(providers) if candidates is None else [a for a in candidates if a in providers]
+        return [self.agents[agent_id] for agent_id in candidates]
+
+    def select(
+        self,
+        agent_type: Optional[str] = None,
+        capability: Optional[AgentCapability] = None
+    ) -> Optional[BaseAgent]:
+        """Pick an instance using the configured strategy, or None if none is registered."""
+        pool = self._pool(agent_type, capability)
+        agent_id = pool.next_in_turn() if self.strategy == "round_robin" else pool.least_loaded()
+        return None if agent_id is None else self.agents[agent_id]
+
+    @asynccontextmanager
+    async def acquire(
+        self,
+        agent_type: Optional[str] = None,
+        capability: Optional[AgentCapability] = None
+    ) -> AsyncIterator[Optional[BaseAgent]]:
+        """Select an agent and count the enclosed work against it."""
+        agent = self.select(agent_type, capability)
+        if agent is None:
+            yield None
+            return
+
+        self._set_in_flight(agent.agent_id, self.in_flight[agent.agent_id] + 1)
+        try:
+            yield agent
+        finally:
+            # The agent may have been unregistered meanwhile
+            if agent.agent_id in self.agents:
+                self._set_in_flight(agent.agent_id, self.in_flight[agent.agent_id] - 1)
+
+    def get_stats(self) -> Dict[str, Dict]:
+        """Return instance ids and in-flight counts per agent type."""
+        return {
+            agent_type: {
+                "instances": len(agent_ids),
+                "in_flight": {agent_id: self.in_flight[agent_id] for agent_id in agent_ids}
+            }
+            for agent_type, agent_ids in self._by_type.items()
+            if agent_ids
+        }
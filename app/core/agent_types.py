@@ -73,12 +73,45 @@ AGENT_TYPE_CAPABILITIES: Dict[AgentType, Set[AgentCapability]] = {
     }
 }
 
+# Define which capabilities each agent implementation provides, keyed by the
+# agent type names the AgentManager dispatches on
+AGENT_CLASS_CAPABILITIES: Dict[str, Set[AgentCapability]] = {
+    "guardian": {
+        AgentCapability.NETWORK_MONITORING,
+        AgentCapability.THREAT_DETECTION,
+        AgentCapability.NETWORK_ANALYSIS
+    },
+    "forensic": {
+        AgentCapability.EVIDENCE_COLLECTION,
+        AgentCapability.MEMORY_ANALYSIS,
+        AgentCapability.DISK_ANALYSIS
+    },
+    "containment": {
+        AgentCapability.INCIDENT_RESPONSE,
+        AgentCapability.THREAT_CONTAINMENT,
+        AgentCapability.SYSTEM_RECOVERY
+    },
+    "compliance": {
+        AgentCapability.POLICY_ENFORCEMENT,
+        AgentCapability.COMPLIANCE_CHECKING,
+        AgentCapability.AUDIT_LOGGING,
+        AgentCapability.REPORT_GENERATION
+    },
+    "simulation": {
+        AgentCapability.THREAT_SIMULATION,
+        AgentCapability.RESPONSE_SIMULATION,
+        AgentCapability.SCENARIO_TESTING
+    }
+}
+
 # Define default configurations for each agent type
 AGENT_TYPE_CONFIGS: Dict[AgentType, Dict] = {
     AgentType.MONITORING: {
         "interval": 30,  # seconds
         "batch_size": 100,
-        "alert_threshold": 0.8
+        "alert_threshold": 95,  # percent; saturation alerts regardless of the learned baseline
+        "top_processes": 10,  # processes listed per report
+        "short_lived_process_seconds": 60  # processes exiting this soon after starting are flagged
     },
     AgentType.FORENSICS: {
         "interval": 60,  # seconds
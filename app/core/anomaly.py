@@ -0,0 +1,144 @@
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+from .config import config_manager
+
+# Utilisation columns scored for every monitoring series
+ANOMALY_COLUMNS: List[str] = ["cpu_percent", "memory_percent", "disk_percent"]
+
+class AnomalyDetector:
+    """Streaming z-score detector for many series at once.
+
+    Each series keeps an exponentially weighted mean and variance per
+    column, plus the same per seasonal bucket (hour of day by default).
+    A sample is scored against its bucket's baseline once that bucket has
+    seen ``warmup`` samples, otherwise against the overall EWMA, and only
+    then folded into both. Every update is O(1) per sample, and a batch
+    covering many series is scored in one vectorized pass.
+    """
+
+    def __init__(
+        self,
+        columns: Sequence[str] = ANOMALY_COLUMNS,
+        alpha: Optional[float] = None,
+        z_threshold: Optional[float] = None,
+        warmup: Optional[int] = None,
+        min_std: Optional[float] = None,
+        season_period: Optional[float] = None,
+        season_buckets: Optional[int] = None
+    ):
+        self.columns = list(columns)
+        self.alpha = alpha or config_manager.ANOMALY_EWMA_ALPHA
+        self.z_threshold = z_threshold or config_manager.ANOMALY_Z_THRESHOLD
+        self.warmup = warmup or config_manager.ANOMALY_WARMUP_SAMPLES
+        self.min_std = config_manager.ANOMALY_MIN_STD if min_std is None else min_std
+        self.season_period = season_period or config_manager.ANOMALY_SEASON_PERIOD
+        self.season_buckets = season_buckets or config_manager.ANOMALY_SEASON_BUCKETS
+
+        self._series: Dict[str, int] = {}
+        width = len(self.columns)
+        self._mean = np.zeros((0, width))
+        self._var = np.zeros((0, width))
+        self._count = np.zeros((0, width), dtype=np.int64)
+        self._season_mean = np.zeros((0, self.season_buckets, width))
+        self._season_var = np.zeros((0, self.season_buckets, width))
+        self._season_count = np.zeros((0, self.season_buckets, width), dtype=np.int64)
+
+    def _rows_for(self, series: Sequence[str]) -> np.ndarray:
+        for key in series:
+            if key not in self._series:
+                self._series[key] = len(self._series)
+        size = len(self._series)
+        if size > len(self._mean):
+            # Grow geometrically so registering hosts stays amortised O(1)
+            grow = max(size, 2 * len(self._mean)) - len(self._mean)
+            self._mean = np.concatenate([self._mean, np.zeros((grow,) + self._mean.shape[1:])])
+            self._var = np.concatenate([self._var, np.zeros((grow,) + self._var.shape[1:])])
+            self._count = np.concatenate([self._count, np.zeros((grow,) + self._count.shape[1:], dtype=np.int64)])
+            self._season_mean = np.concatenate([self._season_mean, np.zeros((grow,) + self._season_mean.shape[1:])])
+            self._season_var = np.concatenate([self._season_var, np.zeros((grow,) + self._season_var.shape[1:])])
+            self._season_count = np.concatenate(
+                [self._season_count, np.zeros((grow,) + self._season_count.shape[1:], dtype=np.int64)]
+            )
+        return np.array([self._series[key] for key in series], dtype=np.int64)
+
+    def _ewm_update(self, mean: np.ndarray, var: np.ndarray, count: np.ndarray, values: np.ndarray):
+        """Incremental EWMA/EWMVar step; NaN values leave the state untouched.
+
+        Until 1/alpha samples are seen the weight is 1/n, so a young baseline
+        is the plain running mean and variance rather than one biased
+        toward its first sample.
+        """
+        present = ~np.isnan(values)
+        alpha = np.maximum(self.alpha, 1.0 / (count + 1))
+        diff = np.where(present, values - mean, 0.0)
+        increment = alpha * diff
+        return (
+            mean + increment,
+            np.where(present, (1 - alpha) * (var + diff * increment), var),
+            count + present
+        )
+
+    def update(self, series: Sequence[str], timestamps: Sequence[float], values: np.ndarray) -> Dict[str, np.ndarray]:
+        """Score then learn a batch of samples, one row per ``series`` entry.
+
+        ``timestamps`` are epoch seconds and ``values`` has one column per
+        ``self.columns`` (NaN where missing). Returns ``z``, ``baseline``
+        and boolean ``anomalous`` arrays shaped like ``values``. Repeated
+        series within a batch are applied in order.
+        """
+        values = np.atleast_2d(np.asarray(values, dtype=float))
+        timestamps = np.asarray(timestamps, dtype=float)
+        z = np.full(values.shape, np.nan)
+        baseline = np.full(values.shape, np.nan)
+        anomalous = np.zeros(values.shape, dtype=bool)
+        rows = self._rows_for(series)
+
+        # Each pass takes at most one sample per series, keeping fancy-indexed
+        # writes free of collisions
+        pending = np.arange(len(rows))
+        while len(pending):
+            _, first_seen = np.unique(rows[pending], return_index=True)
+            batch = pending[np.sort(first_seen)]
+            pending = np.setdiff1d(pending, batch, assume_unique=True)
+            self._update_unique(rows[batch], timestamps[batch], values[batch], batch, z, baseline, anomalous)
+
+        return {"z": z, "baseline": baseline, "anomalous": anomalous}
+
+    def _update_unique(self, rows, timestamps, values, positions, z, baseline, anomalous) -> None:
+        bucket_width = self.season_period / self.season_buckets
+        buckets = ((timestamps % self.season_period) // bucket_width).astype(np.int64)
+
+        mean, var, count = self._mean[rows], self._var[rows], self._count[rows]
+        season_mean = self._season_mean[rows, buckets]
+        season_var = self._season_var[rows, buckets]
+        season_count = self._season_count[rows, buckets]
+
+        # Score against the seasonal baseline once that bucket is warmed up
+        seasonal = season_count >= self.warmup
+        expected = np.where(seasonal, season_mean, mean)
+        spread = np.sqrt(np.maximum(np.where(seasonal, season_var, var), self.min_std ** 2))
+        scores = (values - expected) / spread
+        warm = (count >= self.warmup) & ~np.isnan(values)
+
+        z[positions] = np.where(warm, scores, np.nan)
+        baseline[positions] = np.where(warm, expected, np.nan)
+        anomalous[positions] = warm & (np.abs(scores) >= self.z_threshold)
+
+        self._mean[rows], self._var[rows], self._count[rows] = self._ewm_update(mean, var, count, values)
+        (
+            self._season_mean[rows, buckets],
+            self._season_var[rows, buckets],
+            self._season_count[rows, buckets]
+        ) = self._ewm_update(season_mean, season_var, season_count, values)
+
+    def forget(self, series: str) -> None:
+        """Reset a series' baselines, e.g. after the host is rebuilt."""
+        row = self._series.get(series)
+        if row is not None:
+            for state in (self._mean, self._var, self._count, self._season_mean, self._season_var, self._season_count):
+                state[row] = 0
+
+# Shared by every monitoring agent so batches span all hosts
+anomaly_detector = AnomalyDetector()
@@ -0,0 +1,115 @@
+import asyncio
+import hashlib
+import json
+import logging
+import time
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from .config import config_manager
+from ..models.database import Incident
+
+logger = logging.getLogger(__name__)
+
+# Incidents in these states no longer absorb duplicates
+CLOSED_INCIDENT_STATUSES = ("resolved", "closed")
+
+class IncidentCoalescer:
+    """Folds duplicate alerts arriving within a sliding window into the open incident."""
+
+    def __init__(self, window: Optional[float] = None, fields: Optional[List[str]] = None):
+        self.window = config_manager.INCIDENT_COALESCE_WINDOW if window is None else window
+        self.fields = fields or config_manager.INCIDENT_COALESCE_FIELDS
+        # fingerprint -> (incident id, monotonic expiry), oldest expiry first
+        self._open: "OrderedDict[str, Tuple[str, float]]" = OrderedDict()
+        self._locks: Dict[str, asyncio.Lock] = {}
+        self._lock_users: Dict[str, int] = {}
+
+    @property
+    def enabled(self) -> bool:
+        return self.window > 0
+
+    def fingerprint(self, incident_data: Dict) -> Optional[str]:
+        """Hash the configured fields of an incident payload, or None if coalescing is off."""
+        if not self.enabled:
+            return None
+        values = {}
+        for field in self.fields:
+            value = incident_data.get(field)
+            values[field] = sorted(map(str, value)) if isinstance(value, (list, tuple, set)) else value
+        return hashlib.sha256(json.dumps(values, sort_keys=True, default=str).encode()).hexdigest()
+
+    @asynccontextmanager
+    async def guard(self, fingerprint: Optional[str]) -> AsyncIterator[None]:
+        """Serialize lookup-then-create for one fingerprint so bursts cannot race."""
+        if fingerprint is None:
+            yield
+            return
+
+        lock = self._locks.setdefault(fingerprint, asyncio.Lock())
+        self._lock_users[fingerprint] = self._lock_users.get(fingerprint, 0) + 1
+        try:
+            async with lock:
+                yield
+        finally:
+            self._lock_users[fingerprint] -= 1
+            if not self._lock_users[fingerprint]:
+                del self._lock_users[fingerprint]
+                del self._locks[fingerprint]
+
+    async def find_open(self, session: AsyncSession, fingerprint: Optional[str]) -> Optional[Incident]:
+        """Return the open incident this fingerprint should attach to, if any."""
+        if fingerprint is None:
+            return None
+
+        self._expire()
+        entry = self._open.get(fingerprint)
+        if entry is not None:
+            incident = await session.get(Incident, entry[0])
+        else:
+            # Another process may have opened it; fall back to the database
+            cutoff = datetime.utcnow() - timedelta(seconds=self.window)
+            result = await session.execute(select(Incident).filter(
+                Incident.fingerprint == fingerprint,
+                Incident.last_seen_at >= cutoff
+            ).order_by(Incident.last_seen_at.desc()).limit(1))
+            incident = result.scalars().first()
+
+        if incident is None or incident.status in CLOSED_INCIDENT_STATUSES:
+            self._open.pop(fingerprint, None)
+            return None
+        return incident
+
+    def merge(self, incident: Incident, incident_data: Dict) -> None:
+        """Attach a duplicate alert to an open incident and extend its window."""
+        incident.duplicate_count = (incident.duplicate_count or 0) + 1
+        incident.last_seen_at = datetime.utcnow()
+
+        targets = list(incident.target_systems or [])
+        for target in incident_data.get("target_systems", []):
+            if target not in targets:
+                targets.append(target)
+        incident.target_systems = targets
+
+        self.remember(incident.fingerprint, incident.id)
+
+    def remember(self, fingerprint: Optional[str], incident_id: str) -> None:
+        """Record (or refresh) the open incident for a fingerprint."""
+        if fingerprint is None:
+            return
+        self._open[fingerprint] = (incident_id, time.monotonic() + self.window)
+        self._open.move_to_end(fingerprint)
+
+    def _expire(self) -> None:
+        """Drop fingerprints whose window has closed."""
+        now = time.monotonic()
+        while self._open:
+            fingerprint, (_, expires_at) = next(iter(self._open.items()))
+            if expires_at > now:
+                break
+            self._open.popitem(last=False)
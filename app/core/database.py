@@ -1,150 +1,361 @@
-from sqlalchemy import create_engine
-from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker, Session
+from sqlalchemy import JSON, insert, select, text, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 from .config import config_manager
+import json
 import logging
-from contextlib import contextmanager
-from typing import Generator
+import time
+from contextlib import asynccontextmanager
+from typing import Any, AsyncGenerator, Dict, Optional
 
-from ..models.database import Base
+from .partitions import create_partitioned_table
+from ..models.database import Base, SystemMetrics
 
 logger = logging.getLogger(__name__)
 
-# Create SQLAlchemy engine
-engine = create_engine(
-    config_manager.DATABASE_URL,
-    pool_pre_ping=True,
-    pool_size=5,
-    max_overflow=10
-)
+# Async drivers used for each database backend
+ASYNC_DRIVERS = {
+    "postgresql": "postgresql+asyncpg",
+    "sqlite": "sqlite+aiosqlite"
+}
 
-# Create SessionLocal class
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+# Upper bounds (ms) of the checkout latency histogram buckets
+CHECKOUT_LATENCY_BUCKETS_MS = (1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
 
-# Create Base class
-Base = declarative_base()
+def get_async_database_url(url: str) -> str:
+    """Rewrite a database URL to use the backend's async driver."""
+    parsed = make_url(url)
+    backend = parsed.get_backend_name()
+    if backend not in ASYNC_DRIVERS:
+        raise ValueError(f"No async driver configured for database backend: {backend}")
+    return parsed.set(drivername=ASYNC_DRIVERS[backend]).render_as_string(hide_password=False)
+
+class PoolMonitor:
+    """Collects connection checkout latency and pool-exhaustion waits."""
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self) -> None:
+        self.checkouts = 0
+        self.timeouts = 0
+        self.waits = 0
+        self.wait_time_ms = 0.0
+        self.total_latency_ms = 0.0
+        self.max_latency_ms = 0.0
+        self.buckets = [0] * (len(CHECKOUT_LATENCY_BUCKETS_MS) + 1)
+
+    def observe(self, latency_ms: float, waited: bool) -> None:
+        self.checkouts += 1
+        self.total_latency_ms += latency_ms
+        self.max_latency_ms = max(self.max_latency_ms, latency_ms)
+        if waited:
+            self.waits += 1
+            self.wait_time_ms += latency_ms
+        for index, bound in enumerate(CHECKOUT_LATENCY_BUCKETS_MS):
+            if latency_ms <= bound:
+                self.buckets[index] += 1
+                break
+        else:
+            self.buckets[-1] += 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        histogram = {f"le_{bound}ms": count for bound, count in zip(CHECKOUT_LATENCY_BUCKETS_MS, self.buckets)}
+        histogram[f"gt_{CHECKOUT_LATENCY_BUCKETS_MS[-1]}ms"] = self.buckets[-1]
+        return {
+            "checkouts": self.checkouts,
+            "timeouts": self.timeouts,
+            "waits": self.waits,
+            "wait_time_ms": round(self.wait_time_ms, 3),
+            "avg_checkout_ms": round(self.total_latency_ms / self.checkouts, 3) if self.checkouts else 0.0,
+            "max_checkout_ms": round(self.max_latency_ms, 3),
+            "checkout_latency_histogram": histogram
+        }
+
+class InstrumentedQueuePool(AsyncAdaptedQueuePool):
+    """Async queue pool that reports every checkout to a PoolMonitor."""
+
+    monitor: Optional[PoolMonitor] = None
+
+    def connect(self):
+        if self.monitor is None:
+            return super().connect()
+
+        # Every slot is taken, so this checkout has to wait for a checkin
+        exhausted = self._max_overflow >= 0 and self.checkedout() >= self.size() + self._max_overflow
+        started = time.perf_counter()
+        try:
+            connection = super().connect()
+        except PoolTimeoutError:
+            self.monitor.timeouts += 1
+            raise
+        self.monitor.observe((time.perf_counter() - started) * 1000, exhausted)
+        return connection
+
+    def recreate(self):
+        # dispose() swaps in a fresh pool; keep reporting to the same monitor
+        pool = super().recreate()
+        pool.monitor = self.monitor
+        return pool
 
 # Database dependency
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
+async def get_db() -> AsyncGenerator[AsyncSession, None]:
+    async with db_manager.get_session() as session:
+        yield session
 
 # Database manager class
 class DatabaseManager:
     """Manages database connections and sessions."""
-    
+
     def __init__(self):
         self.engine = None
         self.SessionLocal = None
-        self.Base = declarative_base()
+        self.Base = Base
+        self.pool_monitor = PoolMonitor()
         self._initialized = False
-    
+
     async def initialize(self):
         """Initialize the database connection and create tables."""
         if self._initialized:
             return
 
         try:
-            # Create database engine
-            self.engine = create_engine(
-                config_manager.DATABASE_URL,
-                pool_pre_ping=True,
-                pool_size=5,
-                max_overflow=10
-            )
+            # Create async database engine (asyncpg / aiosqlite)
+            url = get_async_database_url(config_manager.DATABASE_URL)
+            engine_options = {"pool_pre_ping": config_manager.DB_POOL_PRE_PING}
+            if make_url(url).get_backend_name() != "sqlite":
+                # SQLite keeps its dialect default (NullPool / StaticPool)
+                engine_options.update(
+                    poolclass=InstrumentedQueuePool,
+                    pool_size=config_manager.DB_POOL_SIZE,
+                    max_overflow=config_manager.DB_MAX_OVERFLOW,
+                    pool_recycle=config_manager.DB_POOL_RECYCLE,
+                    pool_timeout=config_manager.DB_POOL_TIMEOUT
+                )
+            self.engine = create_async_engine(url, **engine_options)
+            pool = self.engine.sync_engine.pool
+            if isinstance(pool, InstrumentedQueuePool):
+                pool.monitor = self.pool_monitor
 
-            # Create session factory
-            self.SessionLocal = sessionmaker(
-                autocommit=False,
+            # Create session factory; objects stay readable after commit
+            # because async sessions cannot lazy-load expired attributes
+            self.SessionLocal = async_sessionmaker(
+                self.engine,
+                class_=AsyncSession,
                 autoflush=False,
-                bind=self.engine
+                expire_on_commit=False
             )
 
             # Create all tables
-            self.Base.metadata.create_all(bind=self.engine)
+            await self.init_db()
             self._initialized = True
             logger.info("Database initialized successfully")
         except Exception as e:
             logger.error(f"Error initializing database: {str(e)}")
             raise
-    
+
     async def close(self):
         """Close the database connection."""
         if self.engine:
-            self.engine.dispose()
+            await self.engine.dispose()
+            self._initialized = False
             logger.info("Database connection closed")
-    
-    def get_db(self) -> Session:
+
+    def get_pool_stats(self) -> Dict[str, Any]:
+        """Live connection pool occupancy plus checkout latency statistics."""
+        if self.engine is None:
+            return {"initialized": False}
+
+        pool = self.engine.sync_engine.pool
+        stats = {"initialized": self._initialized, "pool_class": type(pool).__name__}
+        if isinstance(pool, AsyncAdaptedQueuePool):
+            stats.update(
+                size=pool.size(),
+                max_overflow=pool._max_overflow,
+                checked_out=pool.checkedout(),
+                checked_in=pool.checkedin(),
+                overflow=max(pool.overflow(), 0),
+                timeout=pool.timeout(),
+                recycle=pool._recycle
+            )
+        stats.update(self.pool_monitor.get_stats())
+        return stats
+
+    def get_db(self) -> AsyncSession:
         """Get database session."""
         if not self._initialized:
             raise RuntimeError("Database not initialized. Call initialize() first.")
-        
-        db = self.SessionLocal()
-        try:
-            return db
-        except Exception as e:
-            db.close()
-            raise e
-    
-    @contextmanager
-    def get_session(self) -> Generator:
+
+        return self.SessionLocal()
+
+    @asynccontextmanager
+    async def get_session(self) -> AsyncGenerator[AsyncSession, None]:
         """Get a database session."""
-        session = self.SessionLocal()
-        try:
-            yield session
-            session.commit()
-        except Exception as e:
-            session.rollback()
-            logger.error(f"Database session error: {str(e)}")
-            raise
-        finally:
-            session.close()
-    
-    def execute_query(self, query: str, params: dict = None) -> list:
+        if not self._initialized:
+            raise RuntimeError("Database not initialized. Call initialize() first.")
+
+        async with self.SessionLocal() as session:
+            try:
+                yield session
+                await session.commit()
+            except Exception as e:
+                await session.rollback()
+                logger.error(f"Database session error: {str(e)}")
+                raise
+
+    async def execute_query(self, query: str, params: dict = None) -> list:
         """Execute a raw SQL query."""
-        with self.get_session() as session:
+        async with self.get_session() as session:
             try:
-                result = session.execute(query, params or {})
+                result = await session.execute(text(query), params or {})
                 return result.fetchall()
             except Exception as e:
                 logger.error(f"Error executing query: {str(e)}")
                 raise
-    
-    def bulk_insert(self, model_class, data_list: list) -> bool:
-        """Perform bulk insert operation."""
-        with self.get_session() as session:
+
+    async def bulk_insert(self, model_class, data_list: list, chunk_size: Optional[int] = None) -> bool:
+        """Insert many rows: COPY on PostgreSQL, chunked executemany elsewhere.
+
+        All or nothing: on failure no row is written and False is returned.
+        """
+        if not data_list:
+            return True
+        table = model_class.__table__
+        rows = self._fill_defaults(table, data_list)
+        chunk_size = chunk_size or config_manager.BULK_INGEST_CHUNK_SIZE
+        async with self.get_session() as session:
             try:
-                session.bulk_insert_mappings(model_class, data_list)
+                if self.engine.dialect.name == "postgresql":
+                    await self._copy_rows(session, table, rows)
+                else:
+                    for start in range(0, len(rows), chunk_size):
+                        await session.execute(insert(table), rows[start:start + chunk_size])
                 return True
             except Exception as e:
+                # Earlier chunks must not be committed by get_session
+                await session.rollback()
                 logger.error(f"Error performing bulk insert: {str(e)}")
                 return False
-    
-    def bulk_update(self, model_class, data_list: list) -> bool:
+
+    @staticmethod
+    def _fill_defaults(table, data_list: list) -> list:
+        """Give every row the same columns, applying Python-side column defaults.
+
+        COPY bypasses SQLAlchemy, so defaults such as timestamps must be
+        resolved here; uniform keys also keep executemany in one batch.
+        """
+        columns = set().union(*data_list)
+        defaults = {}
+        for column in table.columns:
+            default = column.default
+            if column.primary_key or default is None or not (default.is_scalar or default.is_callable):
+                continue
+            columns.add(column.name)
+            defaults[column.name] = default
+
+        rows = []
+        for data in data_list:
+            row = {}
+            for column in columns:
+                if column in data:
+                    row[column] = data[column]
+                elif column in defaults:
+                    default = defaults[column]
+                    row[column] = default.arg(None) if default.is_callable else default.arg
+                else:
+                    row[column] = None
+            rows.append(row)
+        return rows
+
+    @staticmethod
+    async def _copy_rows(session: AsyncSession, table, rows: list) -> None:
+        """Stream rows into a table with asyncpg's binary COPY, inside the session's transaction."""
+        columns = list(rows[0])
+        json_columns = {column.name for column in table.columns if isinstance(column.type, JSON)}
+        records = [
+            tuple(
+                json.dumps(row[column]) if column in json_columns and row[column] is not None else row[column]
+                for column in columns
+            )
+            for row in rows
+        ]
+        connection = await session.connection()
+        raw_connection = await connection.get_raw_connection()
+        await raw_connection.driver_connection.copy_records_to_table(
+            table.name, records=records, columns=columns, schema_name=table.schema
+        )
+
+    async def bulk_upsert(self, model_class, data_list: list, key_columns: list) -> bool:
+        """Insert rows or update those whose key columns already exist, in one statement."""
+        if not data_list:
+            return True
+        async with self.get_session() as session:
+            try:
+                dialect = self.engine.dialect.name
+                if dialect in ("postgresql", "sqlite"):
+                    dialect_insert = postgresql.insert if dialect == "postgresql" else sqlite.insert
+                    stmt = dialect_insert(model_class)
+                    update_columns = {
+                        column: stmt.excluded[column]
+                        for column in data_list[0]
+                        if column not in key_columns and column != "id"
+                    }
+                    await session.execute(
+                        stmt.on_conflict_do_update(index_elements=key_columns, set_=update_columns),
+                        data_list
+                    )
+                else:
+                    for data in data_list:
+                        result = await session.execute(select(model_class).filter_by(
+                            **{column: data[column] for column in key_columns}
+                        ))
+                        existing = result.scalars().first()
+                        if existing:
+                            for column, value in data.items():
+                                setattr(existing, column, value)
+                        else:
+                            await session.execute(insert(model_class), [data])
+                return True
+            except Exception as e:
+                # Earlier chunks must not be committed by get_session
+                await session.rollback()
+                logger.error(f"Error performing bulk upsert: {str(e)}")
+                return False
+
+    async def bulk_update(self, model_class, data_list: list) -> bool:
         """Perform bulk update operation."""
-        with self.get_session() as session:
+        async with self.get_session() as session:
             try:
-                session.bulk_update_mappings(model_class, data_list)
+                await session.execute(update(model_class), data_list)
                 return True
             except Exception as e:
+                # Earlier chunks must not be committed by get_session
+                await session.rollback()
                 logger.error(f"Error performing bulk update: {str(e)}")
                 return False
-    
-    def cleanup(self) -> None:
+
+    async def cleanup(self) -> None:
         """Clean up database resources."""
         try:
             if self.engine:
-                self.engine.dispose()
+                await self.engine.dispose()
             logger.info("Database connection cleaned up successfully")
         except Exception as e:
             logger.error(f"Error cleaning up database: {str(e)}")
 
-    def init_db(self):
+    async def init_db(self):
         """Initialize the database by creating all tables."""
-        self.Base.metadata.create_all(bind=self.engine)
+        async with self.engine.begin() as conn:
+            # system_metrics first, as a partitioned parent on PostgreSQL
+            await conn.run_sync(
+                create_partitioned_table,
+                SystemMetrics.__table__,
+                config_manager.METRICS_PARTITION_PREMAKE_DAYS
+            )
+            await conn.run_sync(self.Base.metadata.create_all)
 
 # Create global database manager instance
-db_manager = DatabaseManager() 
\ No newline at end of file
+db_manager = DatabaseManager()
@@ -0,0 +1,202 @@
+import asyncio
+import json
+import logging
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from .cache import MISSING, TTLCache
+from .config import config_manager
+
+logger = logging.getLogger(__name__)
+
+class MemoryCacheBackend:
+    """Per-process LRU with TTL."""
+
+    name = "memory"
+
+    def __init__(self, max_entries: int, ttl: float):
+        self._cache = TTLCache(max_entries, ttl)
+
+    async def get(self, key: str) -> Any:
+        return self._cache.get(key)
+
+    async def set(self, key: str, value: Any) -> None:
+        self._cache.set(key, value)
+
+    async def delete(self, key: str) -> None:
+        self._cache.delete(key)
+
+    async def close(self) -> None:
+        self._cache.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        return self._cache.get_stats()
+
+class RedisCacheBackend:
+    """Cache shared by every process through Redis; values are stored as JSON."""
+
+    name = "redis"
+
+    def __init__(self, url: str, ttl: float, prefix: str = "kraken-flux:entity:", client=None):
+        if client is None:
+            # Optional dependency, only needed when this backend is selected
+            import redis.asyncio as redis
+            client = redis.from_url(url)
+        self._client = client
+        self.ttl = ttl
+        self.prefix = prefix
+        self.hits = 0
+        self.misses = 0
+
+    async def get(self, key: str) -> Any:
+        raw = await self._client.get(self.prefix + key)
+        if raw is None:
+            self.misses += 1
+            return MISSING
+        self.hits += 1
+        return json.loads(raw)
+
+    async def set(self, key: str, value: Any) -> None:
+        await self._client.set(self.prefix + key, json.dumps(value), px=int(self.ttl * 1000))
+
+    async def delete(self, key: str) -> None:
+        await self._client.delete(self.prefix + key)
+
+    async def close(self) -> None:
+        await self._client.aclose()
+
+    def get_stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "ttl": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0
+        }
+
+def create_backend():
+    """Build the backend named by ``ENTITY_CACHE_BACKEND``; None disables caching."""
+    backend = config_manager.ENTITY_CACHE_BACKEND
+    if backend == "memory":
+        return MemoryCacheBackend(config_manager.ENTITY_CACHE_MAX_ENTRIES, config_manager.ENTITY_CACHE_TTL)
+    if backend == "redis":
+        return RedisCacheBackend(config_manager.REDIS_URL, config_manager.ENTITY_CACHE_TTL)
+    if backend == "none":
+        return None
+    raise ValueError(f"Unknown entity cache backend: {backend}")
+
+class EntityCache:
+    """Read-through cache for single-entity lookups served by the API.
+
+    Values are the JSON-ready response bodies, keyed by kind and ID. Writers
+    call ``invalidate`` after committing; the TTL bounds staleness for
+    anything that does not. Concurrent misses for one key share a single
+    load, and a load that overlaps an invalidation is returned but not
+    stored. Backend errors degrade to uncached reads.
+    """
+
+    def __init__(self, backend=MISSING):
+        self._backend = backend
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self.loads = 0
+        self.shared = 0
+        self.invalidations = 0
+        self.backend_errors = 0
+
+    @property
+    def backend(self):
+        # Built on first use so a Redis client binds to the running loop
+        if self._backend is MISSING:
+            self._backend = create_backend()
+        return self._backend
+
+    @staticmethod
+    def key_for(kind: str, entity_id: Any) -> str:
+        return f"{kind}:{entity_id}"
+
+    async def get_or_load(
+        self,
+        kind: str,
+        entity_id: Any,
+        load: Callable[[], Awaitable[Optional[Dict[str, Any]]]]
+    ) -> Optional[Dict[str, Any]]:
+        """Return the cached value, or ``load()`` it and cache anything but None."""
+        if self.backend is None:
+            return await load()
+
+        key = self.key_for(kind, entity_id)
+        try:
+            cached = await self.backend.get(key)
+        except Exception as e:
+            self._backend_error("read", key, e)
+            cached = MISSING
+        if cached is not MISSING:
+            return cached
+
+        inflight = self._inflight.get(key)
+        if inflight is not None:
+            self.shared += 1
+            return await asyncio.shield(inflight)
+
+        future = asyncio.get_running_loop().create_future()
+        # Avoid "exception never retrieved" warnings when nobody else is waiting
+        future.add_done_callback(lambda f: f.cancelled() or f.exception())
+        self._inflight[key] = future
+        try:
+            self.loads += 1
+            value = await load()
+        except BaseException as e:
+            if isinstance(e, asyncio.CancelledError):
+                future.cancel()
+            else:
+                future.set_exception(e)
+            raise
+        finally:
+            # invalidate() drops the entry, so the value may predate a write
+            current = self._inflight.get(key) is future
+            if current:
+                del self._inflight[key]
+
+        if current and value is not None:
+            try:
+                await self.backend.set(key, value)
+            except Exception as e:
+                self._backend_error("write", key, e)
+        future.set_result(value)
+        return value
+
+    async def invalidate(self, kind: str, entity_id: Any) -> None:
+        """Forget an entity; call after the write that changed it is committed."""
+        if self.backend is None:
+            return
+        key = self.key_for(kind, entity_id)
+        self._inflight.pop(key, None)
+        self.invalidations += 1
+        try:
+            await self.backend.delete(key)
+        except Exception as e:
+            self._backend_error("invalidate", key, e)
+
+    def _backend_error(self, operation: str, key: str, error: Exception) -> None:
+        self.backend_errors += 1
+        logger.warning(f"Entity cache {operation} failed for {key}: {str(error)}")
+
+    async def close(self) -> None:
+        if self._backend not in (MISSING, None):
+            await self._backend.close()
+        self._backend = MISSING
+
+    def get_stats(self) -> Dict[str, Any]:
+        if self.backend is None:
+            return {"enabled": False}
+        return {
+            "enabled": True,
+            "backend": self.backend.name,
+            **self.backend.get_stats(),
+            "loads": self.loads,
+            "shared_in_flight": self.shared,
+            "in_flight": len(self._inflight),
+            "invalidations": self.invalidations,
+            "backend_errors": self.backend_errors
+        }
+
+entity_cache = EntityCache()
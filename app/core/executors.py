@@ -0,0 +1,121 @@
+import asyncio
+import logging
+import multiprocessing
+import os
+import pickle
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, Optional, Type
+
+from .config import config_manager
+from ..agents.base_agent import BaseAgent
+
+logger = logging.getLogger(__name__)
+
+# Agent instances living inside a pool worker process, keyed by agent type
+_worker_agents: Dict[str, BaseAgent] = {}
+# Shared by every worker of a pool; warm-up tasks meet here
+_warmup_barrier = None
+
+def _initialize_worker(agent_classes: Dict[str, Type[BaseAgent]], warmup_barrier) -> None:
+    """Create, initialize and preload one agent per type in a fresh worker process."""
+    global _warmup_barrier
+    _warmup_barrier = warmup_barrier
+    for agent_type, agent_class in agent_classes.items():
+        agent = agent_class()
+        asyncio.run(agent.initialize())
+        agent.preload_models()
+        _worker_agents[agent_type] = agent
+
+def _execute_in_worker(agent_type: str, task: Dict[str, Any]) -> Dict[str, Any]:
+    """Run a task on the worker's agent instance."""
+    return asyncio.run(_worker_agents[agent_type].execute(task))
+
+def _warm_worker(timeout: float) -> int:
+    """Hold this worker until every worker of the pool is running one of these.
+
+    A worker busy here cannot take another warm-up task, so the pool has
+    to start (and initialize) all of its processes to get past the barrier.
+    """
+    _warmup_barrier.wait(timeout)
+    return os.getpid()
+
+def _is_pickling_error(error: BaseException) -> bool:
+    # Pickling failures surface as PicklingError, TypeError or AttributeError
+    return isinstance(error, pickle.PicklingError) or "pickle" in str(error)
+
+class ProcessPoolBackend:
+    """Ships CPU-heavy agent tasks to a warm pool of worker processes.
+
+    Only task types listed in an agent class's ``process_task_types`` are
+    eligible; everything else keeps running on the event loop.
+    """
+
+    def __init__(self, agent_types: Dict[str, Type[BaseAgent]], max_workers: Optional[int] = None):
+        self.agent_classes = {
+            agent_type: agent_class
+            for agent_type, agent_class in agent_types.items()
+            if agent_class.process_task_types
+        }
+        self.max_workers = max_workers or config_manager.AGENT_PROCESS_POOL_WORKERS or os.cpu_count() or 1
+        self._pool: Optional[ProcessPoolExecutor] = None
+
+    def handles(self, agent_type: str, task_type: Optional[str]) -> bool:
+        """Whether a task should run in the process pool."""
+        agent_class = self.agent_classes.get(agent_type)
+        return agent_class is not None and task_type in agent_class.process_task_types
+
+    async def start(self) -> None:
+        """Start the pool and wait until every worker has preloaded its agents."""
+        if self._pool is not None:
+            return
+        context = multiprocessing.get_context()
+        self._pool = ProcessPoolExecutor(
+            max_workers=self.max_workers,
+            mp_context=context,
+            initializer=_initialize_worker,
+            initargs=(self.agent_classes, context.Barrier(self.max_workers))
+        )
+        timeout = config_manager.AGENT_PROCESS_POOL_WARMUP_TIMEOUT
+        try:
+            pids = await asyncio.gather(*[
+                asyncio.wrap_future(self._pool.submit(_warm_worker, timeout))
+                for _ in range(self.max_workers)
+            ])
+        except threading.BrokenBarrierError:
+            logger.warning(f"Process pool started, but not all {self.max_workers} workers were ready within {timeout}s")
+        except Exception as e:
+            # A failing initializer breaks the pool; drop it so the next call starts afresh
+            logger.error(f"Error starting process pool: {str(e)}")
+            self.shutdown()
+            raise
+        else:
+            logger.info(f"Process pool started with {len(set(pids))} warm workers")
+
+    async def execute(self, agent_type: str, task: Dict[str, Any]) -> Dict[str, Any]:
+        """Run a task in a worker process.
+
+        Raises TypeError if the payload or result cannot be pickled.
+        Cancelling the caller cancels the task if it has not started yet; a
+        task already running in a worker runs to completion and its result
+        is discarded.
+        """
+        await self.start()
+        future = self._pool.submit(_execute_in_worker, agent_type, task)
+        try:
+            return await asyncio.wrap_future(future)
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except (pickle.PicklingError, TypeError, AttributeError) as e:
+            # Raised on the future when the task cannot be sent to a worker
+            if _is_pickling_error(e):
+                raise TypeError(f"Task for {agent_type} cannot be pickled for the process pool: {str(e)}") from e
+            raise
+
+    def shutdown(self) -> None:
+        """Stop the pool, dropping queued tasks."""
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+            logger.info("Process pool shut down")
@@ -0,0 +1,89 @@
+import csv
+import io
+import json
+import logging
+from datetime import date, datetime
+from typing import Any, AsyncIterator, Dict
+
+from fastapi.responses import StreamingResponse
+from sqlalchemy import Select, select
+
+from .config import config_manager
+from .database import db_manager
+
+logger = logging.getLogger(__name__)
+
+EXPORT_FORMATS: Dict[str, str] = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv"
+}
+
+def _json_default(value: Any) -> Any:
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return str(value)
+
+def _csv_value(value: Any) -> Any:
+    if value is None:
+        return ""
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, (dict, list)):
+        return json.dumps(value, default=_json_default)
+    return value
+
+def export_query(model, *criteria) -> Select:
+    """Plain column rows of ``model`` matching ``criteria``, oldest first.
+
+    Selecting columns rather than entities keeps rows out of the session's
+    identity map, so memory stays flat however many are streamed.
+    """
+    return (
+        select(*model.__table__.columns)
+        .filter(*criteria)
+        .order_by(model.timestamp, model.id)
+    )
+
+async def stream_rows(query: Select, export_format: str) -> AsyncIterator[bytes]:
+    """Encode the rows of ``query`` as NDJSON lines or CSV, one fetch batch per chunk."""
+    batch_size = config_manager.EXPORT_BATCH_SIZE
+    columns = [column.name for column in query.selected_columns]
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    if export_format == "csv":
+        writer.writerow(columns)
+        yield buffer.getvalue().encode()
+
+    async with db_manager.get_session() as session:
+        # A server-side cursor fetches batch_size rows at a time
+        result = await session.stream(query.execution_options(yield_per=batch_size))
+        try:
+            async for partition in result.partitions():
+                buffer.seek(0)
+                buffer.truncate()
+                if export_format == "csv":
+                    writer.writerows([_csv_value(value) for value in row] for row in partition)
+                else:
+                    for row in partition:
+                        buffer.write(json.dumps(dict(zip(columns, row)), default=_json_default))
+                        buffer.write("\n")
+                yield buffer.getvalue().encode()
+        except Exception as e:
+            # Headers are already sent, so the truncated body is all the client sees
+            logger.error(f"Error streaming export: {str(e)}")
+            raise
+        finally:
+            await result.close()
+
+def export_response(query: Select, export_format: str, name: str) -> StreamingResponse:
+    """Stream ``query`` as a downloadable ``name``.ndjson or ``name``.csv file.
+
+    Raises ValueError for an unknown format.
+    """
+    if export_format not in EXPORT_FORMATS:
+        raise ValueError(f"Unknown export format: {export_format}; expected one of {', '.join(EXPORT_FORMATS)}")
+    return StreamingResponse(
+        stream_rows(query, export_format),
+        media_type=EXPORT_FORMATS[export_format],
+        headers={"Content-Disposition": f'attachment; filename="{name}.{export_format}"'}
+    )
@@ -0,0 +1,108 @@
+import asyncio
+import logging
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Set
+
+from .config import config_manager
+from .database import db_manager
+from ..models.database import AgentStatus
+
+logger = logging.getLogger(__name__)
+
+class HeartbeatAggregator:
+    """Buffers agent heartbeats in memory and flushes them to agent_status in bulk.
+
+    The buffer always holds the latest status of every agent, so reads never
+    touch the database; only agents that changed since the last flush are
+    written, in a single upsert.
+    """
+
+    def __init__(self, flush_interval: Optional[float] = None):
+        self.flush_interval = flush_interval or config_manager.HEARTBEAT_FLUSH_INTERVAL
+        self._latest: Dict[str, Dict[str, Any]] = {}
+        self._dirty: Set[str] = set()
+        self._flush_task: Optional[asyncio.Task] = None
+        self.flushes = 0
+        self.rows_written = 0
+        self.failed_flushes = 0
+
+    def record(
+        self,
+        agent_id: str,
+        agent_type: str,
+        status: str,
+        capabilities: Optional[Dict] = None,
+        metrics: Optional[Dict] = None,
+        last_heartbeat: Optional[datetime] = None
+    ) -> None:
+        """Update an agent's buffered status; it is persisted on the next flush."""
+        now = datetime.utcnow()
+        self._latest[agent_id] = {
+            "agent_id": agent_id,
+            "agent_type": agent_type or "unknown",
+            "status": status,
+            "capabilities": capabilities or {},
+            "metrics": metrics or {},
+            "last_heartbeat": last_heartbeat or now,
+            "timestamp": now
+        }
+        self._dirty.add(agent_id)
+        self._ensure_started()
+
+    def get(self, agent_id: str) -> Optional[Dict[str, Any]]:
+        return self._serialize(self._latest[agent_id]) if agent_id in self._latest else None
+
+    def all(self) -> List[Dict[str, Any]]:
+        return [self._serialize(row) for row in self._latest.values()]
+
+    @staticmethod
+    def _serialize(row: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            **row,
+            "last_heartbeat": row["last_heartbeat"].isoformat(),
+            "timestamp": row["timestamp"].isoformat()
+        }
+
+    def _ensure_started(self) -> None:
+        if self._flush_task is None or self._flush_task.done():
+            self._flush_task = asyncio.create_task(self._flush_loop())
+
+    async def _flush_loop(self):
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            await self.flush()
+
+    async def flush(self) -> int:
+        """Write every changed status in one bulk upsert; returns the row count."""
+        if not self._dirty:
+            return 0
+
+        agent_ids, self._dirty = self._dirty, set()
+        rows = [dict(self._latest[agent_id]) for agent_id in agent_ids if agent_id in self._latest]
+        if await db_manager.bulk_upsert(AgentStatus, rows, ["agent_id"]):
+            self.flushes += 1
+            self.rows_written += len(rows)
+            return len(rows)
+
+        # Keep the rows pending so the next flush retries them
+        self.failed_flushes += 1
+        self._dirty |= agent_ids
+        return 0
+
+    async def stop(self):
+        """Stop the flush loop and write anything still buffered."""
+        if self._flush_task is not None:
+            self._flush_task.cancel()
+            await asyncio.gather(self._flush_task, return_exceptions=True)
+            self._flush_task = None
+        await self.flush()
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "agents": len(self._latest),
+            "pending": len(self._dirty),
+            "flush_interval": self.flush_interval,
+            "flushes": self.flushes,
+            "rows_written": self.rows_written,
+            "failed_flushes": self.failed_flushes
+        }
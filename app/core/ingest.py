@@ -0,0 +1,109 @@
+import json
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple, Type
+
+from fastapi import Request
+from pydantic import BaseModel, ValidationError
+
+from .config import config_manager
+from .database import db_manager
+
+# Rejections reported back per request; the counts still cover every row
+MAX_REPORTED_ERRORS = 100
+
+class PayloadTooLargeError(Exception):
+    """Raised when an ingest request body exceeds BULK_INGEST_MAX_BYTES."""
+
+async def read_body(request: Request, max_bytes: Optional[int] = None) -> bytes:
+    """Read a request body, giving up as soon as it passes ``max_bytes``.
+
+    A declared Content-Length over the limit is refused before anything is
+    read; chunked bodies are counted as they arrive.
+    """
+    max_bytes = max_bytes or config_manager.BULK_INGEST_MAX_BYTES
+    message = f"Request body exceeds the limit of {max_bytes} bytes"
+    declared = request.headers.get("content-length", "")
+    if declared.isdigit() and int(declared) > max_bytes:
+        raise PayloadTooLargeError(message)
+
+    chunks, size = [], 0
+    async for chunk in request.stream():
+        size += len(chunk)
+        if size > max_bytes:
+            raise PayloadTooLargeError(message)
+        chunks.append(chunk)
+    return b"".join(chunks)
+
+def is_ndjson(content_type: str) -> bool:
+    return any(kind in (content_type or "") for kind in ("ndjson", "jsonl", "json-seq"))
+
+def parse_records(body: bytes, content_type: str) -> Tuple[List[Tuple[int, Any]], List[Dict[str, Any]]]:
+    """Split an NDJSON stream or JSON array into ``(index, record)`` pairs.
+
+    Unparseable NDJSON lines are returned as errors so the rest of the batch
+    can still be loaded; a malformed JSON document raises ValueError.
+    """
+    if not is_ndjson(content_type):
+        payload = json.loads(body or b"null")
+        if not isinstance(payload, list):
+            raise ValueError("Expected a JSON array of records")
+        return list(enumerate(payload)), []
+
+    records, errors = [], []
+    for index, line in enumerate(body.splitlines()):
+        if not line.strip():
+            continue
+        try:
+            records.append((index, json.loads(line)))
+        except ValueError as e:
+            errors.append({"index": index, "error": f"Invalid JSON: {str(e)}"})
+    return records, errors
+
+def validate_records(
+    records: List[Tuple[int, Any]],
+    schema: Type[BaseModel]
+) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+    """Validate each record against ``schema``; returns (rows, errors).
+
+    Fields sent as null are left out like unset ones, so column defaults
+    (notably the timestamp, the partition key on PostgreSQL) still apply.
+    """
+    rows, errors = [], []
+    for index, record in records:
+        try:
+            rows.append(schema.model_validate(record).model_dump(exclude_unset=True, exclude_none=True))
+        except ValidationError as e:
+            errors.append({"index": index, "error": e.errors(include_url=False, include_context=False)})
+    return rows, errors
+
+async def ingest_batch(
+    body: bytes,
+    content_type: str,
+    schema: Type[BaseModel],
+    model_class,
+    after_load: Optional[Callable[[List[Dict[str, Any]]], Awaitable[None]]] = None
+) -> Dict[str, Any]:
+    """Parse, validate and bulk-load one request's worth of records.
+
+    Invalid records are rejected individually; raises ValueError when the
+    payload itself is unusable and RuntimeError when the load fails.
+    ``after_load`` receives the loaded rows once they are committed.
+    """
+    records, errors = parse_records(body, content_type)
+    received = len(records) + len(errors)
+    if received > config_manager.BULK_INGEST_MAX_ROWS:
+        raise ValueError(f"Batch of {received} records exceeds the limit of {config_manager.BULK_INGEST_MAX_ROWS}")
+
+    rows, invalid = validate_records(records, schema)
+    errors.extend(invalid)
+    if rows and not await db_manager.bulk_insert(model_class, rows):
+        raise RuntimeError(f"Bulk insert of {len(rows)} {model_class.__tablename__} rows failed")
+    if rows and after_load:
+        await after_load(rows)
+
+    errors.sort(key=lambda error: error["index"])
+    return {
+        "received": received,
+        "accepted": len(rows),
+        "rejected": len(errors),
+        "errors": errors[:MAX_REPORTED_ERRORS]
+    }
@@ -0,0 +1,137 @@
+import asyncio
+import logging
+import uuid
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Set
+
+from .config import config_manager
+
+logger = logging.getLogger(__name__)
+
+class ResponseJob:
+    """Tracks a background incident response run and the events it has produced."""
+
+    def __init__(self, incident_id: str):
+        self.job_id = str(uuid.uuid4())
+        self.incident_id = incident_id
+        self.status = "queued"
+        self.created_at = datetime.utcnow()
+        self.started_at: Optional[datetime] = None
+        self.finished_at: Optional[datetime] = None
+        self.stages: Dict[str, Dict[str, Any]] = {}
+        self.result: Optional[Dict] = None
+        self.error: Optional[str] = None
+        self._events: List[Dict[str, Any]] = []
+        self._updated = asyncio.Event()
+
+    @property
+    def finished(self) -> bool:
+        return self.status in ("completed", "failed")
+
+    def _publish(self, event: str, data: Dict[str, Any]) -> None:
+        """Append an event and wake any subscribers."""
+        self._events.append({"event": event, "data": data})
+        self._updated.set()
+        self._updated = asyncio.Event()
+
+    def mark_running(self) -> None:
+        self.status = "running"
+        self.started_at = datetime.utcnow()
+        self._publish("status", {"job_id": self.job_id, "status": self.status})
+
+    def record_stage(self, stage: str, result: Dict, timing: Dict) -> None:
+        """Record a finished pipeline stage and stream it to subscribers."""
+        self.stages[stage] = {"result": result, "timing": timing}
+        self._publish("stage", {"job_id": self.job_id, "stage": stage, "result": result, "timing": timing})
+
+    def complete(self, result: Dict) -> None:
+        self.status = "failed" if result.get("status") == "error" else "completed"
+        self.error = result.get("error")
+        self.result = result
+        self.finished_at = datetime.utcnow()
+        self._publish("complete", self.to_dict())
+
+    def fail(self, error: str) -> None:
+        self.status = "failed"
+        self.error = error
+        self.finished_at = datetime.utcnow()
+        self._publish("complete", self.to_dict())
+
+    async def events(self, keepalive: Optional[float] = None) -> AsyncIterator[Optional[Dict[str, Any]]]:
+        """Yield past and future events until the job finishes.
+
+        Yields ``None`` whenever ``keepalive`` seconds pass without an event so
+        callers can keep idle streaming connections open.
+        """
+        index = 0
+        while True:
+            while index < len(self._events):
+                yield self._events[index]
+                index += 1
+            if self.finished:
+                return
+            updated = self._updated
+            try:
+                await asyncio.wait_for(updated.wait(), timeout=keepalive)
+            except asyncio.TimeoutError:
+                yield None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "job_id": self.job_id,
+            "incident_id": self.incident_id,
+            "status": self.status,
+            "created_at": self.created_at.isoformat(),
+            "started_at": self.started_at.isoformat() if self.started_at else None,
+            "finished_at": self.finished_at.isoformat() if self.finished_at else None,
+            "stages": self.stages,
+            "error": self.error
+        }
+
+class JobManager:
+    """Runs incident response jobs in the background and keeps recent ones for lookup."""
+
+    def __init__(self, max_jobs: Optional[int] = None):
+        self.max_jobs = max_jobs or config_manager.RESPONSE_JOB_RETENTION
+        self._jobs: "OrderedDict[str, ResponseJob]" = OrderedDict()
+        self._tasks: Set[asyncio.Task] = set()
+
+    def get(self, job_id: str) -> Optional[ResponseJob]:
+        return self._jobs.get(job_id)
+
+    def launch(
+        self,
+        incident_id: str,
+        run: Callable[[Callable[[str, Dict, Dict], None]], Awaitable[Dict]]
+    ) -> ResponseJob:
+        """Start ``run`` in the background, passing it the job's stage callback."""
+        job = ResponseJob(incident_id)
+        self._jobs[job.job_id] = job
+        self._evict()
+
+        task = asyncio.create_task(self._run(job, run))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return job
+
+    async def _run(self, job: ResponseJob, run: Callable) -> None:
+        job.mark_running()
+        try:
+            job.complete(await run(job.record_stage))
+        except asyncio.CancelledError:
+            job.fail("Job cancelled")
+            raise
+        except Exception as e:
+            logger.error(f"Error running response job {job.job_id}: {str(e)}")
+            job.fail(str(e))
+
+    def _evict(self) -> None:
+        """Drop the oldest finished jobs once retention is exceeded."""
+        if len(self._jobs) <= self.max_jobs:
+            return
+        for job_id in [job_id for job_id, job in self._jobs.items() if job.finished]:
+            if len(self._jobs) <= self.max_jobs:
+                break
+            del self._jobs[job_id]
+
@@ -0,0 +1,189 @@
+import asyncio
+import logging
+import time
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+from .config import config_manager
+from .database import db_manager
+from .metrics_store import metrics_store
+from ..models.database import SystemMetrics
+
+logger = logging.getLogger(__name__)
+
+class MetricsBuffer:
+    """Write-behind buffer for system_metrics rows.
+
+    Samples from every monitoring agent are queued in memory and written in
+    one bulk insert when ``batch_size`` rows are pending or every
+    ``flush_interval`` seconds, whichever comes first. At most ``max_rows``
+    are held; beyond that the oldest samples are dropped and counted.
+
+    A failed insert is retried with exponential backoff. Once a batch has
+    failed ``split_after`` times in a row while the database still answers
+    queries, it is inserted by halves and the rows that fail on their own
+    are rejected and counted, so one bad row cannot block the buffer. An
+    unreachable database only backs off.
+    """
+
+    def __init__(
+        self,
+        flush_interval: Optional[float] = None,
+        batch_size: Optional[int] = None,
+        max_rows: Optional[int] = None
+    ):
+        self.flush_interval = flush_interval or config_manager.METRICS_BUFFER_FLUSH_INTERVAL
+        self.batch_size = batch_size or config_manager.METRICS_BUFFER_BATCH_SIZE
+        self.max_rows = max_rows or config_manager.METRICS_BUFFER_MAX_ROWS
+        self.retry_base = config_manager.METRICS_BUFFER_RETRY_BASE
+        self.retry_max = config_manager.METRICS_BUFFER_RETRY_MAX
+        self.split_after = config_manager.METRICS_BUFFER_SPLIT_AFTER
+        self._rows: Deque[Dict[str, Any]] = deque()
+        # Created on first use so they bind to the running loop (Python 3.9)
+        self._full: Optional[asyncio.Event] = None
+        self._flush_lock: Optional[asyncio.Lock] = None
+        self._flush_task: Optional[asyncio.Task] = None
+        self._failures = 0  # failed inserts in a row
+        self._retry_at = 0.0  # monotonic time before which no insert is attempted
+        self.received = 0
+        self.dropped = 0
+        self.flushes = 0
+        self.size_flushes = 0
+        self.rows_written = 0
+        self.failed_flushes = 0
+        self.rejected = 0
+
+    def add(self, row: Dict[str, Any]) -> None:
+        """Queue one system_metrics row; it is written on the next flush."""
+        self.received += 1
+        self._rows.append(row)
+        self._enforce_cap()
+        self._ensure_started()
+        # While backing off, a full buffer waits for the retry like everything else
+        if len(self._rows) >= self.batch_size and not self._retry_delay():
+            self._full.set()
+
+    def _enforce_cap(self) -> None:
+        while len(self._rows) > self.max_rows:
+            self._rows.popleft()
+            self.dropped += 1
+
+    def _ensure_started(self) -> None:
+        if self._full is None:
+            self._full = asyncio.Event()
+            self._flush_lock = asyncio.Lock()
+        if self._flush_task is None or self._flush_task.done():
+            self._flush_task = asyncio.create_task(self._flush_loop())
+
+    def _retry_delay(self) -> float:
+        """Seconds left before the next insert may be attempted."""
+        return max(self._retry_at - time.monotonic(), 0.0)
+
+    async def _flush_loop(self):
+        while True:
+            delay = self._retry_delay()
+            if delay:
+                await asyncio.sleep(delay)
+            else:
+                # asyncio.wait, unlike wait_for, never swallows a cancel that
+                # races with the event being set
+                waiter = asyncio.ensure_future(self._full.wait())
+                try:
+                    done, _ = await asyncio.wait({waiter}, timeout=self.flush_interval)
+                finally:
+                    waiter.cancel()
+                if done:
+                    self.size_flushes += 1
+            await self.flush()
+
+    @staticmethod
+    async def _database_reachable() -> bool:
+        try:
+            await db_manager.execute_query("SELECT 1")
+            return True
+        except Exception:
+            return False
+
+    async def _insert_halves(self, batch: List[Dict[str, Any]]) -> Tuple[int, List[Dict[str, Any]]]:
+        """Insert a failed batch by halves; returns rows written and the single rows that failed."""
+        if len(batch) == 1:
+            return 0, batch
+        written, failed = 0, []
+        middle = len(batch) // 2
+        for half in (batch[:middle], batch[middle:]):
+            if await db_manager.bulk_insert(SystemMetrics, half):
+                written += len(half)
+            else:
+                half_written, half_failed = await self._insert_halves(half)
+                written += half_written
+                failed.extend(half_failed)
+        return written, failed
+
+    async def flush(self) -> int:
+        """Write everything buffered so far in batches; returns the rows written."""
+        if self._flush_lock is None:
+            return 0
+        async with self._flush_lock:
+            self._full.clear()
+            written = 0
+            while self._rows:
+                batch: List[Dict[str, Any]] = [
+                    self._rows.popleft() for _ in range(min(self.batch_size, len(self._rows)))
+                ]
+                if await db_manager.bulk_insert(SystemMetrics, batch):
+                    batch_written = len(batch)
+                else:
+                    self.failed_flushes += 1
+                    self._failures += 1
+                    if self._failures >= self.split_after and await self._database_reachable():
+                        # The database is up, so the batch holds rows it refuses
+                        batch_written, failed = await self._insert_halves(batch)
+                        if failed:
+                            self.rejected += len(failed)
+                            logger.warning(f"Rejected {len(failed)} system_metrics rows that cannot be inserted, e.g. {failed[0]}")
+                    else:
+                        # Put the batch back in front so ordering is kept for the retry
+                        self._rows.extendleft(reversed(batch))
+                        self._enforce_cap()
+                        self._retry_at = time.monotonic() + min(
+                            self.retry_base * 2 ** (self._failures - 1), self.retry_max
+                        )
+                        break
+                # Late rows may land in buckets that are already rolled up
+                metrics_store.mark_dirty(row.get("timestamp") for row in batch)
+                self._failures = 0
+                self._retry_at = 0.0
+                self.flushes += 1
+                self.rows_written += batch_written
+                written += batch_written
+            return written
+
+    async def stop(self):
+        """Stop the flush loop and write anything still buffered."""
+        if self._flush_task is not None:
+            self._flush_task.cancel()
+            await asyncio.gather(self._flush_task, return_exceptions=True)
+            self._flush_task = None
+        await self.flush()
+        if self._rows:
+            logger.warning(f"{len(self._rows)} buffered metrics rows could not be written on shutdown")
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "buffered": len(self._rows),
+            "max_rows": self.max_rows,
+            "batch_size": self.batch_size,
+            "flush_interval": self.flush_interval,
+            "received": self.received,
+            "dropped": self.dropped,
+            "flushes": self.flushes,
+            "size_flushes": self.size_flushes,
+            "rows_written": self.rows_written,
+            "failed_flushes": self.failed_flushes,
+            "consecutive_failures": self._failures,
+            "retry_in": round(self._retry_delay(), 3),
+            "rejected": self.rejected
+        }
+
+# Shared by every monitoring agent in the process
+metrics_buffer = MetricsBuffer()
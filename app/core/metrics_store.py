@@ -0,0 +1,368 @@
+import asyncio
+import logging
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from sqlalchemy import delete, func, select, text
+
+from .config import config_manager
+from .database import db_manager
+from .partitions import default_partition_name, drop_partitions_before, ensure_partitions, is_partitioned
+from ..models.database import MetricsRollup, SystemMetrics
+
+logger = logging.getLogger(__name__)
+
+# Rollup resolutions, finest first
+RESOLUTIONS: Dict[str, timedelta] = {
+    "1m": timedelta(minutes=1),
+    "1h": timedelta(hours=1),
+    "1d": timedelta(days=1)
+}
+_TRUNC_UNITS = {"1m": "minute", "1h": "hour", "1d": "day"}
+
+# Raw system_metrics column -> rollup column prefix
+METRIC_FIELDS: Dict[str, str] = {
+    "cpu_usage": "cpu",
+    "memory_usage": "memory",
+    "disk_usage": "disk",
+    "network_usage": "network"
+}
+
+# Most raw data a single rollup pass reads for one resolution
+MAX_PASS_SPAN = timedelta(days=1)
+
+def floor_time(timestamp: datetime, resolution: str) -> datetime:
+    timestamp = timestamp.replace(second=0, microsecond=0)
+    if resolution in ("1h", "1d"):
+        timestamp = timestamp.replace(minute=0)
+    if resolution == "1d":
+        timestamp = timestamp.replace(hour=0)
+    return timestamp
+
+def percentile(values: List[float], q: float) -> Optional[float]:
+    """Linear-interpolated percentile, matching PostgreSQL's percentile_cont."""
+    if not values:
+        return None
+    values = sorted(values)
+    position = (len(values) - 1) * q
+    lower = int(position)
+    upper = min(lower + 1, len(values) - 1)
+    return values[lower] + (values[upper] - values[lower]) * (position - lower)
+
+def select_resolution(start: datetime, end: datetime, max_points: int, now: Optional[datetime] = None) -> str:
+    """Pick the finest resolution still retained for ``start`` that keeps the
+    series within ``max_points``; falls back to the coarsest rollup.
+    """
+    now = now or datetime.utcnow()
+    span = end - start
+    age = now - start
+    if (span.total_seconds() <= config_manager.METRICS_RAW_MAX_SPAN
+            and age <= timedelta(days=config_manager.METRICS_RAW_RETENTION_DAYS)):
+        return "raw"
+    for resolution, step in RESOLUTIONS.items():
+        retention = config_manager.METRICS_ROLLUP_RETENTION_DAYS.get(resolution)
+        if retention is not None and age > timedelta(days=retention):
+            continue
+        if span / step <= max_points:
+            return resolution
+    return list(RESOLUTIONS)[-1]
+
+def _contiguous(buckets: List[datetime], step: timedelta) -> List[Tuple[datetime, datetime]]:
+    """Merge sorted bucket starts into [start, end) ranges of adjacent buckets,
+    each spanning at most MAX_PASS_SPAN (or one bucket, if longer).
+    """
+    ranges: List[Tuple[datetime, datetime]] = []
+    for bucket in buckets:
+        if ranges and ranges[-1][1] == bucket and bucket + step - ranges[-1][0] <= max(step, MAX_PASS_SPAN):
+            ranges[-1] = (ranges[-1][0], bucket + step)
+        else:
+            ranges.append((bucket, bucket + step))
+    return ranges
+
+class MetricsStore:
+    """Rolls raw system metrics up into 1m/1h/1d aggregates and enforces retention.
+
+    One background loop computes rollups for closed buckets every
+    ``METRICS_ROLLUP_INTERVAL`` seconds and, every
+    ``METRICS_MAINTENANCE_INTERVAL`` seconds, pre-creates upcoming daily
+    partitions and drops expired raw partitions and rollups.
+
+    Writers report the timestamps they load through ``mark_dirty``; the
+    next pass recomputes any already rolled bucket among them, so late
+    samples and backfills reach the rollups. Marks are kept in memory and
+    only cover writes made by this process.
+    """
+
+    def __init__(self):
+        self._task: Optional[asyncio.Task] = None
+        # Minute buckets that received rows since the last rollup pass
+        self._dirty: Set[datetime] = set()
+        self.buckets_recomputed = 0
+        self._last_maintenance: Optional[datetime] = None
+        self.rollup_passes = 0
+        self.rollup_rows = 0
+        self.partitions_created = 0
+        self.partitions_dropped = 0
+        self.rows_expired = 0
+        self.last_error: Optional[str] = None
+
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._loop())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def _loop(self):
+        while True:
+            try:
+                now = datetime.utcnow()
+                if (self._last_maintenance is None or (now - self._last_maintenance).total_seconds()
+                        >= config_manager.METRICS_MAINTENANCE_INTERVAL):
+                    await self.maintain(now)
+                    self._last_maintenance = now
+                await self.rollup_all(now)
+                self.last_error = None
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.last_error = str(e)
+                logger.error(f"Error in metrics rollup loop: {str(e)}")
+            await asyncio.sleep(config_manager.METRICS_ROLLUP_INTERVAL)
+
+    def mark_dirty(self, timestamps: Iterable[Optional[datetime]]) -> None:
+        """Note the buckets of rows just written to system_metrics.
+
+        Rows without a timestamp get the current time and need no mark.
+        """
+        for timestamp in timestamps:
+            if timestamp is not None:
+                self._dirty.add(floor_time(timestamp, "1m"))
+
+    async def rollup_all(self, now: Optional[datetime] = None) -> int:
+        """Roll up every closed bucket not yet aggregated, and recompute dirty ones; returns rows written."""
+        # Leave time for write-behind buffers to deliver the bucket's samples
+        settled = (now or datetime.utcnow()) - timedelta(seconds=2 * config_manager.METRICS_BUFFER_FLUSH_INTERVAL)
+        dirty, self._dirty = self._dirty, set()
+        written = 0
+        try:
+            for resolution in RESOLUTIONS:
+                written += await self.rollup(resolution, settled, dirty)
+        except BaseException:
+            # Keep the marks for the next pass
+            self._dirty |= dirty
+            raise
+        self.rollup_passes += 1
+        self.rollup_rows += written
+        return written
+
+    async def rollup(self, resolution: str, until: datetime, dirty: Iterable[datetime] = ()) -> int:
+        """Aggregate raw samples into ``resolution`` buckets that closed before ``until``.
+
+        Buckets already rolled up that contain a ``dirty`` timestamp are
+        aggregated again and overwritten.
+        """
+        step = RESOLUTIONS[resolution]
+        aggregate = self._aggregate_sql if db_manager.engine.dialect.name == "postgresql" else self._aggregate_python
+        buckets: List[Tuple[datetime, Dict]] = []
+        async with db_manager.get_session() as session:
+            last = (await session.execute(
+                select(func.max(MetricsRollup.bucket_start)).where(MetricsRollup.resolution == resolution)
+            )).scalar()
+
+            if last is not None:
+                stale = sorted({floor_time(timestamp, resolution) for timestamp in dirty})
+                stale = [bucket for bucket in stale if bucket <= last]
+                self.buckets_recomputed += len(stale)
+                recomputed: List[Tuple[datetime, Dict]] = []
+                for start, end in _contiguous(stale, step):
+                    recomputed += await aggregate(session, resolution, start, end)
+                # Buckets whose samples were all deleted lose their rollup
+                emptied = set(stale) - {bucket for bucket, _ in recomputed}
+                if emptied:
+                    await session.execute(delete(MetricsRollup).where(
+                        MetricsRollup.resolution == resolution, MetricsRollup.bucket_start.in_(emptied)
+                    ))
+                buckets += recomputed
+
+            # Continue at the first sample after the last rollup, skipping
+            # gaps in which nothing was recorded
+            query = select(func.min(SystemMetrics.timestamp))
+            if last is not None:
+                query = query.where(SystemMetrics.timestamp >= last + step)
+            first = (await session.execute(query)).scalar()
+            if first is not None:
+                start = floor_time(first, resolution)
+                end = min(floor_time(until, resolution), start + max(step, MAX_PASS_SPAN))
+                if end > start:
+                    buckets += await aggregate(session, resolution, start, end)
+
+        rows = [{"resolution": resolution, "bucket_start": bucket, **stats} for bucket, stats in buckets]
+        if rows and not await db_manager.bulk_upsert(MetricsRollup, rows, ["resolution", "bucket_start"]):
+            raise RuntimeError(f"Failed to write {resolution} rollups")
+        return len(rows)
+
+    @staticmethod
+    async def _aggregate_sql(session, resolution: str, start: datetime, end: datetime) -> List[Tuple[datetime, Dict]]:
+        bucket = func.date_trunc(_TRUNC_UNITS[resolution], SystemMetrics.timestamp).label("bucket")
+        columns = [bucket, func.count().label("samples")]
+        for field, prefix in METRIC_FIELDS.items():
+            column = getattr(SystemMetrics, field)
+            columns += [
+                func.min(column).label(f"{prefix}_min"),
+                func.max(column).label(f"{prefix}_max"),
+                func.avg(column).label(f"{prefix}_avg"),
+                func.percentile_cont(0.95).within_group(column).label(f"{prefix}_p95")
+            ]
+        result = await session.execute(
+            select(*columns)
+            .where(SystemMetrics.timestamp >= start, SystemMetrics.timestamp < end)
+            .group_by(bucket)
+        )
+        return [
+            (row.bucket, {key: value for key, value in row._mapping.items() if key != "bucket"})
+            for row in result
+        ]
+
+    @staticmethod
+    async def _aggregate_python(session, resolution: str, start: datetime, end: datetime) -> List[Tuple[datetime, Dict]]:
+        result = await session.execute(
+            select(SystemMetrics.timestamp, *(getattr(SystemMetrics, field) for field in METRIC_FIELDS))
+            .where(SystemMetrics.timestamp >= start, SystemMetrics.timestamp < end)
+        )
+        samples: Dict[datetime, List] = defaultdict(list)
+        for row in result:
+            samples[floor_time(row[0], resolution)].append(row[1:])
+
+        buckets = []
+        for bucket, rows in sorted(samples.items()):
+            stats: Dict[str, Any] = {"samples": len(rows)}
+            for index, prefix in enumerate(METRIC_FIELDS.values()):
+                values = [row[index] for row in rows if row[index] is not None]
+                stats[f"{prefix}_min"] = min(values) if values else None
+                stats[f"{prefix}_max"] = max(values) if values else None
+                stats[f"{prefix}_avg"] = sum(values) / len(values) if values else None
+                stats[f"{prefix}_p95"] = percentile(values, 0.95)
+            buckets.append((bucket, stats))
+        return buckets
+
+    async def maintain(self, now: Optional[datetime] = None) -> None:
+        """Pre-create upcoming partitions and drop data past its retention."""
+        now = now or datetime.utcnow()
+        raw_cutoff = now - timedelta(days=config_manager.METRICS_RAW_RETENTION_DAYS)
+        table_name = SystemMetrics.__tablename__
+
+        async with db_manager.get_session() as session:
+            conn = await session.connection()
+            partitioned = await conn.run_sync(is_partitioned, table_name)
+            if partitioned:
+                created = await conn.run_sync(
+                    ensure_partitions, table_name, now.date(), config_manager.METRICS_PARTITION_PREMAKE_DAYS,
+                    "timestamp", config_manager.METRICS_PARTITION_LOCK_TIMEOUT
+                )
+                self.partitions_created += len(created)
+                # Only stragglers in the DEFAULT partition need row-by-row deletes
+                result = await session.execute(
+                    text(f"DELETE FROM {default_partition_name(table_name)} WHERE timestamp < :cutoff"),
+                    {"cutoff": raw_cutoff}
+                )
+            else:
+                result = await session.execute(delete(SystemMetrics).where(SystemMetrics.timestamp < raw_cutoff))
+            self.rows_expired += result.rowcount or 0
+
+            for resolution, days in config_manager.METRICS_ROLLUP_RETENTION_DAYS.items():
+                result = await session.execute(delete(MetricsRollup).where(
+                    MetricsRollup.resolution == resolution,
+                    MetricsRollup.bucket_start < now - timedelta(days=days)
+                ))
+                self.rows_expired += result.rowcount or 0
+
+        if partitioned:
+            # Outside the session's transaction, so each detach and drop holds
+            # its lock on the parent only for that statement
+            async with db_manager.engine.connect() as conn:
+                conn = await conn.execution_options(isolation_level="AUTOCOMMIT")
+                dropped = await conn.run_sync(
+                    drop_partitions_before, table_name, raw_cutoff, config_manager.METRICS_PARTITION_LOCK_TIMEOUT
+                )
+            self.partitions_dropped += len(dropped)
+            if dropped:
+                logger.info(f"Dropped expired metrics partitions: {', '.join(dropped)}")
+
+    async def query_series(
+        self,
+        start: datetime,
+        end: datetime,
+        resolution: str = "auto",
+        max_points: Optional[int] = None
+    ) -> Dict[str, Any]:
+        """Return metric points for [start, end) at the requested or chosen resolution."""
+        max_points = max_points or config_manager.METRICS_SERIES_MAX_POINTS
+        if resolution == "auto":
+            resolution = select_resolution(start, end, max_points)
+        elif resolution != "raw" and resolution not in RESOLUTIONS:
+            raise ValueError(f"Unknown resolution: {resolution}")
+
+        async with db_manager.get_session() as session:
+            if resolution == "raw":
+                result = await session.execute(
+                    select(SystemMetrics.timestamp, *(getattr(SystemMetrics, field) for field in METRIC_FIELDS))
+                    .where(SystemMetrics.timestamp >= start, SystemMetrics.timestamp < end)
+                    .order_by(SystemMetrics.timestamp)
+                    .limit(max_points)
+                )
+                points = [
+                    {
+                        "timestamp": row[0],
+                        "samples": 1,
+                        **{
+                            prefix: {"min": value, "max": value, "avg": value, "p95": value}
+                            for prefix, value in zip(METRIC_FIELDS.values(), row[1:])
+                        }
+                    }
+                    for row in result
+                ]
+            else:
+                rollups = (await session.execute(
+                    select(MetricsRollup)
+                    .where(
+                        MetricsRollup.resolution == resolution,
+                        MetricsRollup.bucket_start >= floor_time(start, resolution),
+                        MetricsRollup.bucket_start < end
+                    )
+                    .order_by(MetricsRollup.bucket_start)
+                    .limit(max_points)
+                )).scalars().all()
+                points = [
+                    {
+                        "timestamp": rollup.bucket_start,
+                        "samples": rollup.samples,
+                        **{
+                            prefix: {stat: getattr(rollup, f"{prefix}_{stat}") for stat in ("min", "max", "avg", "p95")}
+                            for prefix in METRIC_FIELDS.values()
+                        }
+                    }
+                    for rollup in rollups
+                ]
+
+        return {"resolution": resolution, "start": start, "end": end, "points": points}
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "running": self._task is not None and not self._task.done(),
+            "rollup_passes": self.rollup_passes,
+            "rollup_rows": self.rollup_rows,
+            "buckets_recomputed": self.buckets_recomputed,
+            "dirty_buckets": len(self._dirty),
+            "partitions_created": self.partitions_created,
+            "partitions_dropped": self.partitions_dropped,
+            "rows_expired": self.rows_expired,
+            "last_maintenance": self._last_maintenance.isoformat() if self._last_maintenance else None,
+            "last_error": self.last_error
+        }
+
+metrics_store = MetricsStore()
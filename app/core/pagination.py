@@ -0,0 +1,72 @@
+import base64
+import json
+from datetime import datetime
+from typing import Any, List, Optional, Tuple
+
+from sqlalchemy import Select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+
+def encode_cursor(timestamp: Optional[datetime], row_id: Any) -> str:
+    """Build an opaque cursor pointing just past a (timestamp, id) position.
+
+    A NULL timestamp is encoded as JSON null.
+    """
+    payload = json.dumps([None if timestamp is None else timestamp.isoformat(), row_id], separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+def decode_cursor(cursor: str, id_type: type = object) -> Tuple[Optional[datetime], Any]:
+    """Inverse of encode_cursor; raises ValueError for malformed tokens.
+
+    The decoded id must be an instance of ``id_type``, so a crafted cursor
+    cannot reach the database with a mismatched value.
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        timestamp, row_id = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        if isinstance(row_id, bool) or not isinstance(row_id, id_type):
+            raise TypeError(f"Cursor id {row_id!r} is not {id_type.__name__}")
+        return (None if timestamp is None else datetime.fromisoformat(timestamp)), row_id
+    except Exception as e:
+        raise ValueError(f"Invalid cursor: {cursor}") from e
+
+async def paginate(
+    session: AsyncSession,
+    query: Select,
+    timestamp_column,
+    id_column,
+    limit: int,
+    cursor: Optional[str] = None
+) -> Tuple[List[Any], Optional[str]]:
+    """Fetch one newest-first page of ``query`` by keyset on (timestamp, id).
+
+    Returns the rows and the cursor for the next page, or None on the last
+    page. Unlike OFFSET, the cost of a page does not grow with its depth.
+    Rows without a timestamp come after all dated ones, newest id first;
+    each part is read in index order on its own.
+    """
+    dated, undated = timestamp_column.isnot(None), timestamp_column.is_(None)
+    rows: List[Any] = []
+    after_timestamp = after_id = None
+    if cursor:
+        after_timestamp, after_id = decode_cursor(cursor, id_column.type.python_type)
+
+    # One extra row tells us whether another page exists
+    if not cursor or after_timestamp is not None:
+        dated_query = query.filter(dated)
+        if cursor:
+            dated_query = dated_query.filter(tuple_(timestamp_column, id_column) < tuple_(after_timestamp, after_id))
+        dated_query = dated_query.order_by(timestamp_column.desc(), id_column.desc()).limit(limit + 1)
+        rows = list((await session.execute(dated_query)).scalars().all())
+
+    if len(rows) <= limit:
+        undated_query = query.filter(undated)
+        if after_timestamp is None and after_id is not None:
+            undated_query = undated_query.filter(id_column < after_id)
+        undated_query = undated_query.order_by(id_column.desc()).limit(limit + 1 - len(rows))
+        rows.extend((await session.execute(undated_query)).scalars().all())
+
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    last = rows[-1]
+    return rows, encode_cursor(getattr(last, timestamp_column.key), getattr(last, id_column.key))
@@ -0,0 +1,200 @@
+import logging
+import re
+from datetime import date, datetime, timedelta
+from typing import List, Optional, Tuple
+
+from sqlalchemy import Table, inspect, text
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.engine import Connection
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.schema import CreateTable
+
+logger = logging.getLogger(__name__)
+
+# Native PostgreSQL range partitioning by day. Everything here takes a
+# synchronous Connection so it can run from Alembic or via run_sync().
+
+_BOUND = re.compile(r"FROM \((.+?)\) TO \((.+?)\)")
+
+def partition_name(table_name: str, day: date) -> str:
+    return f"{table_name}_p{day:%Y%m%d}"
+
+def default_partition_name(table_name: str) -> str:
+    return f"{table_name}_default"
+
+def partitioned_table_ddl(table: Table, column: str = "timestamp") -> str:
+    """CREATE TABLE for ``table`` as a range-partitioned parent.
+
+    PostgreSQL requires the partition key in the primary key, so the key
+    becomes (id, ``column``); the ORM keeps mapping ``id`` alone.
+    """
+    ddl = str(CreateTable(table).compile(dialect=postgresql.dialect())).strip()
+    primary_key = ", ".join(c.name for c in table.primary_key.columns)
+    ddl = ddl.replace(f"PRIMARY KEY ({primary_key})", f"PRIMARY KEY ({primary_key}, {column})")
+    return f"{ddl} PARTITION BY RANGE ({column})"
+
+def is_partitioned(conn: Connection, table_name: str) -> bool:
+    if conn.dialect.name != "postgresql":
+        return False
+    return conn.execute(
+        text("SELECT 1 FROM pg_class WHERE relname = :name AND relkind = 'p'"),
+        {"name": table_name}
+    ).first() is not None
+
+def create_partitioned_table(conn: Connection, table: Table, premake_days: int, column: str = "timestamp") -> bool:
+    """Create ``table`` partitioned by day on PostgreSQL; no-op elsewhere or if it exists."""
+    if conn.dialect.name != "postgresql" or inspect(conn).has_table(table.name):
+        return False
+
+    conn.execute(text(partitioned_table_ddl(table, column)))
+    for index in table.indexes:
+        index.create(conn)
+    conn.execute(text(
+        f"CREATE TABLE {default_partition_name(table.name)} PARTITION OF {table.name} DEFAULT"
+    ))
+    ensure_partitions(conn, table.name, datetime.utcnow().date(), premake_days)
+    logger.info(f"Created partitioned table {table.name}")
+    return True
+
+def list_partitions(conn: Connection, table_name: str) -> List[Tuple[str, Optional[datetime], Optional[datetime]]]:
+    """Return (name, lower, upper) for each range partition; None means unbounded.
+
+    The DEFAULT partition is not included.
+    """
+    rows = conn.execute(text(
+        "SELECT c.relname, pg_get_expr(c.relpartbound, c.oid) "
+        "FROM pg_inherits i "
+        "JOIN pg_class c ON c.oid = i.inhrelid "
+        "JOIN pg_class p ON p.oid = i.inhparent "
+        "WHERE p.relname = :name"
+    ), {"name": table_name}).all()
+
+    def parse(bound: str) -> Optional[datetime]:
+        bound = bound.strip()
+        return None if bound in ("MINVALUE", "MAXVALUE") else datetime.fromisoformat(bound.strip("'"))
+
+    partitions = []
+    for name, bound in rows:
+        match = _BOUND.search(bound or "")
+        if match:
+            partitions.append((name, parse(match.group(1)), parse(match.group(2))))
+    return sorted(partitions, key=lambda p: p[1] or datetime.min)
+
+def _has_default_partition(conn: Connection, table_name: str) -> bool:
+    return conn.execute(
+        text(
+            "SELECT 1 FROM pg_partitioned_table t JOIN pg_class p ON p.oid = t.partrelid "
+            "WHERE p.relname = :name AND t.partdefid <> 0"
+        ),
+        {"name": table_name}
+    ).first() is not None
+
+def _create_partition(conn: Connection, table_name: str, name: str, lower: datetime, upper: datetime, column: str) -> None:
+    """Create one daily partition, first moving any of its rows out of the DEFAULT partition.
+
+    PostgreSQL refuses a partition whose rows already sit in DEFAULT, so a
+    late or backfilled row would otherwise block the day for good.
+    """
+    bounds = f"FOR VALUES FROM ('{lower.isoformat()}') TO ('{upper.isoformat()}')"
+    default = default_partition_name(table_name)
+    stragglers = conn.execute(
+        text(f"SELECT 1 FROM {default} WHERE {column} >= :lower AND {column} < :upper LIMIT 1"),
+        {"lower": lower, "upper": upper}
+    ).first() if _has_default_partition(conn, table_name) else None
+    if stragglers is None:
+        conn.execute(text(f"CREATE TABLE IF NOT EXISTS {name} PARTITION OF {table_name} {bounds}"))
+        return
+
+    columns = ", ".join(f'"{c["name"]}"' for c in inspect(conn).get_columns(table_name))
+    conn.execute(text(f"CREATE TABLE {name} (LIKE {table_name} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)"))
+    moved = conn.execute(text(
+        f"WITH moved AS (DELETE FROM {default} WHERE {column} >= :lower AND {column} < :upper "
+        f"RETURNING {columns}) INSERT INTO {name} ({columns}) SELECT {columns} FROM moved"
+    ), {"lower": lower, "upper": upper})
+    # Attaching builds the parent's indexes on the new partition
+    conn.execute(text(f"ALTER TABLE {table_name} ATTACH PARTITION {name} {bounds}"))
+    logger.info(f"Moved {moved.rowcount} rows from {default} into new partition {name}")
+
+def ensure_partitions(
+    conn: Connection,
+    table_name: str,
+    start: date,
+    days: int,
+    column: str = "timestamp",
+    lock_timeout: Optional[float] = None
+) -> List[str]:
+    """Create the daily partitions for ``start`` and the following ``days`` days.
+
+    Each day is created in its own savepoint; a failure, including waiting
+    longer than ``lock_timeout`` for the parent's lock, is logged and
+    retried on the next pass without holding back the other days.
+    """
+    existing = list_partitions(conn, table_name)
+    created = []
+    if lock_timeout:
+        conn.execute(text(f"SET LOCAL lock_timeout = '{int(lock_timeout * 1000)}ms'"))
+    try:
+        for offset in range(days + 1):
+            day = start + timedelta(days=offset)
+            lower = datetime.combine(day, datetime.min.time())
+            upper = lower + timedelta(days=1)
+            # Skip days already covered, e.g. by a migrated legacy partition
+            if any((lo is None or lo < upper) and (hi is None or hi > lower) for _, lo, hi in existing):
+                continue
+            name = partition_name(table_name, day)
+            try:
+                with conn.begin_nested():
+                    _create_partition(conn, table_name, name, lower, upper, column)
+            except DBAPIError as e:
+                logger.error(f"Error creating partition {name}: {str(e)}")
+                continue
+            created.append(name)
+    finally:
+        if lock_timeout:
+            conn.execute(text("SET LOCAL lock_timeout TO DEFAULT"))
+    return created
+
+def drop_partitions_before(
+    conn: Connection,
+    table_name: str,
+    cutoff: datetime,
+    lock_timeout: Optional[float] = None
+) -> List[str]:
+    """Detach and drop every range partition whose rows are all older than ``cutoff``.
+
+    Meant for an AUTOCOMMIT connection, so each statement holds its lock on
+    the parent only briefly. Detaching is CONCURRENTLY where PostgreSQL
+    allows it (14+, no DEFAULT partition); otherwise ``lock_timeout`` makes
+    a partition that cannot be locked promptly wait for the next pass
+    rather than queue every reader and writer of the table behind it.
+    """
+    concurrently = conn.dialect.server_version_info >= (14,) and not _has_default_partition(conn, table_name)
+    pending = set()
+    if conn.dialect.server_version_info >= (14,):
+        pending = set(conn.execute(text(
+            "SELECT c.relname FROM pg_inherits i "
+            "JOIN pg_class c ON c.oid = i.inhrelid JOIN pg_class p ON p.oid = i.inhparent "
+            "WHERE p.relname = :name AND i.inhdetachpending"
+        ), {"name": table_name}).scalars())
+
+    if lock_timeout:
+        conn.execute(text(f"SET lock_timeout = '{int(lock_timeout * 1000)}ms'"))
+    dropped = []
+    try:
+        for name, _, upper in list_partitions(conn, table_name):
+            if upper is None or upper > cutoff:
+                continue
+            # An interrupted concurrent detach has to be finalized before the drop
+            mode = "FINALIZE" if name in pending else "CONCURRENTLY" if concurrently else ""
+            try:
+                conn.execute(text(f"ALTER TABLE {table_name} DETACH PARTITION {name} {mode}".rstrip()))
+                conn.execute(text(f"DROP TABLE {name}"))
+            except DBAPIError as e:
+                # Later partitions would wait on the same lock; leave them all for the next pass
+                logger.warning(f"Could not drop partition {name}, retrying next pass: {str(e)}")
+                break
+            dropped.append(name)
+    finally:
+        if lock_timeout:
+            conn.execute(text("RESET lock_timeout"))
+    return dropped
@@ -0,0 +1,183 @@
+import asyncio
+import logging
+import time
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from .config import config_manager
+
+logger = logging.getLogger(__name__)
+
+# Declarative stage graph for incident response. ``inputs`` maps task fields
+# to either "incident" (the raw incident payload) or the name of an upstream
+# stage whose result is passed through. Stages without a dependency path
+# between them run concurrently.
+RESPONSE_STAGES: List[Dict[str, Any]] = [
+    {
+        "name": "threat_assessment",
+        "agent_type": "guardian",
+        "task_type": "threat_assessment",
+        "depends_on": [],
+        "inputs": {"incident_data": "incident"}
+    },
+    {
+        "name": "attack_model",
+        "agent_type": "simulation",
+        "task_type": "model_attack_path",
+        "depends_on": ["threat_assessment"],
+        "inputs": {"threat_data": "threat_assessment"}
+    },
+    {
+        "name": "containment",
+        "agent_type": "containment",
+        "task_type": "contain_threat",
+        "depends_on": ["threat_assessment", "attack_model"],
+        "inputs": {"threat_data": "threat_assessment", "attack_model": "attack_model"}
+    },
+    {
+        "name": "evidence",
+        "agent_type": "forensic",
+        "task_type": "collect_evidence",
+        "depends_on": [],
+        "inputs": {"incident_data": "incident"}
+    },
+    {
+        "name": "documentation",
+        "agent_type": "compliance",
+        "task_type": "prepare_documentation",
+        "depends_on": ["evidence"],
+        "inputs": {"incident_data": "incident", "evidence_data": "evidence"}
+    }
+]
+
+class ResponsePipeline:
+    """Runs a stage graph of agent tasks, starting each stage as soon as its dependencies finish."""
+
+    def __init__(
+        self,
+        execute: Callable[..., Awaitable[Dict]],
+        stages: Optional[List[Dict[str, Any]]] = None,
+        default_timeout: Optional[float] = None
+    ):
+        self.execute = execute
+        self.stages = self._order_stages(stages if stages is not None else RESPONSE_STAGES)
+        self.default_timeout = default_timeout or config_manager.RESPONSE_STAGE_TIMEOUT
+
+    @staticmethod
+    def _order_stages(stages: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Validate the stage graph and return the stages in dependency order."""
+        by_name = {stage["name"]: stage for stage in stages}
+        if len(by_name) != len(stages):
+            raise ValueError("Duplicate stage names in response pipeline")
+
+        for stage in stages:
+            for dependency in stage.get("depends_on", []):
+                if dependency not in by_name:
+                    raise ValueError(f"Stage {stage['name']} depends on unknown stage {dependency}")
+            for source in stage.get("inputs", {}).values():
+                if source != "incident" and source not in stage.get("depends_on", []):
+                    raise ValueError(f"Stage {stage['name']} reads {source} without depending on it")
+
+        ordered: List[Dict[str, Any]] = []
+        visiting, visited = set(), set()
+
+        def visit(name: str):
+            if name in visited:
+                return
+            if name in visiting:
+                raise ValueError(f"Dependency cycle in response pipeline at stage {name}")
+            visiting.add(name)
+            for dependency in by_name[name].get("depends_on", []):
+                visit(dependency)
+            visiting.discard(name)
+            visited.add(name)
+            ordered.append(by_name[name])
+
+        for stage in stages:
+            visit(stage["name"])
+        return ordered
+
+    async def run(
+        self,
+        incident: Dict,
+        on_stage_complete: Optional[Callable[[str, Dict, Dict], None]] = None,
+        reservation: Any = None
+    ) -> Dict[str, Any]:
+        """Run every stage for an incident and return stage results and timings.
+
+        ``on_stage_complete`` is called with the stage name, result and timing
+        as each stage finishes, in completion order. ``reservation`` is passed
+        on to ``execute`` so stages can use queue slots held in advance.
+        """
+        started = time.perf_counter()
+        stage_tasks: Dict[str, asyncio.Task] = {}
+        timings: Dict[str, Dict[str, Any]] = {}
+
+        for stage in self.stages:
+            stage_tasks[stage["name"]] = asyncio.create_task(
+                self._run_stage(stage, incident, stage_tasks, timings, started, on_stage_complete, reservation)
+            )
+
+        try:
+            results = await asyncio.gather(*stage_tasks.values())
+        except BaseException:
+            for task in stage_tasks.values():
+                task.cancel()
+            raise
+
+        return {
+            "results": dict(zip(stage_tasks.keys(), results)),
+            "stage_timings": timings,
+            "duration_ms": round((time.perf_counter() - started) * 1000, 3)
+        }
+
+    async def _run_stage(
+        self,
+        stage: Dict[str, Any],
+        incident: Dict,
+        stage_tasks: Dict[str, asyncio.Task],
+        timings: Dict[str, Dict[str, Any]],
+        pipeline_started: float,
+        on_stage_complete: Optional[Callable[[str, Dict, Dict], None]] = None,
+        reservation: Any = None
+    ) -> Dict:
+        """Wait for a stage's dependencies, then execute it under its timeout."""
+        upstream = {
+            dependency: await stage_tasks[dependency]
+            for dependency in stage.get("depends_on", [])
+        }
+
+        task = {
+            "type": stage["task_type"],
+            "agent_type": stage["agent_type"],
+            "severity": incident.get("severity")
+        }
+        for field, source in stage.get("inputs", {}).items():
+            task[field] = incident if source == "incident" else upstream[source]
+
+        timeout = stage.get("timeout", self.default_timeout)
+        stage_started = time.perf_counter()
+        started_at = datetime.utcnow()
+        try:
+            result = await asyncio.wait_for(self.execute(task, reservation=reservation), timeout=timeout)
+        except asyncio.TimeoutError:
+            logger.warning(f"Response stage {stage['name']} timed out after {timeout}s")
+            result = {
+                "status": "timeout",
+                "error": f"Stage {stage['name']} timed out after {timeout}s",
+                "timestamp": datetime.utcnow().isoformat()
+            }
+
+        timings[stage["name"]] = {
+            "status": result.get("status"),
+            "started_at": started_at.isoformat(),
+            "ready_after_ms": round((stage_started - pipeline_started) * 1000, 3),
+            "duration_ms": round((time.perf_counter() - stage_started) * 1000, 3),
+            "timeout": timeout
+        }
+        if on_stage_complete:
+            try:
+                on_stage_complete(stage["name"], result, timings[stage["name"]])
+            except Exception as e:
+                logger.error(f"Error in stage callback for {stage['name']}: {str(e)}")
+        return result
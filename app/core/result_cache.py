@@ -0,0 +1,106 @@
+import asyncio
+import hashlib
+import json
+import logging
+from typing import Any, Awaitable, Callable, Dict, Optional, Sequence, Set, Tuple
+
+from .cache import MISSING, TTLCache
+from .config import config_manager
+
+logger = logging.getLogger(__name__)
+
+# Ids that route a payload rather than describe it; dropped from the top level
+# of each keyed field so the same content for another incident hashes the same
+ROUTING_FIELDS: Set[str] = {"incident_id", "action_id", "job_id"}
+
+def _field(task: Dict[str, Any], path: str) -> Any:
+    """Value at a dotted ``path`` of a task payload, or None if any part is missing."""
+    value: Any = task
+    for part in path.split("."):
+        if not isinstance(value, dict):
+            return None
+        value = value.get(part)
+    if isinstance(value, dict):
+        return {k: v for k, v in value.items() if k not in ROUTING_FIELDS}
+    return value
+
+class TaskResultCache:
+    """Memoizes agent task results by a canonical hash of their key fields.
+
+    ``cacheable`` maps each agent type to its cacheable task types and, for
+    each, the payload fields (dotted paths) its result depends on; only
+    those fields form the key. Concurrent identical tasks share a single
+    execution (single flight). Only results without an ``error`` key are
+    cached.
+    """
+
+    def __init__(
+        self,
+        cacheable: Dict[str, Dict[str, Sequence[str]]],
+        max_entries: Optional[int] = None,
+        ttl: Optional[float] = None
+    ):
+        self.cacheable = cacheable
+        self._cache = TTLCache(
+            max_entries or config_manager.TASK_RESULT_CACHE_MAX_ENTRIES,
+            config_manager.TASK_RESULT_CACHE_TTL if ttl is None else ttl
+        )
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self.shared = 0
+
+    def is_cacheable(self, agent_type: str, task_type: Optional[str]) -> bool:
+        return task_type in self.cacheable.get(agent_type, {})
+
+    def key_for(self, agent_type: str, task: Dict[str, Any]) -> str:
+        """Canonical SHA-256 of a task's key fields."""
+        fields = self.cacheable[agent_type][task.get("type")]
+        content = {"agent_type": agent_type, **{path: _field(task, path) for path in fields}}
+        payload = json.dumps(content, sort_keys=True, separators=(",", ":"), default=str)
+        return hashlib.sha256(payload.encode()).hexdigest()
+
+    async def get_or_compute(
+        self,
+        agent_type: str,
+        task: Dict[str, Any],
+        compute: Callable[[], Awaitable[Any]]
+    ) -> Tuple[Any, bool]:
+        """Return ``(result, from_cache)``, running ``compute`` only on a true miss."""
+        key = self.key_for(agent_type, task)
+        cached = self._cache.get(key)
+        if cached is not MISSING:
+            return cached, True
+
+        inflight = self._inflight.get(key)
+        if inflight is not None:
+            self.shared += 1
+            return await asyncio.shield(inflight), True
+
+        future = asyncio.get_running_loop().create_future()
+        # Avoid "exception never retrieved" warnings when nobody else is waiting
+        future.add_done_callback(lambda f: f.cancelled() or f.exception())
+        self._inflight[key] = future
+        try:
+            result = await compute()
+        except BaseException as e:
+            if isinstance(e, asyncio.CancelledError):
+                future.cancel()
+            else:
+                future.set_exception(e)
+            raise
+        finally:
+            self._inflight.pop(key, None)
+
+        if not (isinstance(result, dict) and "error" in result):
+            self._cache.set(key, result)
+        future.set_result(result)
+        return result, False
+
+    def clear(self) -> None:
+        self._cache.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            **self._cache.get_stats(),
+            "in_flight": len(self._inflight),
+            "shared_in_flight": self.shared
+        }
@@ -0,0 +1,180 @@
+import math
+import time
+import warnings
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .config import config_manager
+
+# Columns kept in memory for each monitoring series
+RECENT_METRIC_COLUMNS: List[str] = [
+    "cpu_percent",
+    "memory_percent",
+    "disk_percent",
+    "network_bytes_sent",
+    "network_bytes_recv",
+    "network_rx_bytes_per_sec",
+    "network_tx_bytes_per_sec"
+]
+
+DEFAULT_PERCENTILES: Tuple[int, ...] = (50, 95, 99)
+
+def _to_epoch(timestamp: datetime) -> float:
+    # Timestamps throughout the app are naive UTC
+    return timestamp.replace(tzinfo=timezone.utc).timestamp()
+
+def _clean(values: np.ndarray) -> List[Optional[float]]:
+    """NaN-free list for JSON responses."""
+    return [None if math.isnan(value) else float(value) for value in values]
+
+class RingBuffer:
+    """Fixed-capacity columnar buffer of timestamped float samples.
+
+    Appends overwrite the oldest row in O(1); window queries are vectorized
+    over the retained rows. Missing values are stored as NaN.
+    """
+
+    def __init__(self, capacity: int, columns: Sequence[str]):
+        self.capacity = capacity
+        self.columns = list(columns)
+        self._column_index = {name: index for index, name in enumerate(self.columns)}
+        self._timestamps = np.full(capacity, np.nan)
+        self._values = np.full((capacity, len(self.columns)), np.nan)
+        self._next = 0
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def append(self, timestamp: float, values: Dict[str, Optional[float]]) -> None:
+        """Add one sample at epoch seconds ``timestamp``; unknown columns are ignored."""
+        row = self._values[self._next]
+        row.fill(np.nan)
+        for name, value in values.items():
+            index = self._column_index.get(name)
+            if index is not None and value is not None:
+                row[index] = value
+        self._timestamps[self._next] = timestamp
+        self._next = (self._next + 1) % self.capacity
+        self._size = min(self._size + 1, self.capacity)
+
+    def window(self, seconds: float, now: Optional[float] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """Timestamps and values of samples from the last ``seconds``, oldest first."""
+        if self._size < self.capacity:
+            timestamps, values = self._timestamps[:self._size], self._values[:self._size]
+        else:
+            order = np.roll(np.arange(self.capacity), -self._next)
+            timestamps, values = self._timestamps[order], self._values[order]
+        mask = timestamps >= (time.time() if now is None else now) - seconds
+        return timestamps[mask], values[mask]
+
+    def aggregate(
+        self,
+        seconds: float,
+        percentiles: Iterable[int] = DEFAULT_PERCENTILES,
+        now: Optional[float] = None
+    ) -> Dict[str, Dict[str, Optional[float]]]:
+        """Per-column count, mean, min, max, percentiles and rate of change (per second)."""
+        timestamps, values = self.window(seconds, now)
+        percentiles = list(percentiles)
+        valid = ~np.isnan(values)
+        counts = valid.sum(axis=0)
+
+        if len(timestamps):
+            with warnings.catch_warnings():
+                # All-NaN columns yield NaN, reported as None
+                warnings.simplefilter("ignore", RuntimeWarning)
+                means = np.nanmean(values, axis=0)
+                minimums = np.nanmin(values, axis=0)
+                maximums = np.nanmax(values, axis=0)
+                quantiles = np.nanpercentile(values, percentiles, axis=0) if percentiles else np.empty((0, len(self.columns)))
+
+            # Rate between the first and last non-missing sample of each column
+            columns = np.arange(len(self.columns))
+            first = valid.argmax(axis=0)
+            last = len(timestamps) - 1 - valid[::-1].argmax(axis=0)
+            elapsed = timestamps[last] - timestamps[first]
+            with np.errstate(divide="ignore", invalid="ignore"):
+                rates = np.where(
+                    (counts >= 2) & (elapsed > 0),
+                    (values[last, columns] - values[first, columns]) / elapsed,
+                    np.nan
+                )
+        else:
+            empty = np.full(len(self.columns), np.nan)
+            means = minimums = maximums = rates = empty
+            quantiles = np.full((len(percentiles), len(self.columns)), np.nan)
+
+        stats = {
+            "mean": _clean(means),
+            "min": _clean(minimums),
+            "max": _clean(maximums),
+            "rate": _clean(rates),
+            **{f"p{p}": _clean(row) for p, row in zip(percentiles, quantiles)}
+        }
+        return {
+            name: {"count": int(counts[index]), **{key: column[index] for key, column in stats.items()}}
+            for index, name in enumerate(self.columns)
+        }
+
+class RecentMetrics:
+    """One ring buffer per monitoring series, serving recent-window views from memory."""
+
+    def __init__(self, capacity: Optional[int] = None, columns: Sequence[str] = RECENT_METRIC_COLUMNS):
+        self.capacity = capacity or config_manager.RECENT_METRICS_CAPACITY
+        self.columns = list(columns)
+        self._buffers: Dict[str, RingBuffer] = {}
+
+    def record(self, series: str, timestamp: datetime, values: Dict[str, Optional[float]]) -> None:
+        buffer = self._buffers.get(series)
+        if buffer is None:
+            buffer = self._buffers[series] = RingBuffer(self.capacity, self.columns)
+        buffer.append(_to_epoch(timestamp), values)
+
+    def series_names(self) -> List[str]:
+        return sorted(self._buffers)
+
+    def query(
+        self,
+        seconds: float,
+        series: Optional[str] = None,
+        max_points: Optional[int] = None,
+        percentiles: Iterable[int] = DEFAULT_PERCENTILES
+    ) -> Dict[str, Any]:
+        """Points and aggregates for the last ``seconds`` of one or every series.
+
+        Raises KeyError for an unknown series. Points are thinned to at most
+        ``max_points``, always keeping the newest sample.
+        """
+        names = [series] if series else self.series_names()
+        now = time.time()
+        result = {}
+        for name in names:
+            buffer = self._buffers[name]
+            timestamps, values = buffer.window(seconds, now)
+            if max_points and len(timestamps) > max_points:
+                step = math.ceil(len(timestamps) / max_points)
+                timestamps, values = timestamps[::-step][::-1], values[::-step][::-1]
+            result[name] = {
+                "points": [
+                    {
+                        "timestamp": datetime.utcfromtimestamp(timestamp).isoformat(),
+                        **dict(zip(buffer.columns, _clean(row)))
+                    }
+                    for timestamp, row in zip(timestamps, values)
+                ],
+                "stats": buffer.aggregate(seconds, percentiles, now)
+            }
+        return {"window": seconds, "series": result}
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "capacity": self.capacity,
+            "columns": self.columns,
+            "series": {name: len(buffer) for name, buffer in self._buffers.items()}
+        }
+
+# Fed by every monitoring agent in the process
+recent_metrics = RecentMetrics()
@@ -0,0 +1,207 @@
+import asyncio
+import heapq
+import itertools
+import logging
+import random
+import time
+from typing import Any, Awaitable, Callable, Dict, Hashable, List, Optional, Set, Tuple
+
+from .config import config_manager
+
+logger = logging.getLogger(__name__)
+
+# How a job that fell behind (e.g. the loop was blocked) is rescheduled:
+#   skip      - drop missed ticks and stay on the original interval grid
+#   coalesce  - run once now and restart the interval from now
+#   catch_up  - run each missed tick back to back, up to SCHEDULER_MAX_CATCH_UP
+MISSED_TICK_POLICIES = ("skip", "coalesce", "catch_up")
+
+class ScheduledJob:
+    """A periodic callback owned by the scheduler."""
+
+    def __init__(
+        self,
+        key: Hashable,
+        interval: float,
+        callback: Callable[[], Awaitable[Any]],
+        jitter: float,
+        policy: str,
+        first_due: float
+    ):
+        if interval <= 0:
+            raise ValueError(f"Interval for {key} must be positive")
+        if policy not in MISSED_TICK_POLICIES:
+            raise ValueError(f"Unknown missed-tick policy: {policy}")
+        self.key = key
+        self.interval = interval
+        self.callback = callback
+        self.jitter = jitter
+        self.policy = policy
+        self.due = first_due
+        self.fire_at = first_due
+        self.cancelled = False
+        self.runs = 0
+        self.missed = 0
+        self.behind = 0
+
+    def _jittered(self, due: float) -> float:
+        """Offset a grid slot by up to +/- jitter * interval."""
+        if not self.jitter:
+            return due
+        return due + random.uniform(-self.jitter, self.jitter) * self.interval
+
+    def advance(self, now: float, max_catch_up: int) -> None:
+        """Move the job to its next slot according to its missed-tick policy."""
+        next_due = self.due + self.interval
+        late_by = now - next_due
+        if late_by >= 0:
+            missed = int(late_by // self.interval) + 1
+            if self.policy == "skip":
+                self.missed += missed
+                next_due += missed * self.interval
+            elif self.policy == "coalesce":
+                self.missed += missed
+                next_due = now + self.interval
+            elif self.behind < max_catch_up:
+                self.behind += 1
+            else:
+                self.missed += missed
+                self.behind = 0
+                next_due = now + self.interval
+        else:
+            self.behind = 0
+        self.due = next_due
+        self.fire_at = max(now, self._jittered(next_due))
+
+class CapabilityScheduler:
+    """Single heap-based timer that runs every agent's periodic work from one task."""
+
+    def __init__(
+        self,
+        jitter: Optional[float] = None,
+        missed_tick_policy: Optional[str] = None,
+        max_catch_up: Optional[int] = None
+    ):
+        self.jitter = config_manager.SCHEDULER_JITTER if jitter is None else jitter
+        self.missed_tick_policy = missed_tick_policy or config_manager.SCHEDULER_MISSED_TICK_POLICY
+        self.max_catch_up = config_manager.SCHEDULER_MAX_CATCH_UP if max_catch_up is None else max_catch_up
+        self._jobs: Dict[Hashable, ScheduledJob] = {}
+        self._heap: List[Tuple[float, int, ScheduledJob]] = []
+        self._sequence = itertools.count()
+        self._running: Set[asyncio.Task] = set()
+        self._loop_task: Optional[asyncio.Task] = None
+        self._wakeup: Optional[asyncio.Event] = None
+
+    def schedule(
+        self,
+        key: Hashable,
+        interval: float,
+        callback: Callable[[], Awaitable[Any]],
+        jitter: Optional[float] = None,
+        policy: Optional[str] = None,
+        initial_delay: Optional[float] = None
+    ) -> ScheduledJob:
+        """Register a periodic callback, replacing any job with the same key.
+
+        Without ``initial_delay`` the first run lands at a random phase within
+        one interval so jobs registered together do not fire in lockstep.
+        """
+        self.unschedule(key)
+        now = time.monotonic()
+        if initial_delay is None:
+            initial_delay = random.uniform(0, interval)
+        job = ScheduledJob(
+            key,
+            interval,
+            callback,
+            self.jitter if jitter is None else jitter,
+            policy or self.missed_tick_policy,
+            now + initial_delay
+        )
+        self._jobs[key] = job
+        self._push(job)
+        self._ensure_started()
+        return job
+
+    def unschedule(self, key: Hashable) -> bool:
+        """Remove a job; its heap entry is discarded lazily when it surfaces."""
+        job = self._jobs.pop(key, None)
+        if job is None:
+            return False
+        job.cancelled = True
+        return True
+
+    def _push(self, job: ScheduledJob) -> None:
+        heapq.heappush(self._heap, (job.fire_at, next(self._sequence), job))
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    def _ensure_started(self) -> None:
+        if self._loop_task is None or self._loop_task.done():
+            self._wakeup = asyncio.Event()
+            self._loop_task = asyncio.create_task(self._run())
+
+    async def _run(self):
+        """Sleep until the earliest job is due, dispatch it and reschedule it."""
+        while True:
+            self._wakeup.clear()
+            while self._heap and self._heap[0][2].cancelled:
+                heapq.heappop(self._heap)
+
+            if not self._heap:
+                await self._wakeup.wait()
+                continue
+
+            delay = self._heap[0][0] - time.monotonic()
+            if delay > 0:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=delay)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            _, _, job = heapq.heappop(self._heap)
+            self._dispatch(job)
+            job.advance(time.monotonic(), self.max_catch_up)
+            self._push(job)
+
+    def _dispatch(self, job: ScheduledJob) -> None:
+        job.runs += 1
+        task = asyncio.create_task(job.callback())
+        self._running.add(task)
+        task.add_done_callback(self._finished)
+
+    def _finished(self, task: asyncio.Task) -> None:
+        self._running.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            logger.error(f"Scheduled job failed: {str(task.exception())}")
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Return job counts and per-job run and missed-tick counters."""
+        now = time.monotonic()
+        return {
+            "jobs": len(self._jobs),
+            "running": len(self._running),
+            "job_stats": {
+                str(key): {
+                    "interval": job.interval,
+                    "policy": job.policy,
+                    "runs": job.runs,
+                    "missed": job.missed,
+                    "next_run_in": round(max(0.0, job.fire_at - now), 3)
+                }
+                for key, job in self._jobs.items()
+            }
+        }
+
+    async def stop(self):
+        """Stop the timer loop and cancel any callbacks still running."""
+        if self._loop_task is not None:
+            self._loop_task.cancel()
+            await asyncio.gather(self._loop_task, return_exceptions=True)
+            self._loop_task = None
+        for task in list(self._running):
+            task.cancel()
+        await asyncio.gather(*self._running, return_exceptions=True)
+        self._jobs.clear()
+        self._heap.clear()
@@ -0,0 +1,208 @@
+import asyncio
+import itertools
+import logging
+import time
+from collections import Counter, defaultdict
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional
+
+from .config import config_manager
+
+logger = logging.getLogger(__name__)
+
+# Lower values are dequeued first; unknown severities are treated as low.
+SEVERITY_PRIORITIES: Dict[str, int] = {
+    "critical": 0,
+    "high": 1,
+    "medium": 2,
+    "low": 3
+}
+
+class QueueFullError(Exception):
+    """Raised when a task queue is at capacity and cannot accept more work."""
+
+class Reservation:
+    """Queue slots held for tasks that will be submitted later.
+
+    Each submit made with the reservation uses one of its slots for that
+    agent type; ``release`` returns whatever was not used.
+    """
+
+    def __init__(self, reserved: Dict[str, int], counts: Dict[str, int]):
+        self._reserved = reserved
+        self.remaining = dict(counts)
+
+    def consume(self, agent_type: str) -> bool:
+        """Use one slot for ``agent_type``; False if none is left."""
+        if self.remaining.get(agent_type, 0) <= 0:
+            return False
+        self.remaining[agent_type] -= 1
+        self._reserved[agent_type] -= 1
+        return True
+
+    def release(self) -> None:
+        for agent_type, count in self.remaining.items():
+            self._reserved[agent_type] -= count
+        self.remaining.clear()
+
+class TaskQueue:
+    """Bounded per-agent-type priority queues drained by a fixed pool of workers.
+
+    Queued tasks and reserved slots together never exceed ``max_depth`` per
+    agent type.
+    """
+
+    def __init__(
+        self,
+        handler: Callable[[Dict], Awaitable[Dict]],
+        workers_per_type: Optional[int] = None,
+        max_depth: Optional[int] = None
+    ):
+        self.handler = handler
+        self.workers_per_type = workers_per_type or config_manager.TASK_QUEUE_WORKERS
+        self.max_depth = max_depth or config_manager.TASK_QUEUE_MAX_DEPTH
+        self._queues: Dict[str, asyncio.PriorityQueue] = {}
+        self._workers: Dict[str, List[asyncio.Task]] = {}
+        self._stats: Dict[str, Dict[str, Any]] = {}
+        self._reserved: Dict[str, int] = defaultdict(int)
+        self._sequence = itertools.count()
+
+    @staticmethod
+    def priority_for(severity: Optional[str]) -> int:
+        """Map an incident severity to a queue priority."""
+        return SEVERITY_PRIORITIES.get(str(severity).lower(), SEVERITY_PRIORITIES["low"])
+
+    def _queue_for(self, agent_type: str) -> asyncio.PriorityQueue:
+        """Get the queue for an agent type, starting its workers on first use."""
+        queue = self._queues.get(agent_type)
+        if queue is None:
+            # Unbounded: capacity, including reserved slots, is enforced on submit
+            queue = asyncio.PriorityQueue()
+            self._queues[agent_type] = queue
+            self._stats[agent_type] = {
+                "submitted": 0,
+                "completed": 0,
+                "failed": 0,
+                "rejected": 0,
+                "cancelled": 0,
+                "max_depth_seen": 0,
+                "wait_ms_total": 0.0,
+                "wait_ms_max": 0.0
+            }
+            self._workers[agent_type] = [
+                asyncio.create_task(self._worker(agent_type, queue))
+                for _ in range(self.workers_per_type)
+            ]
+            logger.info(f"Started {self.workers_per_type} workers for {agent_type} task queue")
+        return queue
+
+    def _free_slots(self, agent_type: str) -> int:
+        return self.max_depth - self._queue_for(agent_type).qsize() - self._reserved[agent_type]
+
+    def reserve(self, agent_types: Iterable[str]) -> Reservation:
+        """Hold one slot per entry of ``agent_types``, all or none.
+
+        Raises QueueFullError if any queue lacks room. Nothing is awaited,
+        so no other submit can take the slots between check and hold.
+        """
+        counts = Counter(agent_types)
+        for agent_type, count in counts.items():
+            if self._free_slots(agent_type) < count:
+                self._stats[agent_type]["rejected"] += 1
+                raise QueueFullError(f"Task queue for {agent_type} agents is full ({self.max_depth} pending)")
+        for agent_type, count in counts.items():
+            self._reserved[agent_type] += count
+        return Reservation(self._reserved, counts)
+
+    async def submit(
+        self,
+        task: Dict,
+        priority: Optional[int] = None,
+        reservation: Optional[Reservation] = None
+    ) -> Dict:
+        """Queue a task and wait for its result, using a reserved slot if one is left."""
+        agent_type = task.get("agent_type")
+        queue = self._queue_for(agent_type)
+        stats = self._stats[agent_type]
+        if priority is None:
+            priority = self.priority_for(task.get("severity"))
+
+        if not (reservation and reservation.consume(agent_type)) and self._free_slots(agent_type) <= 0:
+            stats["rejected"] += 1
+            raise QueueFullError(f"Task queue for {agent_type} agents is full ({self.max_depth} pending)")
+
+        future = asyncio.get_running_loop().create_future()
+        queue.put_nowait((priority, next(self._sequence), time.perf_counter(), task, future))
+
+        stats["submitted"] += 1
+        stats["max_depth_seen"] = max(stats["max_depth_seen"], queue.qsize())
+        return await future
+
+    async def _worker(self, agent_type: str, queue: asyncio.PriorityQueue):
+        """Pull tasks in priority order and resolve their futures."""
+        stats = self._stats[agent_type]
+        while True:
+            _, _, enqueued_at, task, future = await queue.get()
+            try:
+                if future.cancelled():
+                    stats["cancelled"] += 1
+                    continue
+
+                wait_ms = (time.perf_counter() - enqueued_at) * 1000
+                stats["wait_ms_total"] += wait_ms
+                stats["wait_ms_max"] = max(stats["wait_ms_max"], wait_ms)
+
+                try:
+                    result = await self.handler(task)
+                except asyncio.CancelledError:
+                    future.cancel()
+                    raise
+                except Exception as e:
+                    stats["failed"] += 1
+                    if not future.done():
+                        future.set_exception(e)
+                else:
+                    stats["completed"] += 1
+                    if not future.done():
+                        future.set_result(result)
+            finally:
+                queue.task_done()
+
+    def get_stats(self) -> Dict[str, Dict[str, Any]]:
+        """Return queue depth and wait-time statistics per agent type."""
+        stats = {}
+        for agent_type, queue in self._queues.items():
+            counters = self._stats[agent_type]
+            dequeued = counters["completed"] + counters["failed"]
+            stats[agent_type] = {
+                "depth": queue.qsize(),
+                "reserved": self._reserved[agent_type],
+                "max_depth": self.max_depth,
+                "workers": len(self._workers.get(agent_type, [])),
+                "submitted": counters["submitted"],
+                "completed": counters["completed"],
+                "failed": counters["failed"],
+                "rejected": counters["rejected"],
+                "cancelled": counters["cancelled"],
+                "max_depth_seen": counters["max_depth_seen"],
+                "avg_wait_ms": round(counters["wait_ms_total"] / dequeued, 3) if dequeued else 0.0,
+                "max_wait_ms": round(counters["wait_ms_max"], 3)
+            }
+        return stats
+
+    async def stop(self):
+        """Cancel all workers and any tasks still waiting in the queues."""
+        for workers in self._workers.values():
+            for worker in workers:
+                worker.cancel()
+        for workers in self._workers.values():
+            await asyncio.gather(*workers, return_exceptions=True)
+
+        for queue in self._queues.values():
+            while not queue.empty():
+                _, _, _, _, future = queue.get_nowait()
+                future.cancel()
+
+        self._queues.clear()
+        self._workers.clear()
+        self._stats.clear()
+        self._reserved.clear()
@@ -2,6 +2,9 @@ from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
 from .core.database import db_manager
+from .core.entity_cache import entity_cache
+from .core.metrics_buffer import metrics_buffer
+from .core.metrics_store import metrics_store
 from .core.logging_config import setup_logging
 from .api.v1.api import api_router
 import logging
@@ -21,6 +24,7 @@ async def lifespan(app: FastAPI):
         logger.info("Starting up KRAKEN-FLUX application...")
         await db_manager.initialize()
         logger.info("Database initialized successfully")
+        metrics_store.start()
         yield
     except Exception as e:
         logger.error(f"Error during startup: {str(e)}")
@@ -29,6 +33,10 @@ async def lifespan(app: FastAPI):
         # Shutdown
         try:
             logger.info("Shutting down KRAKEN-FLUX application...")
+            await metrics_store.stop()
+            await metrics_buffer.stop()
+            logger.info("Buffered metrics flushed")
+            await entity_cache.close()
             await db_manager.close()
             logger.info("Database connection closed successfully")
         except Exception as e:
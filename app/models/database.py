@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, JSON, ForeignKey, Boolean, Float, Text
+from sqlalchemy import Column, Integer, String, DateTime, JSON, ForeignKey, Boolean, Float, Text, Index, UniqueConstraint
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import relationship
 from datetime import datetime
@@ -9,6 +9,14 @@ Base = declarative_base()
 class Incident(Base):
     """Model for security incidents."""
     __tablename__ = "incidents"
+    __table_args__ = (
+        # Newest-first listing and keyset pagination, alone or filtered
+        Index("ix_incidents_timestamp_id", "timestamp", "id"),
+        Index("ix_incidents_status_timestamp", "status", "timestamp"),
+        Index("ix_incidents_severity_timestamp", "severity", "timestamp"),
+        # Duplicate alert coalescing lookups
+        Index("ix_incidents_fingerprint_last_seen_at", "fingerprint", "last_seen_at"),
+    )
     
     id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
     timestamp = Column(DateTime, default=datetime.utcnow)
@@ -21,6 +29,9 @@ class Incident(Base):
     evidence_ids = Column(JSON, default=list)
     containment_status = Column(String)
     resolution_status = Column(String)
+    fingerprint = Column(String)  # hash of the fields used to coalesce duplicate alerts
+    duplicate_count = Column(Integer, default=0)
+    last_seen_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
     # Relationships
@@ -33,7 +44,7 @@ class ThreatAssessment(Base):
     __tablename__ = "threat_assessments"
     
     id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
-    incident_id = Column(String, ForeignKey("incidents.id"))
+    incident_id = Column(String, ForeignKey("incidents.id"), index=True)
     timestamp = Column(DateTime, default=datetime.utcnow)
     threat_level = Column(String, nullable=False)
     confidence_score = Column(Float)
@@ -47,11 +58,15 @@ class ThreatAssessment(Base):
 class Evidence(Base):
     """Model for forensic evidence."""
     __tablename__ = "evidence"
+    __table_args__ = (
+        Index("ix_evidence_timestamp_id", "timestamp", "id"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     timestamp = Column(DateTime, default=datetime.utcnow)
     source = Column(String)
     evidence_type = Column(String)
+    incident_id = Column(String, ForeignKey("incidents.id"), index=True)
     severity = Column(String)
     evidence_data = Column(JSON)  # Renamed from evidence_metadata
     agent_id = Column(Integer, ForeignKey("agents.id"))
@@ -67,7 +82,7 @@ class Action(Base):
     __tablename__ = "actions"
     
     id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
-    incident_id = Column(String, ForeignKey("incidents.id"))
+    incident_id = Column(String, ForeignKey("incidents.id"), index=True)
     timestamp = Column(DateTime, default=datetime.utcnow)
     action_type = Column(String, nullable=False)
     status = Column(String, nullable=False)
@@ -94,23 +109,68 @@ class ComplianceRecord(Base):
 class SystemMetrics(Base):
     """Model for system performance metrics."""
     __tablename__ = "system_metrics"
+    __table_args__ = (
+        Index("ix_system_metrics_timestamp_id", "timestamp", "id"),
+        # Threshold scans for exfiltration-style traffic over a time range
+        Index("ix_system_metrics_network_rx_timestamp", "network_rx_bytes_per_sec", "timestamp"),
+        Index("ix_system_metrics_network_tx_timestamp", "network_tx_bytes_per_sec", "timestamp"),
+    )
+    # On PostgreSQL the table is range-partitioned by day on timestamp (see
+    # core/partitions.py), with (id, timestamp) as its primary key
     
     id = Column(Integer, primary_key=True, index=True)
     timestamp = Column(DateTime, default=datetime.utcnow)
     cpu_usage = Column(Float)
     memory_usage = Column(Float)
     disk_usage = Column(Float)
-    network_usage = Column(Float)
+    network_usage = Column(Float)  # rx + tx bytes/s over non-loopback interfaces
+    network_rx_bytes_per_sec = Column(Float)
+    network_tx_bytes_per_sec = Column(Float)
+    network_rx_packets_per_sec = Column(Float)
+    network_tx_packets_per_sec = Column(Float)
+    disk_read_bytes_per_sec = Column(Float)
+    disk_write_bytes_per_sec = Column(Float)
+    disk_read_iops = Column(Float)
+    disk_write_iops = Column(Float)
     metrics_data = Column(JSON)  # Renamed from metrics_metadata
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
+class MetricsRollup(Base):
+    """Model for downsampled system metrics (one row per resolution and bucket)."""
+    __tablename__ = "metrics_rollups"
+    __table_args__ = (
+        UniqueConstraint("resolution", "bucket_start", name="uq_metrics_rollups_resolution_bucket"),
+    )
+    
+    id = Column(Integer, primary_key=True)
+    resolution = Column(String, nullable=False)  # "1m", "1h" or "1d"
+    bucket_start = Column(DateTime, nullable=False)
+    samples = Column(Integer, nullable=False)
+    cpu_min = Column(Float)
+    cpu_max = Column(Float)
+    cpu_avg = Column(Float)
+    cpu_p95 = Column(Float)
+    memory_min = Column(Float)
+    memory_max = Column(Float)
+    memory_avg = Column(Float)
+    memory_p95 = Column(Float)
+    disk_min = Column(Float)
+    disk_max = Column(Float)
+    disk_avg = Column(Float)
+    disk_p95 = Column(Float)
+    network_min = Column(Float)
+    network_max = Column(Float)
+    network_avg = Column(Float)
+    network_p95 = Column(Float)
+    created_at = Column(DateTime, default=datetime.utcnow)
+
 class AgentStatus(Base):
     """Model for agent status tracking."""
     __tablename__ = "agent_status"
     
     id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
-    agent_id = Column(String, nullable=False)
+    agent_id = Column(String, nullable=False, unique=True)  # one row per agent, upserted
     agent_type = Column(String, nullable=False)
     timestamp = Column(DateTime, default=datetime.utcnow)
     status = Column(String, nullable=False)
@@ -133,6 +193,9 @@ class SimulationResult(Base):
 class Agent(Base):
     """Agent model for storing agent information."""
     __tablename__ = "agents"
+    __table_args__ = (
+        Index("ix_agents_created_at_id", "created_at", "id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String, unique=True, index=True)
@@ -1,7 +1,14 @@
 from pydantic import BaseModel
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, Generic, List, TypeVar
 from datetime import datetime
 
+T = TypeVar("T")
+
+class Page(BaseModel, Generic[T]):
+    """One page of a keyset-paginated listing."""
+    items: List[T]
+    next_cursor: Optional[str] = None
+
 # Agent schemas
 class AgentBase(BaseModel):
     """Base Pydantic model for Agent."""
@@ -37,7 +44,20 @@ class EvidenceBase(BaseModel):
 
 class EvidenceCreate(EvidenceBase):
     """Pydantic model for creating Evidence."""
-    pass
+    incident_id: Optional[str] = None
+
+class EvidenceIngest(BaseModel):
+    """Pydantic model for one row of a bulk evidence ingest."""
+    timestamp: Optional[datetime] = None
+    source: Optional[str] = None
+    evidence_type: Optional[str] = None
+    severity: Optional[str] = None
+    evidence_data: Optional[Dict[str, Any]] = None
+    agent_id: Optional[int] = None
+    incident_id: Optional[str] = None
+
+    class Config:
+        extra = "forbid"
 
 class Evidence(EvidenceBase):
     """Pydantic model for Evidence responses."""
@@ -60,10 +80,104 @@ class SystemMetricsCreate(SystemMetricsBase):
     """Pydantic model for creating SystemMetrics."""
     pass
 
+class SystemMetricsIngest(BaseModel):
+    """Pydantic model for one row of a bulk metrics ingest."""
+    timestamp: Optional[datetime] = None
+    cpu_usage: Optional[float] = None
+    memory_usage: Optional[float] = None
+    disk_usage: Optional[float] = None
+    network_usage: Optional[float] = None
+    network_rx_bytes_per_sec: Optional[float] = None
+    network_tx_bytes_per_sec: Optional[float] = None
+    network_rx_packets_per_sec: Optional[float] = None
+    network_tx_packets_per_sec: Optional[float] = None
+    disk_read_bytes_per_sec: Optional[float] = None
+    disk_write_bytes_per_sec: Optional[float] = None
+    disk_read_iops: Optional[float] = None
+    disk_write_iops: Optional[float] = None
+    metrics_data: Optional[Dict[str, Any]] = None
+
+    class Config:
+        extra = "forbid"
+
 class SystemMetrics(SystemMetricsBase):
     """Pydantic model for SystemMetrics responses."""
     id: int
     created_at: datetime
 
     class Config:
-        orm_mode = True 
\ No newline at end of file
+        orm_mode = True
+
+# Incident schemas
+class IncidentSummary(BaseModel):
+    """Pydantic model for Incident list entries."""
+    id: str
+    timestamp: datetime
+    incident_type: str
+    severity: str
+    status: str
+    description: Optional[str] = None
+    source_ip: Optional[str] = None
+    target_systems: Optional[List[Any]] = None
+    containment_status: Optional[str] = None
+    resolution_status: Optional[str] = None
+    duplicate_count: Optional[int] = None
+    last_seen_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
+
+    class Config:
+        orm_mode = True
+
+class IncidentAssessment(BaseModel):
+    """Pydantic model for an incident's threat assessments."""
+    id: str
+    timestamp: datetime
+    threat_level: str
+    confidence_score: Optional[float] = None
+    attack_vector: Optional[str] = None
+    impact_analysis: Optional[Any] = None
+    recommendations: Optional[Any] = None
+
+    class Config:
+        orm_mode = True
+
+class IncidentEvidence(BaseModel):
+    """Pydantic model for an incident's evidence entries."""
+    id: int
+    timestamp: datetime
+    source: Optional[str] = None
+    evidence_type: Optional[str] = None
+    severity: Optional[str] = None
+    evidence_data: Optional[Dict[str, Any]] = None
+    agent_id: Optional[int] = None
+
+    class Config:
+        orm_mode = True
+
+class IncidentAction(BaseModel):
+    """Pydantic model for an incident's response actions."""
+    id: str
+    timestamp: datetime
+    action_type: str
+    status: str
+    agent_id: Optional[str] = None
+    parameters: Optional[Dict[str, Any]] = None
+    result: Optional[Dict[str, Any]] = None
+
+    class Config:
+        orm_mode = True
+
+class IncidentDetail(BaseModel):
+    """Pydantic model for an Incident with its related records."""
+    incident: IncidentSummary
+    assessments: List[IncidentAssessment]
+    evidence: List[IncidentEvidence]
+    actions: List[IncidentAction]
+
+class IngestResult(BaseModel):
+    """Pydantic model for the outcome of a bulk ingest request."""
+    received: int
+    accepted: int
+    rejected: int
+    errors: List[Dict[str, Any]]
+
@@ -0,0 +1,185 @@
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+import uuid
+from datetime import datetime, timedelta
+from pathlib import Path
+
+# Add the parent directory to Python path
+sys.path.append(str(Path(__file__).parent.parent.parent))
+
+from sqlalchemy import create_engine, insert, select, text, tuple_
+
+from app.models.database import Action, Base, Evidence, Incident, SystemMetrics, ThreatAssessment
+
+SEVERITIES = ["low", "medium", "high", "critical"]
+STATUSES = ["new", "investigating", "contained", "resolved", "closed"]
+
+def secondary_indexes():
+    """Every explicit index declared on the models (primary key constraints aside)."""
+    return [index for table in Base.metadata.sorted_tables for index in table.indexes]
+
+def seed(engine, incidents: int, children: int, metrics: int, batch: int = 5000):
+    """Insert a synthetic dataset spread over the last 90 days."""
+    rng = random.Random(42)
+    now = datetime.utcnow()
+    incident_ids = []
+
+    def chunks(rows):
+        for start in range(0, len(rows), batch):
+            yield rows[start:start + batch]
+
+    with engine.begin() as conn:
+        rows = []
+        for _ in range(incidents):
+            incident_id = str(uuid.uuid4())
+            incident_ids.append(incident_id)
+            timestamp = now - timedelta(seconds=rng.randint(0, 90 * 86400))
+            rows.append({
+                "id": incident_id,
+                "timestamp": timestamp,
+                "incident_type": rng.choice(["intrusion", "malware", "dos", "exfiltration"]),
+                "severity": rng.choice(SEVERITIES),
+                "status": rng.choice(STATUSES),
+                "description": "synthetic incident",
+                "fingerprint": uuid.uuid4().hex,
+                "last_seen_at": timestamp
+            })
+        for chunk in chunks(rows):
+            conn.execute(insert(Incident), chunk)
+
+        for model, extra in (
+            (ThreatAssessment, {"threat_level": "high"}),
+            (Action, {"action_type": "contain", "status": "completed"}),
+            (Evidence, {"evidence_type": "log", "severity": "low"})
+        ):
+            rows = [
+                {"incident_id": rng.choice(incident_ids), "timestamp": now, **extra}
+                for _ in range(incidents * children)
+            ]
+            if model is not Evidence:
+                for row in rows:
+                    row["id"] = str(uuid.uuid4())
+            for chunk in chunks(rows):
+                conn.execute(insert(model), chunk)
+
+        rows = [
+            {"timestamp": now - timedelta(seconds=i), "cpu_usage": rng.random() * 100}
+            for i in range(metrics)
+        ]
+        for chunk in chunks(rows):
+            conn.execute(insert(SystemMetrics), chunk)
+
+    return incident_ids
+
+def build_queries(engine, incident_ids):
+    """The access patterns of the incidents and list APIs, as (name, statement)."""
+    rng = random.Random(7)
+    probe_ids = rng.sample(incident_ids, min(50, len(incident_ids)))
+    week_ago = datetime.utcnow() - timedelta(days=7)
+    with engine.connect() as conn:
+        # A keyset position a few pages into the metrics table
+        cursor = conn.execute(
+            select(SystemMetrics.timestamp, SystemMetrics.id)
+            .order_by(SystemMetrics.timestamp.desc(), SystemMetrics.id.desc())
+            .offset(5000).limit(1)
+        ).first()
+
+    queries = [
+        ("list_incidents newest page", lambda: [
+            select(Incident).order_by(Incident.timestamp.desc(), Incident.id.desc()).limit(100)
+        ]),
+        ("list_incidents status filter", lambda: [
+            select(Incident).filter(Incident.status == "investigating")
+            .order_by(Incident.timestamp.desc(), Incident.id.desc()).limit(100)
+        ]),
+        ("list_incidents severity + last 7 days", lambda: [
+            select(Incident).filter(Incident.severity == "critical", Incident.timestamp >= week_ago)
+            .order_by(Incident.timestamp.desc(), Incident.id.desc()).limit(100)
+        ]),
+        ("get_incident children (50 incidents)", lambda: [
+            select(model).filter(model.incident_id == incident_id)
+            for incident_id in probe_ids
+            for model in (ThreatAssessment, Evidence, Action)
+        ]),
+    ]
+    if cursor is not None:
+        queries.append(("list_metrics deep keyset page", lambda: [
+            select(SystemMetrics)
+            .filter(tuple_(SystemMetrics.timestamp, SystemMetrics.id) < tuple_(*cursor))
+            .order_by(SystemMetrics.timestamp.desc(), SystemMetrics.id.desc()).limit(100)
+        ]))
+    return queries
+
+def time_queries(engine, queries, repeat: int):
+    """Median wall time (ms) of each query group."""
+    timings = {}
+    with engine.connect() as conn:
+        for name, build in queries:
+            samples = []
+            for _ in range(repeat):
+                statements = build()
+                started = time.perf_counter()
+                for statement in statements:
+                    conn.execute(statement).fetchall()
+                samples.append((time.perf_counter() - started) * 1000)
+            timings[name] = statistics.median(samples)
+    return timings
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare query times with and without secondary indexes.")
+    parser.add_argument("--database-url", help="defaults to a throwaway SQLite file; the schema is dropped first")
+    parser.add_argument("--incidents", type=int, default=100_000)
+    parser.add_argument("--children", type=int, default=2, help="assessments/evidence/actions per incident")
+    parser.add_argument("--metrics", type=int, default=500_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    tmpdir = None
+    url = args.database_url
+    if url is None:
+        tmpdir = tempfile.mkdtemp()
+        url = f"sqlite:///{os.path.join(tmpdir, 'benchmark.db')}"
+    engine = create_engine(url)
+
+    Base.metadata.drop_all(engine)
+    Base.metadata.create_all(engine)
+    indexes = secondary_indexes()
+    with engine.begin() as conn:
+        for index in indexes:
+            index.drop(conn)
+
+    print(f"Seeding {args.incidents} incidents, {args.incidents * args.children * 3} child rows, "
+          f"{args.metrics} metrics...")
+    started = time.perf_counter()
+    incident_ids = seed(engine, args.incidents, args.children, args.metrics)
+    print(f"Seeded in {time.perf_counter() - started:.1f}s")
+
+    queries = build_queries(engine, incident_ids)
+    before = time_queries(engine, queries, args.repeat)
+
+    started = time.perf_counter()
+    with engine.begin() as conn:
+        for index in indexes:
+            index.create(conn)
+        conn.execute(text("ANALYZE"))
+    print(f"Created {len(indexes)} indexes in {time.perf_counter() - started:.1f}s\n")
+    after = time_queries(engine, queries, args.repeat)
+
+    width = max(len(name) for name in before)
+    print(f"{'query':<{width}}  {'before ms':>10}  {'after ms':>10}  {'speedup':>8}")
+    for name in before:
+        speedup = before[name] / after[name] if after[name] else float("inf")
+        print(f"{name:<{width}}  {before[name]:>10.2f}  {after[name]:>10.2f}  {speedup:>7.1f}x")
+
+    engine.dispose()
+    if tmpdir is not None:
+        Path(url[len("sqlite:///"):]).unlink()
+        os.rmdir(tmpdir)
+
+if __name__ == "__main__":
+    main()
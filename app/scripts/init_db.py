@@ -1,3 +1,4 @@
+import asyncio
 import sys
 import os
 from pathlib import Path
@@ -6,19 +7,19 @@ from pathlib import Path
 sys.path.append(str(Path(__file__).parent.parent.parent))
 
 from app.core.database import db_manager
-from app.models.database import Base
 from app.core.config import config_manager
 
-def init_database():
+async def init_database():
     """Initialize the database with required tables and initial data."""
     print("Initializing database...")
     
     # Create all tables
-    Base.metadata.create_all(bind=db_manager.engine)
+    await db_manager.initialize()
     print("Database tables created successfully.")
     
     # Add any initial data here if needed
+    await db_manager.close()
     print("Database initialization completed.")
 
 if __name__ == "__main__":
-    init_database() 
\ No newline at end of file
+    asyncio.run(init_database()) 
\ No newline at end of file
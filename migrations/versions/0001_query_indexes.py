@@ -0,0 +1,95 @@
+"""Secondary indexes for incident listing, child lookups and keyset paging
+
+Tables are created by ``Base.metadata.create_all`` at startup, which already
+includes these indexes on a fresh database; this revision brings existing
+databases up to date and skips anything that is already present. Columns
+an index needs that older databases lack are added (and backfilled) first,
+including the incident coalescing columns.
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-17
+"""
+from alembic import context, op
+import sqlalchemy as sa
+
+revision = "0001"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+# (table, index name, columns)
+INDEXES = [
+    ("incidents", "ix_incidents_timestamp_id", ["timestamp", "id"]),
+    ("incidents", "ix_incidents_status_timestamp", ["status", "timestamp"]),
+    ("incidents", "ix_incidents_severity_timestamp", ["severity", "timestamp"]),
+    ("incidents", "ix_incidents_fingerprint_last_seen_at", ["fingerprint", "last_seen_at"]),
+    ("threat_assessments", "ix_threat_assessments_incident_id", ["incident_id"]),
+    ("actions", "ix_actions_incident_id", ["incident_id"]),
+    ("evidence", "ix_evidence_incident_id", ["incident_id"]),
+    ("evidence", "ix_evidence_timestamp_id", ["timestamp", "id"]),
+    ("system_metrics", "ix_system_metrics_timestamp_id", ["timestamp", "id"]),
+    ("agents", "ix_agents_created_at_id", ["created_at", "id"]),
+]
+
+# Incident columns used by duplicate alert coalescing (IncidentCoalescer)
+INCIDENT_COLUMNS = [
+    ("fingerprint", sa.String()),
+    ("duplicate_count", sa.Integer()),
+    ("last_seen_at", sa.DateTime()),
+]
+
+def _schema():
+    """Return (tables, columns_of, indexes_of); offline (--sql) mode assumes the old schema."""
+    if context.is_offline_mode():
+        tables = {table for table, _, _ in INDEXES}
+        return tables, lambda table: set(), lambda table: set()
+    inspector = sa.inspect(op.get_bind())
+    return (
+        set(inspector.get_table_names()),
+        lambda table: {c["name"] for c in inspector.get_columns(table)},
+        lambda table: {i["name"] for i in inspector.get_indexes(table)}
+    )
+
+def upgrade() -> None:
+    tables, columns_of, indexes_of = _schema()
+
+    # get_incident filters evidence by incident, but the column never existed
+    if "evidence" in tables and "incident_id" not in columns_of("evidence"):
+        with op.batch_alter_table("evidence") as batch:
+            batch.add_column(sa.Column("incident_id", sa.String(), nullable=True))
+            batch.create_foreign_key("fk_evidence_incident_id", "incidents", ["incident_id"], ["id"])
+
+    if "incidents" in tables:
+        existing = columns_of("incidents")
+        missing = [(name, type_) for name, type_ in INCIDENT_COLUMNS if name not in existing]
+        if missing:
+            with op.batch_alter_table("incidents") as batch:
+                for name, type_ in missing:
+                    batch.add_column(sa.Column(name, type_, nullable=True))
+            # Existing incidents start with no duplicates, last seen when raised
+            op.execute("UPDATE incidents SET duplicate_count = 0 WHERE duplicate_count IS NULL")
+            op.execute("UPDATE incidents SET last_seen_at = timestamp WHERE last_seen_at IS NULL")
+
+    for table, name, columns in INDEXES:
+        if table in tables and name not in indexes_of(table):
+            op.create_index(name, table, columns)
+
+def downgrade() -> None:
+    tables, columns_of, indexes_of = _schema()
+
+    for table, name, _ in reversed(INDEXES):
+        if table in tables and (context.is_offline_mode() or name in indexes_of(table)):
+            op.drop_index(name, table_name=table)
+
+    if "incidents" in tables:
+        existing = {name for name, _ in INCIDENT_COLUMNS} if context.is_offline_mode() else columns_of("incidents")
+        with op.batch_alter_table("incidents") as batch:
+            for name, _ in reversed(INCIDENT_COLUMNS):
+                if name in existing:
+                    batch.drop_column(name)
+
+    if "evidence" in tables and (context.is_offline_mode() or "incident_id" in columns_of("evidence")):
+        # Dropping the column takes its foreign key with it
+        with op.batch_alter_table("evidence") as batch:
+            batch.drop_column("incident_id")
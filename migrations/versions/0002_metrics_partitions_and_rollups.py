@@ -0,0 +1,124 @@
+"""Partition system_metrics by day on PostgreSQL and add metrics_rollups
+
+On PostgreSQL the existing system_metrics table becomes the first partition
+(MINVALUE up to the day after its newest row) of a new range-partitioned
+parent, so no rows are copied; daily partitions and a DEFAULT partition
+follow. Other databases keep the plain table and only gain metrics_rollups.
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-17
+"""
+from datetime import datetime, timedelta
+
+from alembic import context, op
+import sqlalchemy as sa
+
+revision = "0002"
+down_revision = "0001"
+branch_labels = None
+depends_on = None
+
+# Daily partitions created ahead of the first maintenance pass
+PREMAKE_DAYS = 3
+
+def _is_postgresql() -> bool:
+    return op.get_context().dialect.name == "postgresql"
+
+def _is_partitioned() -> bool:
+    if context.is_offline_mode():
+        return False
+    return op.get_bind().execute(sa.text(
+        "SELECT 1 FROM pg_class WHERE relname = 'system_metrics' AND relkind = 'p'"
+    )).first() is not None
+
+def _has_table(name: str) -> bool:
+    if context.is_offline_mode():
+        return False
+    return sa.inspect(op.get_bind()).has_table(name)
+
+def upgrade() -> None:
+    if not _has_table("metrics_rollups"):
+        columns = [
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("resolution", sa.String(), nullable=False),
+            sa.Column("bucket_start", sa.DateTime(), nullable=False),
+            sa.Column("samples", sa.Integer(), nullable=False),
+        ]
+        for prefix in ("cpu", "memory", "disk", "network"):
+            for stat in ("min", "max", "avg", "p95"):
+                columns.append(sa.Column(f"{prefix}_{stat}", sa.Float()))
+        columns.append(sa.Column("created_at", sa.DateTime()))
+        op.create_table(
+            "metrics_rollups",
+            *columns,
+            sa.UniqueConstraint("resolution", "bucket_start", name="uq_metrics_rollups_resolution_bucket")
+        )
+
+    if not _is_postgresql() or _is_partitioned():
+        return
+
+    # The legacy partition must cover every existing row, including any
+    # stamped in the future by a skewed clock
+    legacy_end = datetime.utcnow().date() + timedelta(days=1)
+    if not context.is_offline_mode():
+        latest = op.get_bind().execute(sa.text("SELECT max(timestamp) FROM system_metrics")).scalar()
+        if latest is not None:
+            legacy_end = max(legacy_end, latest.date() + timedelta(days=1))
+
+    # The current table becomes the legacy partition
+    op.execute("ALTER TABLE system_metrics RENAME TO system_metrics_legacy")
+    op.execute("ALTER INDEX IF EXISTS ix_system_metrics_id RENAME TO ix_system_metrics_legacy_id")
+    op.execute("ALTER INDEX IF EXISTS ix_system_metrics_timestamp_id RENAME TO ix_system_metrics_legacy_timestamp_id")
+    op.execute("UPDATE system_metrics_legacy SET timestamp = COALESCE(created_at, now()) WHERE timestamp IS NULL")
+    op.execute("ALTER TABLE system_metrics_legacy ALTER COLUMN timestamp SET NOT NULL")
+    # A partition's primary key has to match the parent's (id, timestamp)
+    op.execute("ALTER TABLE system_metrics_legacy DROP CONSTRAINT system_metrics_pkey")
+    op.execute("ALTER TABLE system_metrics_legacy ADD CONSTRAINT system_metrics_legacy_pkey PRIMARY KEY (id, timestamp)")
+
+    # The partition key must be part of the primary key
+    op.execute("""
+        CREATE TABLE system_metrics (
+            id INTEGER NOT NULL DEFAULT nextval('system_metrics_id_seq'),
+            timestamp TIMESTAMP WITHOUT TIME ZONE NOT NULL,
+            cpu_usage FLOAT,
+            memory_usage FLOAT,
+            disk_usage FLOAT,
+            network_usage FLOAT,
+            metrics_data JSON,
+            created_at TIMESTAMP WITHOUT TIME ZONE,
+            updated_at TIMESTAMP WITHOUT TIME ZONE,
+            PRIMARY KEY (id, timestamp)
+        ) PARTITION BY RANGE (timestamp)
+    """)
+    # Keep the id sequence alive when the legacy partition is eventually dropped
+    op.execute("ALTER SEQUENCE system_metrics_id_seq OWNED BY system_metrics.id")
+    op.execute("CREATE INDEX ix_system_metrics_id ON system_metrics (id)")
+    op.execute("CREATE INDEX ix_system_metrics_timestamp_id ON system_metrics (timestamp, id)")
+
+    op.execute(
+        "ALTER TABLE system_metrics ATTACH PARTITION system_metrics_legacy "
+        f"FOR VALUES FROM (MINVALUE) TO ('{legacy_end.isoformat()}')"
+    )
+    op.execute("CREATE TABLE system_metrics_default PARTITION OF system_metrics DEFAULT")
+    for offset in range(PREMAKE_DAYS):
+        day = legacy_end + timedelta(days=offset)
+        op.execute(
+            f"CREATE TABLE system_metrics_p{day:%Y%m%d} PARTITION OF system_metrics "
+            f"FOR VALUES FROM ('{day.isoformat()}') TO ('{(day + timedelta(days=1)).isoformat()}')"
+        )
+
+def downgrade() -> None:
+    if _is_postgresql() and (context.is_offline_mode() or _is_partitioned()):
+        # Copy every partition back into a plain table
+        op.execute("CREATE TABLE system_metrics_plain (LIKE system_metrics INCLUDING DEFAULTS)")
+        op.execute("INSERT INTO system_metrics_plain SELECT * FROM system_metrics")
+        op.execute("ALTER SEQUENCE system_metrics_id_seq OWNED BY system_metrics_plain.id")
+        op.execute("DROP TABLE system_metrics CASCADE")
+        op.execute("ALTER TABLE system_metrics_plain RENAME TO system_metrics")
+        op.execute("ALTER TABLE system_metrics ALTER COLUMN timestamp DROP NOT NULL")
+        op.execute("ALTER TABLE system_metrics ADD CONSTRAINT system_metrics_pkey PRIMARY KEY (id)")
+        op.execute("CREATE INDEX ix_system_metrics_id ON system_metrics (id)")
+        op.execute("CREATE INDEX ix_system_metrics_timestamp_id ON system_metrics (timestamp, id)")
+
+    op.drop_table("metrics_rollups")
@@ -0,0 +1,46 @@
+"""Typed network and disk I/O rate columns on system_metrics
+
+On PostgreSQL the columns are added to the partitioned parent, which
+propagates them to every partition.
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-17
+"""
+from alembic import context, op
+import sqlalchemy as sa
+
+revision = "0003"
+down_revision = "0002"
+branch_labels = None
+depends_on = None
+
+RATE_COLUMNS = [
+    "network_rx_bytes_per_sec",
+    "network_tx_bytes_per_sec",
+    "network_rx_packets_per_sec",
+    "network_tx_packets_per_sec",
+    "disk_read_bytes_per_sec",
+    "disk_write_bytes_per_sec",
+    "disk_read_iops",
+    "disk_write_iops",
+]
+
+def _existing_columns() -> set:
+    """Columns already on system_metrics; offline (--sql) mode assumes none."""
+    if context.is_offline_mode():
+        return set()
+    return {c["name"] for c in sa.inspect(op.get_bind()).get_columns("system_metrics")}
+
+def upgrade() -> None:
+    existing = _existing_columns()
+    for name in RATE_COLUMNS:
+        if name not in existing:
+            op.add_column("system_metrics", sa.Column(name, sa.Float(), nullable=True))
+
+def downgrade() -> None:
+    existing = set(RATE_COLUMNS) if context.is_offline_mode() else _existing_columns()
+    with op.batch_alter_table("system_metrics") as batch:
+        for name in reversed(RATE_COLUMNS):
+            if name in existing:
+                batch.drop_column(name)
@@ -0,0 +1,57 @@
+"""One agent_status row per agent, enforced by a unique index on agent_id
+
+Heartbeat flushes upsert with ON CONFLICT (agent_id), which needs a unique
+index that databases created before agent_status was upserted lack. Older
+databases may also hold several rows per agent; the most recent one (by
+last heartbeat, then timestamp) is kept and the rest are deleted first.
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-17
+"""
+from alembic import context, op
+import sqlalchemy as sa
+
+revision = "0004"
+down_revision = "0003"
+branch_labels = None
+depends_on = None
+
+INDEX_NAME = "uq_agent_status_agent_id"
+
+def _has_unique_agent_id() -> bool:
+    """Whether agent_id is already unique (e.g. created by create_all); offline mode assumes not."""
+    if context.is_offline_mode():
+        return False
+    inspector = sa.inspect(op.get_bind())
+    uniques = [c["column_names"] for c in inspector.get_unique_constraints("agent_status")]
+    uniques += [i["column_names"] for i in inspector.get_indexes("agent_status") if i["unique"]]
+    return ["agent_id"] in uniques
+
+def upgrade() -> None:
+    if _has_unique_agent_id():
+        return
+
+    # NULL heartbeats sort last on every backend
+    op.execute("""
+        DELETE FROM agent_status WHERE id IN (
+            SELECT id FROM (
+                SELECT id, ROW_NUMBER() OVER (
+                    PARTITION BY agent_id
+                    ORDER BY
+                        CASE WHEN last_heartbeat IS NULL THEN 1 ELSE 0 END, last_heartbeat DESC,
+                        CASE WHEN timestamp IS NULL THEN 1 ELSE 0 END, timestamp DESC,
+                        id DESC
+                ) AS position
+                FROM agent_status
+            ) ranked
+            WHERE position > 1
+        )
+    """)
+    op.create_index(INDEX_NAME, "agent_status", ["agent_id"], unique=True)
+
+def downgrade() -> None:
+    if context.is_offline_mode() or INDEX_NAME in {
+        i["name"] for i in sa.inspect(op.get_bind()).get_indexes("agent_status")
+    }:
+        op.drop_index(INDEX_NAME, table_name="agent_status")
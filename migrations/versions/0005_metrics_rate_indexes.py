@@ -0,0 +1,42 @@
+"""Indexes on the network rate columns of system_metrics
+
+Exfiltration checks look for samples above a byte-rate threshold within a
+time range, so each direction gets a (rate, timestamp) index. On
+PostgreSQL the index is created on the partitioned parent, which builds it
+on every partition and on partitions created later.
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-17
+"""
+from alembic import context, op
+import sqlalchemy as sa
+
+revision = "0005"
+down_revision = "0004"
+branch_labels = None
+depends_on = None
+
+# (index name, columns)
+INDEXES = [
+    ("ix_system_metrics_network_rx_timestamp", ["network_rx_bytes_per_sec", "timestamp"]),
+    ("ix_system_metrics_network_tx_timestamp", ["network_tx_bytes_per_sec", "timestamp"]),
+]
+
+def _existing_indexes() -> set:
+    """Indexes already on system_metrics (e.g. from create_all); offline (--sql) mode assumes none."""
+    if context.is_offline_mode():
+        return set()
+    return {i["name"] for i in sa.inspect(op.get_bind()).get_indexes("system_metrics")}
+
+def upgrade() -> None:
+    existing = _existing_indexes()
+    for name, columns in INDEXES:
+        if name not in existing:
+            op.create_index(name, "system_metrics", columns)
+
+def downgrade() -> None:
+    existing = {name for name, _ in INDEXES} if context.is_offline_mode() else _existing_indexes()
+    for name, _ in reversed(INDEXES):
+        if name in existing:
+            op.drop_index(name, table_name="system_metrics")
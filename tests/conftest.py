@@ -0,0 +1,86 @@
+import os
+import sys
+import tempfile
+import time
+from typing import Dict, Optional, Tuple
+
+# Settings are read at import time, so point the app at a scratch database first
+os.environ.setdefault("DATABASE_URL", f"sqlite+aiosqlite:///{tempfile.mkdtemp()}/test.db")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.api import incidents
+from app.core.database import db_manager
+from app.core.entity_cache import EntityCache, RedisCacheBackend
+from app.models.database import Incident
+
+class FakeRedis:
+    """In-process stand-in for the parts of ``redis.asyncio.Redis`` the cache uses.
+
+    Values are kept as the bytes Redis would return; ``now`` can be replaced
+    to move the clock past a TTL.
+    """
+
+    def __init__(self):
+        self.store: Dict[str, Tuple[bytes, Optional[float]]] = {}
+        self.now = time.monotonic
+        self.closed = False
+
+    async def get(self, key: str) -> Optional[bytes]:
+        value, expires_at = self.store.get(key, (None, None))
+        if expires_at is not None and self.now() >= expires_at:
+            del self.store[key]
+            return None
+        return value
+
+    async def set(self, key: str, value, px: Optional[int] = None) -> bool:
+        raw = value if isinstance(value, bytes) else str(value).encode()
+        self.store[key] = (raw, None if px is None else self.now() + px / 1000)
+        return True
+
+    async def delete(self, *keys: str) -> int:
+        return sum(self.store.pop(key, None) is not None for key in keys)
+
+    async def aclose(self) -> None:
+        self.closed = True
+
+@pytest.fixture
+def fake_redis() -> FakeRedis:
+    return FakeRedis()
+
+@pytest.fixture
+def redis_cache(fake_redis) -> EntityCache:
+    """An EntityCache on the Redis backend, talking to the in-process fake."""
+    return EntityCache(RedisCacheBackend("redis://fake", ttl=30.0, client=fake_redis))
+
+@pytest.fixture
+def client():
+    """A client for the incident endpoints on the scratch database."""
+    app = FastAPI()
+    app.include_router(incidents.router)
+    with TestClient(app) as client:
+        client.portal.call(db_manager.initialize)
+        yield client
+        client.portal.call(db_manager.close)
+
+@pytest.fixture
+def incident_id(client) -> str:
+    """A high-severity incident saved to the scratch database."""
+    async def create():
+        async with db_manager.get_session() as session:
+            incident = Incident(
+                incident_type="malware",
+                severity="high",
+                status="detected",
+                description="test incident",
+                target_systems=[],
+                evidence_ids=[]
+            )
+            session.add(incident)
+            await session.commit()
+            return incident.id
+
+    return client.portal.call(create)
@@ -0,0 +1,55 @@
+import asyncio
+
+from sqlalchemy import delete, func, select
+
+from app.core.database import db_manager
+from app.models.database import AgentStatus, Evidence
+
+def run_with_database(scenario):
+    async def wrapper():
+        await db_manager.initialize()
+        try:
+            return await scenario()
+        finally:
+            await db_manager.close()
+
+    return asyncio.run(wrapper())
+
+async def count(model) -> int:
+    async with db_manager.get_session() as session:
+        return (await session.execute(select(func.count()).select_from(model))).scalar()
+
+async def clear(model) -> None:
+    async with db_manager.get_session() as session:
+        await session.execute(delete(model))
+
+def test_bulk_insert_failing_last_chunk_writes_nothing():
+    async def scenario():
+        await clear(Evidence)
+        rows = [{"id": i, "source": "test"} for i in (1, 2, 3, 4, 1)]
+        inserted = await db_manager.bulk_insert(Evidence, rows, chunk_size=2)
+        return inserted, await count(Evidence)
+
+    assert run_with_database(scenario) == (False, 0)
+
+def test_bulk_insert_writes_every_chunk():
+    async def scenario():
+        await clear(Evidence)
+        rows = [{"id": i, "source": "test"} for i in range(1, 6)]
+        inserted = await db_manager.bulk_insert(Evidence, rows, chunk_size=2)
+        return inserted, await count(Evidence)
+
+    assert run_with_database(scenario) == (True, 5)
+
+def test_bulk_upsert_failure_writes_nothing():
+    async def scenario():
+        await clear(AgentStatus)
+        # The second row conflicts on the primary key, not the upsert key
+        rows = [
+            {"id": "s1", "agent_id": "a1", "agent_type": "guardian", "status": "active"},
+            {"id": "s1", "agent_id": "a2", "agent_type": "guardian", "status": "active"},
+        ]
+        upserted = await db_manager.bulk_upsert(AgentStatus, rows, ["agent_id"])
+        return upserted, await count(AgentStatus)
+
+    assert run_with_database(scenario) == (False, 0)
@@ -0,0 +1,163 @@
+import asyncio
+
+import pytest
+
+from app.core.entity_cache import EntityCache, MemoryCacheBackend, RedisCacheBackend
+
+@pytest.fixture(params=["memory", "redis"])
+def cache(request, fake_redis) -> EntityCache:
+    if request.param == "memory":
+        return EntityCache(MemoryCacheBackend(max_entries=100, ttl=30.0))
+    return EntityCache(RedisCacheBackend("redis://fake", ttl=30.0, client=fake_redis))
+
+class Loader:
+    """Counts calls and returns the current value, optionally after a gate opens."""
+
+    def __init__(self, value, gate: asyncio.Event = None):
+        self.value = value
+        self.gate = gate
+        self.calls = 0
+
+    async def __call__(self):
+        self.calls += 1
+        if self.gate is not None:
+            await self.gate.wait()
+        return self.value
+
+def test_get_or_load_caches_value(cache):
+    async def scenario():
+        load = Loader({"id": "i1", "status": "detected"})
+        first = await cache.get_or_load("incident", "i1", load)
+        second = await cache.get_or_load("incident", "i1", load)
+        return load.calls, first, second
+
+    calls, first, second = asyncio.run(scenario())
+    assert calls == 1
+    assert first == second == {"id": "i1", "status": "detected"}
+
+def test_missing_entity_is_not_cached(cache):
+    async def scenario():
+        load = Loader(None)
+        await cache.get_or_load("incident", "gone", load)
+        await cache.get_or_load("incident", "gone", load)
+        return load.calls
+
+    assert asyncio.run(scenario()) == 2
+
+def test_invalidate_forces_reload(cache):
+    async def scenario():
+        load = Loader({"status": "detected"})
+        await cache.get_or_load("incident", "i1", load)
+        load.value = {"status": "contained"}
+        stale = await cache.get_or_load("incident", "i1", load)
+        await cache.invalidate("incident", "i1")
+        fresh = await cache.get_or_load("incident", "i1", load)
+        return stale, fresh, load.calls
+
+    stale, fresh, calls = asyncio.run(scenario())
+    assert stale == {"status": "detected"}
+    assert fresh == {"status": "contained"}
+    assert calls == 2
+
+def test_invalidate_is_scoped_to_kind_and_id(cache):
+    async def scenario():
+        incident, agent = Loader({"kind": "incident"}), Loader({"kind": "agent"})
+        await cache.get_or_load("incident", "1", incident)
+        await cache.get_or_load("agent", "1", agent)
+        await cache.invalidate("incident", "1")
+        await cache.get_or_load("incident", "1", incident)
+        await cache.get_or_load("agent", "1", agent)
+        return incident.calls, agent.calls
+
+    assert asyncio.run(scenario()) == (2, 1)
+
+def test_concurrent_misses_share_one_load(cache):
+    async def scenario():
+        gate = asyncio.Event()
+        load = Loader({"id": "i1"}, gate)
+        readers = [asyncio.create_task(cache.get_or_load("incident", "i1", load)) for _ in range(10)]
+        await asyncio.sleep(0)
+        gate.set()
+        return load.calls, await asyncio.gather(*readers)
+
+    calls, results = asyncio.run(scenario())
+    assert calls == 1
+    assert results == [{"id": "i1"}] * 10
+    assert cache.shared == 9
+
+def test_concurrent_load_failure_reaches_every_waiter(cache):
+    async def scenario():
+        gate = asyncio.Event()
+
+        async def load():
+            await gate.wait()
+            raise RuntimeError("database down")
+
+        readers = [asyncio.create_task(cache.get_or_load("incident", "i1", load)) for _ in range(3)]
+        await asyncio.sleep(0)
+        gate.set()
+        return await asyncio.gather(*readers, return_exceptions=True)
+
+    results = asyncio.run(scenario())
+    assert all(isinstance(result, RuntimeError) for result in results)
+    assert cache.get_stats()["in_flight"] == 0
+
+def test_load_overlapping_invalidation_is_not_stored(cache):
+    async def scenario():
+        gate = asyncio.Event()
+        load = Loader({"status": "detected"}, gate)
+        reader = asyncio.create_task(cache.get_or_load("incident", "i1", load))
+        await asyncio.sleep(0)
+        # A write commits and invalidates while the read is still loading
+        await cache.invalidate("incident", "i1")
+        gate.set()
+        returned = await reader
+        load.gate, load.value = None, {"status": "contained"}
+        after = await cache.get_or_load("incident", "i1", load)
+        return returned, after, load.calls
+
+    returned, after, calls = asyncio.run(scenario())
+    assert returned == {"status": "detected"}
+    assert after == {"status": "contained"}
+    assert calls == 2
+
+def test_redis_entries_expire_after_ttl(redis_cache, fake_redis):
+    clock = [1000.0]
+    fake_redis.now = lambda: clock[0]
+
+    async def scenario():
+        load = Loader({"id": "i1"})
+        await redis_cache.get_or_load("incident", "i1", load)
+        clock[0] += 29
+        await redis_cache.get_or_load("incident", "i1", load)
+        clock[0] += 2
+        await redis_cache.get_or_load("incident", "i1", load)
+        return load.calls
+
+    assert asyncio.run(scenario()) == 2
+
+def test_redis_values_are_stored_as_json_under_prefix(redis_cache, fake_redis):
+    asyncio.run(redis_cache.get_or_load("incident", "i1", Loader({"id": "i1", "tags": ["a"]})))
+    assert fake_redis.store["kraken-flux:entity:incident:i1"][0] == b'{"id": "i1", "tags": ["a"]}'
+
+def test_backend_errors_degrade_to_uncached_reads(redis_cache, fake_redis):
+    async def broken(*args, **kwargs):
+        raise ConnectionError("redis unavailable")
+
+    fake_redis.get = fake_redis.set = fake_redis.delete = broken
+
+    async def scenario():
+        load = Loader({"id": "i1"})
+        first = await redis_cache.get_or_load("incident", "i1", load)
+        await redis_cache.invalidate("incident", "i1")
+        second = await redis_cache.get_or_load("incident", "i1", load)
+        return first, second, load.calls
+
+    first, second, calls = asyncio.run(scenario())
+    assert first == second == {"id": "i1"}
+    assert calls == 2
+    assert redis_cache.backend_errors == 5
+
+def test_close_closes_redis_client(redis_cache, fake_redis):
+    asyncio.run(redis_cache.close())
+    assert fake_redis.closed
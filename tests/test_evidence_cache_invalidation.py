@@ -0,0 +1,56 @@
+from typing import List, Tuple
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.api.v1.endpoints import evidence
+from app.core.database import db_manager
+from app.models.database import Evidence, Incident
+
+@pytest.fixture
+def client():
+    app = FastAPI()
+    app.include_router(evidence.router, prefix="/evidence")
+    with TestClient(app) as client:
+        client.portal.call(db_manager.initialize)
+        yield client
+        client.portal.call(db_manager.close)
+
+@pytest.fixture
+def invalidations(monkeypatch, redis_cache) -> List[Tuple[str, object]]:
+    calls: List[Tuple[str, object]] = []
+
+    async def recording_invalidate(kind, entity_id):
+        calls.append((kind, entity_id))
+
+    monkeypatch.setattr(redis_cache, "invalidate", recording_invalidate)
+    monkeypatch.setattr(evidence, "entity_cache", redis_cache)
+    return calls
+
+def test_moving_evidence_invalidates_both_incidents(client, invalidations):
+    async def create():
+        async with db_manager.get_session() as session:
+            first = Incident(incident_type="malware", severity="high", status="detected")
+            second = Incident(incident_type="malware", severity="high", status="detected")
+            session.add_all([first, second])
+            await session.flush()
+            row = Evidence(source="edr", evidence_type="log", severity="high", incident_id=first.id)
+            session.add(row)
+            await session.commit()
+            return first.id, second.id, row.id
+
+    first_id, second_id, evidence_id = client.portal.call(create)
+    response = client.put(f"/evidence/{evidence_id}", json={
+        "agent_id": 1,
+        "evidence_type": "log",
+        "evidence_data": {},
+        "severity": "high",
+        "confidence": 0.9,
+        "source": "edr",
+        "incident_id": second_id
+    })
+    assert response.status_code == 200
+
+    assert ("evidence", evidence_id) in invalidations
+    assert {("incident", first_id), ("incident", second_id)} <= set(invalidations)
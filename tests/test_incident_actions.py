@@ -0,0 +1,34 @@
+from typing import Dict, List
+
+import pytest
+
+from app.api import incidents
+
+@pytest.fixture
+def submitted(monkeypatch) -> List[Dict]:
+    """Record the tasks the action endpoint submits instead of running them."""
+    tasks: List[Dict] = []
+
+    async def submit_task(task, priority=None, reservation=None):
+        tasks.append(task)
+        return {"status": "success"}
+
+    monkeypatch.setattr(incidents.agent_manager, "submit_task", submit_task)
+    return tasks
+
+def test_action_task_keeps_server_owned_fields(client, submitted, incident_id):
+    response = client.post(f"/incidents/{incident_id}/actions", json={
+        "type": "isolate_host",
+        "agent_type": "containment",
+        "severity": "critical",
+        "action_id": "forged",
+        "parameters": {"host": "10.0.0.5"}
+    })
+    assert response.status_code == 200
+
+    [task] = submitted
+    assert task["severity"] == "high"
+    assert task["action_id"] == response.json()["action_id"]
+    assert task["type"] == "isolate_host"
+    assert task["agent_type"] == "containment"
+    assert task["parameters"] == {"host": "10.0.0.5"}
@@ -0,0 +1,51 @@
+from typing import List, Tuple
+
+import pytest
+
+from app.api import incidents
+
+@pytest.fixture
+def invalidations(monkeypatch, redis_cache) -> List[Tuple[str, str]]:
+    """Route the incident endpoints through the Redis-backed cache and record invalidations."""
+    calls: List[Tuple[str, str]] = []
+    invalidate = redis_cache.invalidate
+
+    async def recording_invalidate(kind, entity_id):
+        calls.append((kind, entity_id))
+        await invalidate(kind, entity_id)
+
+    monkeypatch.setattr(redis_cache, "invalidate", recording_invalidate)
+    monkeypatch.setattr(incidents, "entity_cache", redis_cache)
+    return calls
+
+def test_get_incident_is_served_from_cache(client, invalidations, redis_cache, incident_id):
+    assert client.get(f"/incidents/{incident_id}").status_code == 200
+    assert client.get(f"/incidents/{incident_id}").status_code == 200
+    assert redis_cache.loads == 1
+
+def test_update_invalidates_cached_incident(client, invalidations, incident_id):
+    before = client.get(f"/incidents/{incident_id}").json()
+    assert before["incident"]["status"] == "detected"
+
+    response = client.put(f"/incidents/{incident_id}", json={"status": "contained"})
+    assert response.status_code == 200
+    assert invalidations == [("incident", incident_id)]
+
+    after = client.get(f"/incidents/{incident_id}").json()
+    assert after["incident"]["status"] == "contained"
+
+def test_action_invalidates_cached_incident(client, invalidations, incident_id):
+    assert client.get(f"/incidents/{incident_id}").json()["actions"] == []
+
+    # No agent type: the task is refused without queueing, and the action is recorded as failed
+    response = client.post(f"/incidents/{incident_id}/actions", json={"type": "isolate_host"})
+    assert response.status_code == 200
+
+    # Once when the pending action is committed, again when its result is
+    assert invalidations == [("incident", incident_id)] * 2
+    actions = client.get(f"/incidents/{incident_id}").json()["actions"]
+    assert [(action["action_type"], action["status"]) for action in actions] == [("isolate_host", "failed")]
+
+def test_failed_update_does_not_invalidate(client, invalidations):
+    assert client.put("/incidents/missing", json={"status": "contained"}).status_code == 404
+    assert invalidations == []